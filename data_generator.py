@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import numpy as np
+from embedding_space import EmbeddingSpace
 
 # Create categories with more data points
 CATEGORIES = {
@@ -21,11 +22,11 @@ def generate_initial_spaces():
     """
     Generate initial image and text spaces with items clustered by category.
     The spaces are intentionally misaligned.
+    
+    Returns an EmbeddingSpace holding both modalities as (N, 2) arrays.
     """
     np.random.seed(42)  # For reproducibility
     
-    # Create image space - clustered by category
-    image_points = {}
     # Place each category in a different quadrant
     category_centers = {
         'animals': np.array([0.75, 0.75]),
@@ -34,21 +35,140 @@ def generate_initial_spaces():
         'nature': np.array([0.75, 0.25])
     }
     
-    for category, items in CATEGORIES.items():
-        for item in items:
-            image_points[item] = category_centers[category] + np.random.normal(0, 0.07, 2)
+    category_names = list(CATEGORIES)
+    items = [item for items in CATEGORIES.values() for item in items]
+    category_ids = np.repeat(np.arange(len(category_names)),
+                             [len(CATEGORIES[category]) for category in category_names])
     
-    # Create text space - differently oriented
-    text_points = {}
+    # Create image space - clustered by category
+    centers = np.array([category_centers[category] for category in category_names])
+    image_points = centers[category_ids] + np.random.normal(0, 0.07, (len(items), 2))
     
+    # Create text space - differently oriented
     # Create a rotation and scaling transformation
     rotation = np.array([
         [0, -1],
         [1, 0]
     ])
     
-    for item in image_points:
-        # Apply rotation and shift to create a differently oriented space
-        text_points[item] = rotation @ image_points[item] + np.array([0.1, 0.1])
+    # Apply rotation and shift to create a differently oriented space
+    text_points = image_points @ rotation.T + np.array([0.1, 0.1])
+    
+    colors = [CATEGORY_COLORS[category] for category in category_names]
+    return EmbeddingSpace(image_points, text_points, category_ids, category_names, colors, items=items)
+
+def _category_palette(num_categories):
+    """Return distinct hex colors, reusing CATEGORY_COLORS for the first categories."""
+    import colorsys
+    
+    colors = list(CATEGORY_COLORS.values())[:num_categories]
+    for k in range(len(colors), num_categories):
+        # Golden-ratio hue spacing keeps neighbouring categories distinguishable
+        r, g, b = colorsys.hsv_to_rgb((k * 0.618033988749895) % 1.0, 0.65, 0.85)
+        colors.append(f"#{int(r * 255):02x}{int(g * 255):02x}{int(b * 255):02x}")
+    return colors
+
+def _rotation_matrix(rotation, dim):
+    """Build a (dim, dim) rotation from an angle in the plane of the first two axes, or pass a matrix through."""
+    rotation = np.asarray(rotation, dtype=np.float32)
+    if rotation.ndim == 2:
+        if rotation.shape != (dim, dim):
+            raise ValueError(f"Rotation matrix must be ({dim}, {dim}), got {rotation.shape}")
+        return rotation
+    
+    matrix = np.eye(dim, dtype=np.float32)
+    if dim >= 2:
+        c, s = np.cos(rotation), np.sin(rotation)
+        matrix[:2, :2] = [[c, -s], [s, c]]
+    return matrix
+
+def generate_synthetic_spaces(num_categories=4, items_per_category=10, dim=2,
+                              rotation=np.pi / 2, offset=0.1, spread=0.07,
+                              seed=42, chunk_size=1_000_000, output_prefix=None):
+    """
+    Generate a large synthetic pair of misaligned image/text spaces.
+    
+    Category centers are drawn uniformly in [0.2, 0.8]^dim and items are
+    scattered around them with Gaussian noise. The text space is the image
+    space rotated by `rotation` (an angle in the plane of the first two axes,
+    or a full (dim, dim) matrix) and shifted by `offset`. Points are drawn in
+    chunks of `chunk_size` rows, so memory stays bounded.
+    
+    If `output_prefix` is given, positions stream straight into memory-mapped
+    `<prefix>_image.npy`, `<prefix>_text.npy` and `<prefix>_categories.npy`
+    files and the returned EmbeddingSpace is backed by them.
+    """
+    rng = np.random.default_rng(seed)
+    total = num_categories * items_per_category
+    
+    centers = rng.uniform(0.2, 0.8, (num_categories, dim)).astype(np.float32)
+    rotation_t = _rotation_matrix(rotation, dim).T
+    offset = np.broadcast_to(np.asarray(offset, dtype=np.float32), (dim,))
+    
+    if output_prefix is not None:
+        open_memmap = np.lib.format.open_memmap
+        image = open_memmap(f"{output_prefix}_image.npy", mode='w+', dtype=np.float32, shape=(total, dim))
+        text = open_memmap(f"{output_prefix}_text.npy", mode='w+', dtype=np.float32, shape=(total, dim))
+        category_ids = open_memmap(f"{output_prefix}_categories.npy", mode='w+', dtype=np.int32, shape=(total,))
+    else:
+        image = np.empty((total, dim), dtype=np.float32)
+        text = np.empty((total, dim), dtype=np.float32)
+        category_ids = np.empty(total, dtype=np.int32)
+    
+    for start in range(0, total, chunk_size):
+        stop = min(start + chunk_size, total)
+        ids = np.arange(start, stop, dtype=np.int32) // items_per_category
+        
+        # Cluster image points around their category centers
+        chunk = rng.normal(0, spread, (stop - start, dim)).astype(np.float32)
+        chunk += centers[ids]
+        
+        category_ids[start:stop] = ids
+        image[start:stop] = chunk
+        np.matmul(chunk, rotation_t, out=text[start:stop])
+        text[start:stop] += offset
+    
+    if output_prefix is not None:
+        for array in (image, text, category_ids):
+            array.flush()
+    
+    categories = [f"category{k}" for k in range(num_categories)]
+    return EmbeddingSpace(image, text, category_ids, categories, _category_palette(num_categories))
+
+def load_synthetic_spaces(prefix, mmap_mode='r'):
+    """Load a space written by generate_synthetic_spaces without reading it into RAM."""
+    image = np.load(f"{prefix}_image.npy", mmap_mode=mmap_mode)
+    text = np.load(f"{prefix}_text.npy", mmap_mode=mmap_mode)
+    category_ids = np.load(f"{prefix}_categories.npy", mmap_mode=mmap_mode)
+    
+    num_categories = int(category_ids[-1]) + 1 if len(category_ids) else 0
+    categories = [f"category{k}" for k in range(num_categories)]
+    return EmbeddingSpace(image, text, category_ids, categories, _category_palette(num_categories))
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Write a large synthetic embedding pair to memory-mapped .npy files.")
+    parser.add_argument("-c", "--categories", type=int, default=100,
+                       help="Number of categories (default: 100)")
+    parser.add_argument("-n", "--items-per-category", type=int, default=1000,
+                       help="Items per category (default: 1000)")
+    parser.add_argument("-d", "--dim", type=int, default=2,
+                       help="Embedding dimensionality (default: 2)")
+    parser.add_argument("-r", "--rotation", type=float, default=90.0,
+                       help="Text space rotation in degrees (default: 90)")
+    parser.add_argument("--offset", type=float, default=0.1,
+                       help="Text space offset (default: 0.1)")
+    parser.add_argument("--seed", type=int, default=42,
+                       help="Random seed (default: 42)")
+    parser.add_argument("--chunk-size", type=int, default=1_000_000,
+                       help="Rows drawn per chunk (default: 1000000)")
+    parser.add_argument("-o", "--output", type=str, default="synthetic",
+                       help="Output file prefix (default: synthetic)")
     
-    return image_points, text_points
+    args = parser.parse_args()
+    space = generate_synthetic_spaces(args.categories, args.items_per_category, args.dim,
+                                      np.deg2rad(args.rotation), args.offset,
+                                      seed=args.seed, chunk_size=args.chunk_size,
+                                      output_prefix=args.output)
+    print(f"Wrote {len(space)} paired {args.dim}D embeddings to {args.output}_{{image,text,categories}}.npy")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Density Aggregation for Contrastive Learning Visualization
+Author: Mikey Bee, 2025
+
+When there are far more points than pixels, individual markers only paint
+over each other. This module bins points into a per-pixel count grid and a
+per-pixel sum of category colors with `np.bincount`, then shades every pixel
+with the count-weighted blend of its categories' colors and an opacity that
+grows with the log of its count, in the style of datashader.
+
+Points are streamed through in fixed-size chunks, so memory is bounded by the
+chunk size plus a few canvas-sized grids no matter how many points there are
+(10M+ points per frame, including memory-mapped spaces). Shading only touches
+the canvas, so its cost depends on the canvas size rather than N.
+"""
+
+import numpy as np
+from matplotlib.colors import to_rgb
+
+# Points binned per chunk: about 40 MB of temporaries
+DENSITY_CHUNK = 1 << 20
+
+
+def aggregate(points, category_ids, category_colors, width, height, extent=(0, 1, 0, 1),
+              chunk_size=DENSITY_CHUNK):
+    """
+    Bin (N, 2) `points` into a `height` x `width` grid over `extent`.
+
+    Returns `(count, color_sum)`: the (H, W) number of points per pixel and the
+    (H, W, 3) sum of their category RGB colors. Row 0 is the top of the extent,
+    as for an image; points outside the extent are dropped.
+    """
+    x0, x1, y0, y1 = extent
+    palette = np.array([to_rgb(color) for color in category_colors], dtype=np.float64)
+    count = np.zeros(width * height, dtype=np.float64)
+    color_sum = np.zeros((3, width * height), dtype=np.float64)
+
+    for start in range(0, len(points), chunk_size):
+        chunk = np.asarray(points[start:start + chunk_size, :2], dtype=np.float32)
+        ids = np.asarray(category_ids[start:start + chunk_size])
+        column = np.floor((chunk[:, 0] - x0) * (width / (x1 - x0)))
+        row = np.floor((y1 - chunk[:, 1]) * (height / (y1 - y0)))
+        inside = (column >= 0) & (column < width) & (row >= 0) & (row < height)
+        pixel = row[inside].astype(np.int64) * width + column[inside].astype(np.int64)
+        ids = ids[inside]
+
+        count += np.bincount(pixel, minlength=width * height)
+        for channel in range(3):
+            color_sum[channel] += np.bincount(pixel, weights=palette[ids, channel],
+                                              minlength=width * height)
+
+    return count.reshape(height, width), color_sum.T.reshape(height, width, 3)
+
+
+def shade(count, color_sum, min_alpha=0.25):
+    """
+    Turn aggregated grids into an (H, W, 4) float RGBA image.
+
+    Each non-empty pixel takes the count-weighted mean color of its points,
+    with opacity rising from `min_alpha` to 1 with log(1 + count); empty
+    pixels are transparent.
+    """
+    image = np.zeros(count.shape + (4,), dtype=np.float32)
+    occupied = count > 0
+    if not occupied.any():
+        return image
+    image[occupied, :3] = color_sum[occupied] / count[occupied, None]
+    scale = np.log1p(count[occupied]) / np.log1p(count.max())
+    image[occupied, 3] = min_alpha + (1 - min_alpha) * scale
+    return image
+
+
+def density_image(points, category_ids, category_colors, width, height, extent=(0, 1, 0, 1),
+                  min_alpha=0.25, chunk_size=DENSITY_CHUNK):
+    """Aggregate and shade points in one call; see `aggregate` and `shade`."""
+    count, color_sum = aggregate(points, category_ids, category_colors, width, height, extent, chunk_size)
+    return shade(count, color_sum, min_alpha)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Easing Functions for Contrastive Learning Visualization
+Author: Mikey Bee, 2025
+
+Every easing here maps an array of interpolation parameters t in [0, 1], of
+any shape, to eased values in one vectorized call: the trajectory engine
+eases all steps at once. Custom Bézier curves are solved by a fixed number of
+bisection passes over the whole array and spline keyframes are located with
+`searchsorted`, so neither loops over elements in Python.
+
+`staggered` gives every item its own phase offset: t gains a trailing item
+axis and each item is eased over its own window of the timeline, which is
+one broadcast rather than a loop over items.
+"""
+
+import numpy as np
+
+
+def linear(t):
+    """No easing: constant speed."""
+    return np.asarray(t, dtype=np.float32)
+
+
+def cubic(t):
+    """Cubic ease-in-out: accelerate through the first half, decelerate through the second."""
+    t = np.asarray(t, dtype=np.float32)
+    p = 2 * t - 2
+    return np.where(t < 0.5, 4 * t * t * t, 0.5 * p * p * p + 1)
+
+
+def smoothstep(t):
+    """Hermite smoothstep, 3t^2 - 2t^3: zero speed at both ends."""
+    t = np.asarray(t, dtype=np.float32)
+    return t * t * (3 - 2 * t)
+
+
+def smooth(t, inflection=10.0):
+    """Manim's `smooth` rate function: a logistic curve rescaled to run from 0 to 1."""
+    t = np.asarray(t, dtype=np.float32)
+    error = 1 / (1 + np.exp(inflection / 2))
+    eased = (1 / (1 + np.exp(-inflection * (t - 0.5))) - error) / (1 - 2 * error)
+    return np.clip(eased, 0, 1).astype(np.float32)
+
+
+def spring(t, damping=5.0, frequency=1.5):
+    """Damped spring: overshoots the target and settles, reaching exactly 1 at t = 1."""
+    t = np.asarray(t, dtype=np.float32)
+    return (1 - (1 - t) * np.exp(-damping * t) * np.cos(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def bezier(x1, y1, x2, y2, iterations=24):
+    """
+    Return the easing of a CSS-style cubic Bézier from (0, 0) to (1, 1) with control points (x1, y1) and (x2, y2).
+
+    x1 and x2 must lie in [0, 1], so the curve's x is monotonic and each t
+    has one curve parameter, found by bisection to within 2**-iterations.
+    """
+    if not (0 <= x1 <= 1 and 0 <= x2 <= 1):
+        raise ValueError(f"Bézier control point x values must lie in [0, 1], got {x1} and {x2}")
+
+    def coordinate(s, p1, p2):
+        return 3 * (1 - s) ** 2 * s * p1 + 3 * (1 - s) * s * s * p2 + s ** 3
+
+    def ease(t):
+        t = np.clip(np.asarray(t, dtype=np.float64), 0, 1)
+        low, high = np.zeros_like(t), np.ones_like(t)
+        for _ in range(iterations):
+            middle = (low + high) / 2
+            below = coordinate(middle, x1, x2) < t
+            low = np.where(below, middle, low)
+            high = np.where(below, high, middle)
+        return coordinate((low + high) / 2, y1, y2).astype(np.float32)
+
+    return ease
+
+
+def keyframes(times, values):
+    """
+    Return the easing of a monotone cubic spline through keyframes `(times[k], values[k])`.
+
+    Times must increase from 0 to 1. Slopes follow Fritsch-Carlson, so the
+    spline does not overshoot between keyframes and holds still across
+    repeated values.
+    """
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if len(times) < 2 or np.any(np.diff(times) <= 0):
+        raise ValueError("Keyframe times must be increasing, with at least two keyframes")
+    widths = np.diff(times)
+    secants = np.diff(values) / widths
+
+    # Weighted harmonic mean of neighbouring secants, zero at local extrema
+    slopes = np.empty_like(values)
+    slopes[0], slopes[-1] = secants[0], secants[-1]
+    left, right = secants[:-1], secants[1:]
+    w1 = 2 * widths[1:] + widths[:-1]
+    w2 = widths[1:] + 2 * widths[:-1]
+    same_sign = left * right > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slopes[1:-1] = np.where(same_sign, (w1 + w2) / (w1 / left + w2 / right), 0)
+
+    def ease(t):
+        t = np.clip(np.asarray(t, dtype=np.float64), times[0], times[-1])
+        k = np.clip(np.searchsorted(times, t, side='right') - 1, 0, len(times) - 2)
+        h = widths[k]
+        s = (t - times[k]) / h
+        # Cubic Hermite basis
+        h00 = (1 + 2 * s) * (1 - s) ** 2
+        h10 = s * (1 - s) ** 2
+        h01 = s * s * (3 - 2 * s)
+        h11 = s * s * (s - 1)
+        eased = h00 * values[k] + h10 * h * slopes[k] + h01 * values[k + 1] + h11 * h * slopes[k + 1]
+        return eased.astype(np.float32)
+
+    return ease
+
+
+# Easings selectable with the runners' --easing option
+EASINGS = {
+    "linear": linear,
+    "cubic": cubic,
+    "smoothstep": smoothstep,
+    "smooth": smooth,
+    "spring": spring,
+    # CSS's `ease` curve
+    "bezier": bezier(0.25, 0.1, 0.25, 1.0),
+    # Hold briefly, move, and hold again before the end
+    "keyframes": keyframes([0, 0.15, 0.5, 0.85, 1], [0, 0, 0.5, 1, 1]),
+}
+
+
+def staggered(easing, phase, amount):
+    """
+    Return `easing` with per-item start offsets: item i starts at `phase[i] * amount`.
+
+    `phase` holds one value in [0, 1] per item and `amount` in [0, 1) is the
+    share of the timeline over which starts are spread; every item then
+    moves within a window of length `1 - amount`. The returned function maps
+    t of any shape to values of shape `t.shape + (len(phase),)`.
+    """
+    if not 0 <= amount < 1:
+        raise ValueError(f"Stagger must lie in [0, 1), got {amount}")
+    offset = np.asarray(phase, dtype=np.float32) * np.float32(amount)
+    window = np.float32(1 - amount)
+
+    def ease(t):
+        t = np.asarray(t, dtype=np.float32)
+        return easing(np.clip((t[..., None] - offset) / window, 0, 1))
+
+    return ease
+
+
+def category_phase(space):
+    """Phases that stagger items by category, first category first, in [0, 1]."""
+    return space.category_ids / max(len(space.categories) - 1, 1)
+
+
+def make_easing(name, stagger=0.0, space=None):
+    """Return the easing called `name`, staggered by category over `stagger` of the timeline when given a space."""
+    easing = EASINGS[name]
+    if stagger and space is not None:
+        return staggered(easing, category_phase(space), stagger)
+    return easing
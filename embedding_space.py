@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Embedding Space Store for Contrastive Learning Visualization
+Author: Mikey Bee, 2025
+
+This module provides a compact, array-backed container for paired image/text
+embeddings. Each modality is held as one contiguous (N, D) float32 array, with
+an item-name index and an integer category-id array, so renderers and runners
+can work on whole arrays instead of walking per-item dictionaries.
+"""
+
+import numpy as np
+
+
+class EmbeddingSpace:
+    """
+    Paired image and text embeddings for N items in D dimensions.
+
+    Attributes:
+        image: (N, D) float32 array of image-space positions
+        text: (N, D) float32 array of text-space positions
+        category_ids: (N,) int32 array indexing into `categories`
+        categories: list of category names, ordered by category id
+        category_colors: list of matplotlib colors, ordered by category id
+    """
+
+    def __init__(self, image, text, category_ids, categories, category_colors, items=None):
+        """Initialize the store, converting positions to contiguous float32 arrays."""
+        self.image = np.ascontiguousarray(image, dtype=np.float32)
+        self.text = np.ascontiguousarray(text, dtype=np.float32)
+        self.category_ids = np.ascontiguousarray(category_ids, dtype=np.int32)
+        self.categories = list(categories)
+        self.category_colors = list(category_colors)
+
+        if self.image.shape != self.text.shape or self.image.ndim != 2:
+            raise ValueError(f"Image and text arrays must share an (N, D) shape, "
+                             f"got {self.image.shape} and {self.text.shape}")
+        if self.category_ids.shape != (len(self.image),):
+            raise ValueError(f"Expected {len(self.image)} category ids, got {self.category_ids.shape}")
+
+        # Item names are optional so very large synthetic spaces don't need them
+        self._items = list(items) if items is not None else None
+        self._index = None
+
+    @classmethod
+    def from_dicts(cls, image_points, text_points, categories, category_colors):
+        """Build a store from `{item: point}` dicts and a `{category: [items]}` mapping."""
+        category_names = list(categories)
+        items, category_ids = [], []
+        for category_id, category in enumerate(category_names):
+            for item in categories[category]:
+                if item in image_points and item in text_points:
+                    items.append(item)
+                    category_ids.append(category_id)
+
+        image = np.array([image_points[item] for item in items])
+        text = np.array([text_points[item] for item in items])
+        colors = [category_colors[category] for category in category_names]
+        return cls(image, text, category_ids, category_names, colors, items=items)
+
+    def __len__(self):
+        return len(self.image)
+
+    @property
+    def dim(self):
+        """Dimensionality of each embedding."""
+        return self.image.shape[1]
+
+    @property
+    def items(self):
+        """Item names in row order, generated on demand for unnamed spaces."""
+        if self._items is None:
+            self._items = [f"item{i}" for i in range(len(self))]
+        return self._items
+
+    @property
+    def index(self):
+        """Mapping from item name to row index."""
+        if self._index is None:
+            self._index = {item: i for i, item in enumerate(self.items)}
+        return self._index
+
+    def copy(self):
+        """Return a copy with independent position arrays."""
+        return self.with_positions(self.image.copy(), self.text.copy())
+
+    def with_positions(self, image, text):
+        """Return a store sharing this one's metadata but holding new positions."""
+        space = EmbeddingSpace(image, text, self.category_ids, self.categories,
+                               self.category_colors, items=self._items)
+        space._index = self._index
+        return space
+
+    def point_colors(self):
+        """Per-point RGBA colors (N, 4) looked up from the category-id array."""
+        from matplotlib.colors import to_rgba_array
+        return to_rgba_array(self.category_colors)[self.category_ids]
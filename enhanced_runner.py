@@ -12,12 +12,19 @@ import subprocess
 import sys
 import shutil
 from importlib.util import find_spec
-from visualizer import plot_spaces, plot_combined_space
-from data_generator import generate_initial_spaces, CATEGORIES, CATEGORY_COLORS
+from data_generator import generate_initial_spaces
+from trajectory import DYNAMICS
+from easing import EASINGS, make_easing
+from frame_schedule import make_schedule
+from parallel_render import render_trajectory
+from frame_stream import FORMATS, GifEncoder, find_ffmpeg, fit_gif_to_size
+from frame_reuse import read_manifest
+from raster_renderer import BACKENDS, RasterRenderer
+from projection3d import CAMERAS, PROJECTIONS
 from improved_html_creator import create_enhanced_html_viewer
 
-def check_dependencies(mode):
-    """Check if required dependencies are installed based on mode."""
+def check_dependencies(mode, formats=("gif", "mp4")):
+    """Check if required dependencies are installed based on mode and 3D animation formats."""
     missing_dependencies = []
     
     if mode in ["static", "3d", "all"]:
@@ -25,10 +32,10 @@ def check_dependencies(mode):
             if find_spec(module) is None:
                 missing_dependencies.append(module)
     
-    if mode in ["3d", "all"]:
-        for module in ["imageio"]:
-            if find_spec(module) is None:
-                missing_dependencies.append(module)
+    # Video formats are skipped, not fatal, without ffmpeg
+    if mode in ["3d", "all"] and set(formats) & {"mp4", "webm"} and find_ffmpeg() is None:
+        print("Warning: ffmpeg not found; MP4/WebM output will be skipped.")
+        print("Install ffmpeg or run: pip install imageio-ffmpeg")
     
     if mode in ["manim", "all"]:
         for module in ["manim"]:
@@ -50,7 +57,10 @@ def check_dependencies(mode):
     
     return True
 
-def create_static_visualization(steps, output_dir):
+def create_static_visualization(steps, output_dir, dynamics="linear", temperature=0.1, learning_rate=0.2,
+                                workers=1, gif_target_size=None, compositing=False,
+                                backend="matplotlib", min_motion=1.0, easing="linear", stagger=0.0,
+                                frames=None, min_dwell=1, max_dwell=None):
     """Create improved static visualization with matplotlib."""
     print(f"\n=== Creating Enhanced Static Visualization with {steps} steps ===")
     
@@ -58,51 +68,44 @@ def create_static_visualization(steps, output_dir):
     os.makedirs(output_dir, exist_ok=True)
     
     # Generate initial spaces
-    image_points_orig, text_points_orig = generate_initial_spaces()
-    
-    # Create copies to transform
-    image_points = {k: v.copy() for k, v in image_points_orig.items()}
-    text_points = {k: v.copy() for k, v in text_points_orig.items()}
+    space_orig = generate_initial_spaces()
     
     try:
-        # Import the improved plot_spaces function
-        from improved_static_visualization import plot_spaces as improved_plot_spaces
+        # Import the improved renderer
+        from improved_static_visualization import SpacesRenderer
         from improved_static_visualization import plot_combined_space as improved_plot_combined
-        from improved_static_visualization import create_animated_gif
     except ImportError:
         print("Warning: improved_static_visualization.py not found. Using default visualization.")
-        from visualizer import plot_spaces as improved_plot_spaces
+        from visualizer import SpacesRenderer
         from visualizer import plot_combined_space as improved_plot_combined
-        
-        def create_animated_gif(output_dir, steps):
-            print("Animated GIF creation not available with default visualization.")
     
-    # Plot initial state
-    improved_plot_spaces(image_points, text_points, 0, steps, output_dir, CATEGORIES, CATEGORY_COLORS)
+    # The raster backend draws the basic two-panel layout without matplotlib
+    if backend == "raster":
+        renderer_cls, renderer_options = RasterRenderer, {}
+    else:
+        renderer_cls, renderer_options = SpacesRenderer, dict(compositing=compositing)
     
-    # For each step, transform the spaces
-    for step in range(1, steps + 1):
-        # Calculate interpolation parameter
-        t = step / steps
-        
-        # For each item, interpolate between original and target
-        for item in image_points:
-            if item in text_points:
-                # Calculate target position (halfway between points)
-                target = (image_points_orig[item] + text_points_orig[item]) / 2
-                
-                # Move both points toward the target
-                image_points[item] = image_points_orig[item] * (1 - t) + target * t
-                text_points[item] = text_points_orig[item] * (1 - t) + target * t
-        
-        # Plot current state
-        improved_plot_spaces(image_points, text_points, step, steps, output_dir, CATEGORIES, CATEGORY_COLORS)
+    # Plot every step of the alignment trajectory, one persistent renderer per worker,
+    # streaming each frame into the animated GIF as it is rendered
+    animation_path = f"{output_dir}/contrastive_learning_animation.gif"
+    with GifEncoder(animation_path, fps=10) as animation:
+        space = render_trajectory(renderer_cls, space_orig, steps, output_dir, workers,
+                                  dynamics, temperature, learning_rate, sinks=[animation],
+                                  renderer_options=renderer_options, min_motion=min_motion,
+                                  easing=make_easing(easing, stagger, space_orig),
+                                  schedule=make_schedule(frames, min_dwell, max_dwell))
+
+    # Shrink the GIF from the saved frames if it came out over the size budget
+    rendered = read_manifest(output_dir)
+    if gif_target_size and os.path.getsize(animation_path) > gif_target_size * 1024:
+        frame_files = [os.path.join(output_dir, frame["file"]) for frame in rendered]
+        scale = fit_gif_to_size(frame_files, animation_path, gif_target_size * 1024,
+                                holds=[frame["hold"] for frame in rendered])
+        print(f"Animation scaled to {scale:.0%} to fit in {gif_target_size} KB")
+    print(f"Animation created: {animation_path}")
     
     # Create combined space visualization
-    improved_plot_combined(image_points, text_points, output_dir, CATEGORIES, CATEGORY_COLORS)
-    
-    # Create animated GIF
-    create_animated_gif(output_dir, steps)
+    improved_plot_combined(space, output_dir)
     
     # Create enhanced HTML viewer
     try:
@@ -112,10 +115,13 @@ def create_static_visualization(steps, output_dir):
         from html_creator import create_html_viewer
         create_html_viewer(output_dir, steps + 1)
     
-    print(f"Enhanced static visualization complete! {steps+1} frames created in '{output_dir}' folder.")
+    print(f"Enhanced static visualization complete! {len(rendered)} frames created in '{output_dir}' folder.")
     print(f"To view the visualization, open: {output_dir}/interactive_viewer.html")
 
-def create_3d_visualization(steps, output_dir):
+def create_3d_visualization(steps, output_dir, dynamics="linear", temperature=0.1, learning_rate=0.2,
+                            formats=("gif", "mp4"), video_codec=None, crf=18, preset="medium", threads=0,
+                            projection="mplot3d", views=("default",), easing="cubic", stagger=0.0,
+                            frames=None, min_dwell=1, max_dwell=None):
     """Create 3D visualization."""
     print(f"\n=== Creating 3D Visualization with {steps} steps ===")
     
@@ -127,11 +133,15 @@ def create_3d_visualization(steps, output_dir):
         from improved_3d_visualizer import ContrastiveLearning3DVisualizer
         
         # Create the 3D visualization
-        visualizer = ContrastiveLearning3DVisualizer(output_dir_3d, steps)
+        visualizer = ContrastiveLearning3DVisualizer(output_dir_3d, steps, dynamics,
+                                                     temperature, learning_rate, formats,
+                                                     video_codec, crf, preset, threads,
+                                                     projection=projection, views=views,
+                                                     easing=easing, stagger=stagger, frames=frames,
+                                                     min_dwell=min_dwell, max_dwell=max_dwell)
         visualizer.create_visualization()
         
-        print(f"3D visualization complete! {steps+1} frames created in '{output_dir_3d}' folder.")
-        print(f"Animation saved as: {output_dir_3d}/contrastive_learning_3d.gif")
+        print(f"3D visualization complete! {min(frames or steps + 1, steps + 1)} frames created in '{output_dir_3d}' folder.")
     except ImportError:
         print("Error: Could not create 3D visualization. Make sure improved_3d_visualizer.py is available.")
         print("You can install required dependencies with: pip install matplotlib numpy imageio")
@@ -139,12 +149,13 @@ def create_3d_visualization(steps, output_dir):
     
     return True
 
-def create_manim_animation(steps, output_dir):
+def create_manim_animation(steps, output_dir, easing="smooth"):
     """Create Manim animation."""
     print(f"\n=== Creating Manim Animation ===")
     
-    # Set environment variable for output directory
+    # Set environment variables for output directory and easing
     os.environ["MEDIA_DIR"] = output_dir
+    os.environ["CONTRASTIVE_EASING"] = easing
     
     # Check which Manim script exists
     manim_script = "improved_manim_animation.py"
@@ -200,6 +211,46 @@ def main():
                        help="Number of transformation steps (default: 100)")
     parser.add_argument("-o", "--output", type=str, default="contrastive_viz",
                        help="Output directory prefix (default: contrastive_viz)")
+    parser.add_argument("--dynamics", type=str, choices=DYNAMICS, default="linear",
+                       help="Alignment dynamics: linear interpolation or InfoNCE training (default: linear)")
+    parser.add_argument("--temperature", type=float, default=0.1,
+                       help="InfoNCE temperature (default: 0.1)")
+    parser.add_argument("--learning-rate", type=float, default=0.2,
+                       help="InfoNCE learning rate (default: 0.2)")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                       help="Number of processes rendering static frames in parallel (default: 1)")
+    parser.add_argument("--gif-target-size", type=int, default=None,
+                       help="Largest size of the static animated GIF in KB, frames are downscaled to fit (default: no limit)")
+    parser.add_argument("--compositing", action="store_true",
+                       help="Rasterize the static parts of the figure once and redraw only moving artists per frame")
+    parser.add_argument("--backend", type=str, choices=BACKENDS, default="matplotlib",
+                       help="Frame renderer: matplotlib, or raster to draw the basic two-panel layout straight into NumPy buffers for very large point clouds (default: matplotlib)")
+    parser.add_argument("--min-motion", type=float, default=1.0,
+                       help="Pixels points must move before a frame redraws them, with --compositing or the raster backend; 0 redraws every step (default: 1.0)")
+    parser.add_argument("--formats", type=str, nargs='+', choices=FORMATS, default=["gif", "mp4"],
+                       help="Animation formats written by the 3D mode (default: gif mp4)")
+    parser.add_argument("--codec", type=str, default=None,
+                       help="ffmpeg video codec for 3D MP4 output (default: libx264)")
+    parser.add_argument("--crf", type=int, default=18,
+                       help="ffmpeg constant rate factor for 3D video output (default: 18)")
+    parser.add_argument("--preset", type=str, default="medium",
+                       help="ffmpeg encoder preset for 3D MP4 output (default: medium)")
+    parser.add_argument("--threads", type=int, default=0,
+                       help="ffmpeg encoder threads, 0 for automatic (default: 0)")
+    parser.add_argument("--easing", type=str, choices=EASINGS, default=None,
+                       help="Easing of the linear alignment over time (default: linear for static, cubic for 3D, smooth for Manim)")
+    parser.add_argument("--stagger", type=float, default=0.0,
+                       help="Share of the timeline over which categories start moving one after another in the static and 3D modes, 0 moves all items together (default: 0)")
+    parser.add_argument("--frames", type=int, default=None,
+                       help="Frame budget of the static and 3D modes, first and last step included, placed along the trajectory where points move most on screen and each held until the next (default: render every step)")
+    parser.add_argument("--min-dwell", type=int, default=1,
+                       help="Fewest steps a scheduled frame is held for (default: 1)")
+    parser.add_argument("--max-dwell", type=int, default=None,
+                       help="Most steps a scheduled frame is held for (default: no limit)")
+    parser.add_argument("--views", type=str, nargs='+', choices=CAMERAS, default=["default"],
+                       help="Camera paths of the 3D mode, rendered from one alignment into a subdirectory each when there are several (default: default)")
+    parser.add_argument("--projection", type=str, choices=PROJECTIONS, default="mplot3d",
+                       help="3D projection: mplot3d collections, or one matrix product per frame drawn as 2D collections (matrix) or splatted into the frame (raster) (default: mplot3d)")
     
     args = parser.parse_args()
     
@@ -210,21 +261,31 @@ def main():
     print(f"Mode: {args.mode}")
     print(f"Steps: {args.steps}")
     print(f"Output directory: {args.output}")
+    print(f"Dynamics: {args.dynamics}")
+    print(f"Workers: {args.workers}")
     print("--------------------------------------------------------")
     
     # Check dependencies
-    if not check_dependencies(args.mode):
+    if not check_dependencies(args.mode, args.formats):
         return
     
     # Create visualizations based on mode
     if args.mode in ["static", "all"]:
-        create_static_visualization(args.steps, f"{args.output}_static")
+        create_static_visualization(args.steps, f"{args.output}_static", args.dynamics,
+                                    args.temperature, args.learning_rate, args.workers,
+                                    args.gif_target_size, args.compositing, args.backend,
+                                    args.min_motion, args.easing or "linear", args.stagger,
+                                    args.frames, args.min_dwell, args.max_dwell)
     
     if args.mode in ["3d", "all"]:
-        create_3d_visualization(args.steps, args.output)
+        create_3d_visualization(args.steps, args.output, args.dynamics,
+                                args.temperature, args.learning_rate, args.formats,
+                                args.codec, args.crf, args.preset, args.threads, args.projection,
+                                args.views, args.easing or "cubic", args.stagger,
+                                args.frames, args.min_dwell, args.max_dwell)
     
     if args.mode in ["manim", "all"]:
-        create_manim_animation(args.steps, f"{args.output}_manim")
+        create_manim_animation(args.steps, f"{args.output}_manim", args.easing or "smooth")
     
     if args.mode in ["html", "all"]:
         try:
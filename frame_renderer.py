@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Persistent Frame Renderer Base for Contrastive Learning Visualization
+Author: Mikey Bee, 2025
+
+Renderers built on this base create their figure, axes and static decorations
+once, then update artists in place for every step instead of rebuilding the
+whole figure per frame. Every frame is drawn once on the Agg canvas at the
+save resolution and cut to the tight bounding box of the first frame; that
+one buffer is saved as the step's PNG and streamed to encoders from
+frame_stream.py.
+
+In compositing mode the static layer (axes, grid, titles, legend, ...) is
+rasterized once and every frame restores that buffer with Agg blitting and
+draws only the artists that move, so a frame costs what changes in it. The
+buffer with the points drawn is kept as well, so a frame whose points have
+not moved since (see frame_reuse.py) only redraws its step text over it.
+"""
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.path import Path
+from PIL import Image
+
+
+def describe_step(step, total_steps):
+    """Return the explanation text and its accent color for a step."""
+    if step == total_steps:
+        return "Spaces aligned! Same concepts now occupy the same positions", 'darkgreen'
+    if step == 0:
+        return "Starting with misaligned spaces: similar concepts are in different positions", 'darkorange'
+    if step < total_steps // 4:
+        return "Beginning alignment through contrastive learning...", 'darkorange'
+    if step < total_steps // 2:
+        return "Gradually aligning spaces through contrastive learning...", 'darkcyan'
+    if step < 3 * total_steps // 4:
+        return "Similar concepts are being pulled together across spaces", 'darkcyan'
+    return "Spaces nearing perfect alignment", 'darkgreen'
+
+
+def frame_filename(output_dir, step, total_steps):
+    """Path of a step's frame, zero-padded so frames sort correctly."""
+    padded_step = str(step).zfill(len(str(total_steps)))
+    return f"{output_dir}/step_{padded_step}.png"
+
+
+def cross_axes_segments(ax_a, points_a, ax_b, points_b):
+    """
+    Return (N, 2, 2) figure-fraction segments joining data points of two axes.
+
+    Used to draw all cross-panel correspondence lines as one figure-level
+    LineCollection; recompute whenever the points or the layout change.
+    """
+    to_figure = ax_a.figure.transFigure.inverted()
+    segments = np.empty((len(points_a), 2, 2))
+    segments[:, 0] = (ax_a.transData + to_figure).transform(points_a)
+    segments[:, 1] = (ax_b.transData + to_figure).transform(points_b)
+    return segments
+
+
+def outside_axes_clip(axes):
+    """
+    Figure-fraction path covering the whole figure except the given axes.
+
+    Figure-level artists drawn under the axes are hidden by their opaque
+    backgrounds; clipping them to this path keeps that look when they are
+    composited over the static layer.
+    """
+    paths = [Path.unit_rectangle()]
+    for ax in axes:
+        (x0, y0), (x1, y1) = ax.get_position().get_points()
+        # Clockwise, so the axes become holes under the nonzero fill rule
+        paths.append(Path([(x0, y0), (x0, y1), (x1, y1), (x1, y0), (x0, y0)], closed=True))
+    return Path.make_compound_path(*paths)
+
+
+class PersistentRenderer:
+    """
+    Base class for renderers that keep one figure alive across frames.
+
+    Subclasses build `self.fig` and its static decorations in `__init__` and
+    implement `update(space, step)` to move the dynamic artists. Encoders
+    appended to `self.sinks` receive every rendered frame. Subclasses that
+    list their moving artists in `dynamic_artists()` can render with
+    `compositing=True`; those that also list the artists showing only the
+    step (titles, progress) in `step_artists()` can patch frames whose
+    points did not move.
+    """
+
+    def __init__(self, total_steps, output_dir, savefig_kwargs=None, compositing=False):
+        """Initialize shared frame-saving state."""
+        self.total_steps = total_steps
+        self.output_dir = output_dir
+        self.savefig_kwargs = savefig_kwargs or {}
+        self.compositing = compositing
+        self.fig = None
+        self.sinks = []
+        self._background = None
+        self._points_layer = None
+        self._layer_step = None
+        self._crop = None
+
+    def frame_path(self, step):
+        """Path of a step's frame, zero-padded so frames sort correctly."""
+        return frame_filename(self.output_dir, step, self.total_steps)
+
+    def update(self, space, step):
+        """Move the dynamic artists to the positions held in `space`."""
+        raise NotImplementedError
+
+    def dynamic_artists(self):
+        """Artists changed by `update`, drawn per frame over the static layer in compositing mode."""
+        raise NotImplementedError(f"{type(self).__name__} does not support compositing")
+
+    def step_artists(self):
+        """Dynamic artists that depend only on the step, redrawn alone when the points have not moved."""
+        return []
+
+    def reuses_frames(self):
+        """Whether frames drawn with an earlier step's positions only redraw the step artists."""
+        return self.compositing and bool(self.step_artists())
+
+    def pixels_per_unit(self):
+        """(x, y) saved-frame pixels per data unit, the largest over the figure's axes."""
+        scale = self.savefig_kwargs.get('dpi', self.fig.dpi) / self.fig.dpi
+        sizes = [(ax.bbox.width / abs(np.diff(ax.get_xlim())[0]), ax.bbox.height / abs(np.diff(ax.get_ylim())[0]))
+                 for ax in self.fig.axes]
+        return np.max(sizes, axis=0) * scale
+
+    def _use_save_dpi(self):
+        """Draw on an Agg canvas at the resolution frames are saved at."""
+        if not isinstance(self.fig.canvas, FigureCanvasAgg):
+            FigureCanvasAgg(self.fig)
+        dpi = self.savefig_kwargs.get('dpi', self.fig.dpi)
+        if self.fig.dpi != dpi:
+            self.fig.set_dpi(dpi)
+
+    def _measure_crop(self):
+        """Measure the tight bounding box of the last drawn figure as savefig would, if frames are cut to it."""
+        if self.savefig_kwargs.get('bbox_inches') == 'tight':
+            bbox = self.fig.get_tightbbox().padded(plt.rcParams['savefig.pad_inches'])
+            # Sized like savefig, which truncates the bbox extent to whole pixels
+            self._crop = (round(bbox.x0 * self.fig.dpi), round(bbox.y0 * self.fig.dpi),
+                          int(bbox.width * self.fig.dpi), int(bbox.height * self.fig.dpi))
+
+    def _build_static_layer(self):
+        """Rasterize everything but the dynamic artists once and keep the buffer."""
+        self._use_save_dpi()
+        # Point artists first, then the step artists over them
+        step_artists = self.step_artists()
+        self._artists = sorted((artist for artist in self.dynamic_artists() if artist not in step_artists),
+                               key=lambda artist: artist.get_zorder())
+        self._step_artists = sorted(step_artists, key=lambda artist: artist.get_zorder())
+
+        # Fixed tight bounding box, measured once with the first frame's artists in place
+        if self.savefig_kwargs.get('bbox_inches') == 'tight':
+            self.fig.canvas.draw()
+            self._measure_crop()
+
+        for artist in self._artists + self._step_artists:
+            artist.set_animated(True)
+        self.fig.canvas.draw()
+        self._background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+
+    def _tight(self, frame):
+        """Cut a drawn frame to the tight bounding box, padding with the figure color past the edges."""
+        if self._crop is None:
+            return frame
+        left, bottom, width, height = self._crop
+        # Figure y runs upwards, buffer rows downwards
+        top = frame.shape[0] - (bottom + height)
+        tight = np.empty((height, width, 4), dtype=np.uint8)
+        tight[...] = np.round(np.array(self.fig.get_facecolor()) * 255)
+        rows = slice(max(top, 0), min(top + height, frame.shape[0]))
+        cols = slice(max(left, 0), min(left + width, frame.shape[1]))
+        tight[rows.start - top:rows.stop - top, cols.start - left:cols.stop - left] = frame[rows, cols]
+        return tight
+
+    def composite(self, patch=False):
+        """
+        Blit the static layer back and draw only the dynamic artists; return the RGBA buffer.
+
+        With `patch=True` the cached layer of the previously drawn points is
+        restored instead and only the step artists are drawn.
+        """
+        if self._background is None:
+            self._build_static_layer()
+        if patch and self._points_layer is not None:
+            self.fig.canvas.restore_region(self._points_layer)
+        else:
+            self.fig.canvas.restore_region(self._background)
+            for artist in self._artists:
+                self.fig.draw_artist(artist)
+            if self._step_artists:
+                self._points_layer = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        for artist in self._step_artists:
+            self.fig.draw_artist(artist)
+        return np.asarray(self.fig.canvas.buffer_rgba())
+
+    def frame_rgba(self):
+        """Draw the figure and return the Agg canvas' (H, W, 4) RGBA buffer."""
+        if not isinstance(self.fig.canvas, FigureCanvasAgg):
+            FigureCanvasAgg(self.fig)
+        self.fig.canvas.draw()
+        return np.asarray(self.fig.canvas.buffer_rgba())
+
+    def render(self, space, step, base=None):
+        """
+        Update the figure for a step, save it as that step's frame and stream it to the sinks.
+
+        `base` is the step whose positions `space` holds, when the points are
+        drawn where they were at an earlier step; if this renderer drew that
+        step last, compositing only redraws the step artists.
+        """
+        base = step if base is None else base
+        self.update(space, step)
+        if self.compositing:
+            frame = self.composite(patch=base != step and base == self._layer_step)
+            self._layer_step = base
+        else:
+            # One draw at the save dpi feeds both the PNG and the sinks
+            self._use_save_dpi()
+            frame = self.frame_rgba()
+            if self._crop is None:
+                # Tight bounding box fixed at the first frame, so streamed frames keep one size
+                self._measure_crop()
+        frame = self._tight(frame)
+        Image.fromarray(frame).save(self.frame_path(step))
+        for sink in self.sinks:
+            sink.write(frame)
+
+    def close(self):
+        """Release the figure."""
+        plt.close(self.fig)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Motion-Aware Frame Reuse for Contrastive Learning Visualization
+Author: Mikey Bee, 2025
+
+Late in a linear alignment points move by sub-pixel amounts per step, so
+re-rendering them changes nothing visible. The tracker below measures, from
+the trajectory arrays, the largest screen-space displacement of any point
+since the last frame that was drawn with fresh positions (its base step).
+Steps that stay under `min_motion` pixels are drawn with their base step's
+positions, so renderers can reuse that frame's cached point layer and only
+redraw the step text. Displacement is measured against the base rather than
+the previous step, so slow drift still triggers a redraw once it adds up to
+a pixel.
+
+Every decision is recorded in a JSON manifest next to the frames, which
+encoders and viewers can use to skip or dedupe reused frames, along with
+how many steps each frame is held for.
+"""
+
+import json
+import os
+import numpy as np
+
+# Manifest written next to the frames
+MANIFEST_NAME = "frames.json"
+
+
+def screen_displacement(image_a, text_a, image_b, text_b, pixels_per_unit):
+    """Largest on-screen distance, in pixels, any image or text point moved between two states."""
+    scale = np.asarray(pixels_per_unit, dtype=np.float64)
+    displacement = 0.0
+    for a, b in ((image_a, image_b), (text_a, text_b)):
+        delta = np.abs(np.asarray(b)[:, :2] - np.asarray(a)[:, :2]) * scale
+        displacement = max(displacement, float(delta.max(initial=0)))
+    return displacement
+
+
+class MotionTracker:
+    """
+    Decides per step whether points moved enough to be redrawn.
+
+    `pixels_per_unit` is the renderer's (x, y) scale from data units to
+    saved-frame pixels. The first and last steps are always drawn with their
+    own positions; `min_motion=0` redraws every step.
+    """
+
+    def __init__(self, total_steps, pixels_per_unit, min_motion=1.0):
+        """Start with no base step; the first step tracked becomes one."""
+        self.total_steps = total_steps
+        self.pixels_per_unit = pixels_per_unit
+        self.min_motion = min_motion
+        self.frames = []
+        self._base = None
+
+    def track(self, step, image, text, copy=True):
+        """
+        Return `(base, base_image, base_text)`: the step whose positions `step` is drawn with, and them.
+
+        New base positions are copied unless `copy=False` says the arrays are
+        not refilled in place by later steps.
+        """
+        if self._base is None:
+            displacement = 0.0
+        else:
+            _, base_image, base_text = self._base
+            displacement = screen_displacement(base_image, base_text, image, text, self.pixels_per_unit)
+
+        moved = self._base is None or step == self.total_steps or displacement >= self.min_motion
+        if moved:
+            self._base = (step, np.array(image), np.array(text)) if copy else (step, image, text)
+        base = self._base[0]
+        self.frames.append(dict(step=step, base=base, reused=base != step,
+                                displacement=round(displacement, 3)))
+        return self._base
+
+    def write_manifest(self, output_dir, frame_files, holds=None):
+        """
+        Write the reuse decisions, with each step's frame file name, to the manifest.
+
+        `holds` gives the steps each frame is shown for (see
+        frame_schedule.py), one for every frame when not given.
+        """
+        holds = np.ones(len(self.frames), dtype=int) if holds is None else holds
+        frames = [dict(frame, file=os.path.basename(path), hold=int(hold))
+                  for frame, path, hold in zip(self.frames, frame_files, holds)]
+        manifest = dict(total_steps=self.total_steps, min_motion=self.min_motion,
+                        reused=sum(frame['reused'] for frame in frames), frames=frames)
+        path = os.path.join(output_dir, MANIFEST_NAME)
+        with open(path, 'w') as file:
+            json.dump(manifest, file, indent=2)
+        return path
+
+
+def read_manifest(output_dir):
+    """Return the frame entries of the manifest in `output_dir`, or None when there is no manifest."""
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return json.load(file)['frames']
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Adaptive Frame Scheduling for Contrastive Learning Visualization
+Author: Mikey Bee, 2025
+
+With eased or staggered alignments most of the motion happens in a few
+steps, yet rendering every step spends as many frames on the still ends as
+on the busy middle. The scheduler measures how far points move on screen
+from step to step, as the largest displacement of any point (like
+frame_reuse.py), and places a fixed budget of frames at equal intervals of
+that cumulative motion, i.e. of the trajectory's arc length. Every frame is
+held until the next one's step, so animations keep the trajectory's timing
+while their frames bunch up where the points move.
+
+Holds are counted in steps: an encoder shows a frame held for 3 steps for
+three of its frame intervals. They reach the streaming encoders through
+`set_holds` and the HTML viewers through the frames.json manifest.
+"""
+
+import numpy as np
+from frame_reuse import screen_displacement
+
+
+def trajectory_motion(states, pixels_per_unit=1.0):
+    """
+    Return the (T,) on-screen motion, in pixels, of steps 1 to T.
+
+    `states` yields the `(image, text)` positions of steps 0 to T; each
+    step is copied, so buffers refilled in place between steps are fine.
+    """
+    motion, previous = [], None
+    for image, text in states:
+        if previous is not None:
+            motion.append(screen_displacement(*previous, image, text, pixels_per_unit))
+        previous = (np.array(image), np.array(text))
+    return np.array(motion)
+
+
+def frame_density(motion, intervals, low=0.0, high=1.0, iterations=100):
+    """
+    Share frames out over steps in proportion to their motion, within bounds.
+
+    Returns how many frame intervals fall on each step, between `low` and
+    `high` and summing to `intervals`: `clip(scale * motion, low, high)`
+    with the scale found by bisection. A small uniform weight keeps the
+    result defined over steps without motion.
+    """
+    motion = np.asarray(motion, dtype=np.float64)
+    weight = motion + 1e-3 * (motion.mean() if motion.any() else 1.0)
+    lower, upper = 0.0, high / weight.min()
+    for _ in range(iterations):
+        scale = (lower + upper) / 2
+        if np.clip(scale * weight, low, high).sum() < intervals:
+            lower = scale
+        else:
+            upper = scale
+    return np.clip(upper * weight, low, high)
+
+
+def schedule_frames(motion, frames, min_dwell=1, max_dwell=None):
+    """
+    Return the steps of a budget of `frames` frames, first and last step included, spaced by motion.
+
+    `motion` is the (T,) output of `trajectory_motion`. Frames sit at equal
+    intervals of cumulative motion, while consecutive frames stay between
+    `min_dwell` and `max_dwell` steps apart, to within a step. A budget
+    covering every step renders every step.
+    """
+    total_steps = len(motion)
+    if frames < 2:
+        raise ValueError(f"A frame schedule needs at least 2 frames, got {frames}")
+    if frames > total_steps:
+        return np.arange(total_steps + 1)
+
+    intervals = frames - 1
+    low = 0.0 if max_dwell is None else 1 / max_dwell
+    high = 1 / max(min_dwell, 1)
+    if not total_steps * low <= intervals <= total_steps * high:
+        raise ValueError(f"{frames} frames cannot cover {total_steps} steps with dwells of "
+                         f"{min_dwell} to {max_dwell} steps")
+
+    # Cumulative frames per step; frame k sits where it reaches k
+    cumulative = np.concatenate([[0], np.cumsum(frame_density(motion, intervals, low, high))])
+    positions = np.interp(np.arange(frames), cumulative, np.arange(total_steps + 1))
+    # At most one frame per step, so rounding half up keeps the steps distinct
+    steps = np.floor(positions + 0.5).astype(int)
+    steps[0], steps[-1] = 0, total_steps
+    return steps
+
+
+def frame_holds(steps):
+    """Steps each frame is held for: until the next frame's step, and one for the last frame."""
+    return np.diff(steps, append=steps[-1] + 1)
+
+
+def make_schedule(frames=None, min_dwell=1, max_dwell=None):
+    """Return a function mapping step motion to the steps to render, or None to render every step."""
+    if frames is None:
+        return None
+    return lambda motion: schedule_frames(motion, frames, min_dwell, max_dwell)
@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+"""
+Streaming Frame Encoders for Contrastive Learning Visualization
+Author: Mikey Bee, 2025
+
+Renderers hand raw RGBA buffers from the Agg canvas to these encoders, which
+encode them on a background thread fed through a bounded queue. Frames are
+appended to the output file as they arrive, so an animation costs a single
+encode pass with constant memory and no PNG round trip. A FanOutEncoder feeds
+one copy of each frame to several of them (GIF, MP4, WebM, APNG) at once.
+Frames are shown for one interval at `fps` unless `set_holds` gives them
+longer, e.g. the holds of an adaptive frame schedule (frame_schedule.py).
+"""
+
+import io
+import os
+import queue
+import shutil
+import struct
+import subprocess
+import threading
+import zlib
+import numpy as np
+from PIL import Image
+
+
+class StreamingEncoder:
+    """
+    Base class for encoders that consume frames on a writer thread.
+
+    `write(frame)` copies an (H, W, 3 or 4) uint8 frame into a bounded queue and
+    blocks while the queue is full, so at most `queue_size` frames are ever
+    held. Subclasses implement `_begin(frame)`, `_encode(frame)` and `_finish()`.
+    """
+
+    def __init__(self, path, fps=10, queue_size=8):
+        """Start the writer thread for an animation at `path`."""
+        self.path = path
+        self.fps = fps
+        self.frame_count = 0
+        self.holds = None
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def set_holds(self, holds):
+        """Show frame i for `holds[i]` frame intervals instead of one; call before writing frames."""
+        self.holds = [int(hold) for hold in holds]
+
+    def hold(self, index):
+        """Frame intervals frame `index` is shown for."""
+        if self.holds is None or index >= len(self.holds):
+            return 1
+        return self.holds[index]
+
+    def write(self, frame):
+        """Queue a copy of one frame, blocking while the writer is behind."""
+        self.put(np.array(frame, dtype=np.uint8))
+
+    def put(self, frame):
+        """Queue a uint8 frame without copying it; it must not be modified afterwards."""
+        if self._error is not None:
+            raise self._error
+        self._queue.put(frame)
+
+    def close(self):
+        """Flush the queued frames, finish the file and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run(self):
+        """Writer thread: encode frames until the end-of-stream marker arrives."""
+        frame = None
+        try:
+            while True:
+                frame = self._queue.get()
+                if frame is None:
+                    break
+                if self.frame_count == 0:
+                    self._begin(frame)
+                self._encode(frame)
+                self.frame_count += 1
+            if self.frame_count:
+                self._finish()
+        except Exception as error:
+            self._error = error
+            # Keep draining so a producer never blocks on a dead writer
+            while frame is not None:
+                frame = self._queue.get()
+
+    def _begin(self, frame):
+        """Open the output using the first frame's size."""
+        raise NotImplementedError
+
+    def _encode(self, frame):
+        """Append one frame to the output."""
+        raise NotImplementedError
+
+    def _finish(self):
+        """Finalize and close the output."""
+        raise NotImplementedError
+
+
+def _split_gif(data):
+    """Return the color table bits, color table and image block of a single-frame GIF."""
+    flags = data[10]
+    position = 13
+    table_bits, color_table = flags & 0x07, b''
+    if flags & 0x80:
+        table_size = 3 << (table_bits + 1)
+        color_table = data[position:position + table_size]
+        position += table_size
+
+    # Skip extension blocks up to the image descriptor
+    while data[position] == 0x21:
+        position += 2
+        while data[position]:
+            position += data[position] + 1
+        position += 1
+
+    descriptor = bytearray(data[position:position + 10])
+    position += 10
+    if descriptor[9] & 0x80:
+        table_bits = descriptor[9] & 0x07
+        table_size = 3 << (table_bits + 1)
+        color_table = data[position:position + table_size]
+        position += table_size
+
+    # Descriptor, then LZW code size and sub-blocks, without the trailer
+    return table_bits, color_table, bytes(descriptor), data[position:-1]
+
+
+def _global_palette(samples, colors=255):
+    """Median-cut one palette of `colors` entries from subsampled pixels of several frames."""
+    strip = np.concatenate([np.asarray(sample)[::4, ::4, :3] for sample in samples], axis=0)
+    palette = Image.fromarray(np.ascontiguousarray(strip)).quantize(colors, Image.Quantize.MEDIANCUT)
+    palette = palette.getpalette()[:3 * colors]
+    # Pad to 256 entries; the last one is reserved for transparency
+    return bytes(palette + palette[:3] * (256 - len(palette) // 3))
+
+
+class GifEncoder(StreamingEncoder):
+    """
+    Streaming animated GIF writer.
+
+    Pillow LZW-encodes each frame on its own and the encoded image block is
+    spliced into our GIF stream, so no frame is kept after it has been written.
+
+    With `optimize` (the default) all frames share one global palette, built
+    from `sample_frames` when given or else from the first `palette_frames`
+    frames of the stream. Every later frame only stores the bounding rectangle
+    of the pixels that changed, with unchanged pixels inside it transparent
+    over the previous frame. Without it, each full frame gets its own local
+    palette. `scale` resizes frames before encoding.
+    """
+
+    # Palette index left unused by the global palette and used for transparency
+    TRANSPARENT = 255
+
+    def __init__(self, path, fps=10, queue_size=8, optimize=True, palette_frames=4,
+                 sample_frames=None, scale=1.0):
+        """Start the writer thread for a GIF at `path`."""
+        self.optimize = optimize
+        self.palette_frames = palette_frames
+        self.scale = scale
+        self._palette = _global_palette(sample_frames) if sample_frames else None
+        self._pending = []
+        self._previous = None
+        super().__init__(path, fps, queue_size)
+
+    def _resize(self, frame):
+        """Apply `scale` to a frame, dropping any alpha channel."""
+        image = Image.fromarray(np.ascontiguousarray(frame[..., :3]))
+        if self.scale != 1.0:
+            size = (max(1, round(image.width * self.scale)), max(1, round(image.height * self.scale)))
+            image = image.resize(size, Image.Resampling.LANCZOS)
+        return image
+
+    def _begin(self, frame):
+        self._file = open(self.path, 'wb')
+        self._size = self._resize(frame).size
+        self._delay = max(1, round(100 / self.fps))
+        if not self.optimize:
+            self._write_header(None)
+
+    def _write_header(self, palette):
+        """Header, logical screen with an optional global color table, and the loop extension."""
+        width, height = self._size
+        flags = 0xF7 if palette else 0
+        self._file.write(b'GIF89a' + struct.pack('<HHBBB', width, height, flags, 0, 0))
+        if palette:
+            self._file.write(palette)
+        # Loop forever
+        self._file.write(b'\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00')
+
+    def _encode(self, frame):
+        image = self._resize(frame)
+        if not self.optimize:
+            self._write_local(image, self._delay * self.hold(self.frame_count))
+            return
+
+        # Hold back the first frames until the palette can be sampled from them
+        self._pending.append((image, self._delay * self.hold(self.frame_count)))
+        if self._palette is None and len(self._pending) < self.palette_frames:
+            return
+        self._flush_pending()
+
+    def _flush_pending(self):
+        """Write every held-back frame, building the palette first if needed."""
+        if self._palette is None:
+            self._palette = _global_palette([image for image, _ in self._pending])
+        if self._previous is None:
+            self._write_header(self._palette)
+            self._palette_image = Image.new('P', (1, 1))
+            self._palette_image.putpalette(self._palette)
+        for image, delay in self._pending:
+            self._write_delta(image, delay)
+        self._pending = []
+
+    def _write_local(self, image, delay):
+        """Write a full frame with its own palette as a local color table, shown for `delay` centiseconds."""
+        buffer = io.BytesIO()
+        image.save(buffer, format='GIF', interlace=False)
+        table_bits, color_table, descriptor, image_data = _split_gif(buffer.getvalue())
+
+        # Graphic control extension carrying the frame delay in centiseconds
+        self._file.write(struct.pack('<BBBBHBB', 0x21, 0xf9, 4, 0, delay, 0, 0))
+        # Keep the interlace bit, switch the palette to a local color table
+        self._file.write(descriptor[:9] + bytes([0x80 | (descriptor[9] & 0x40) | table_bits]))
+        self._file.write(color_table)
+        self._file.write(image_data)
+
+    def _write_delta(self, image, delay):
+        """Write the changed rectangle of a frame against the global palette, shown for `delay` centiseconds."""
+        # No dithering, so unchanged pixels map to the same index in every frame
+        indices = np.asarray(image.quantize(palette=self._palette_image, dither=Image.Dither.NONE))
+        indices = np.where(indices == self.TRANSPARENT, 0, indices).astype(np.uint8)
+
+        first = self._previous is None
+        if first:
+            left, top, region = 0, 0, indices
+        else:
+            changed = indices != self._previous
+            rows = np.flatnonzero(changed.any(axis=1))
+            cols = np.flatnonzero(changed.any(axis=0))
+            if len(rows) == 0:
+                # Nothing moved: a single transparent pixel keeps the frame's timing
+                left, top, region = 0, 0, np.full((1, 1), self.TRANSPARENT, dtype=np.uint8)
+            else:
+                top, bottom, left, right = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+                region = np.where(changed[top:bottom, left:right],
+                                  indices[top:bottom, left:right], self.TRANSPARENT).astype(np.uint8)
+        self._previous = indices
+
+        region_image = Image.fromarray(region, mode='P')
+        region_image.putpalette(self._palette)
+        buffer = io.BytesIO()
+        region_image.save(buffer, format='GIF', interlace=False, optimize=False)
+        _, _, _, image_data = _split_gif(buffer.getvalue())
+
+        # Leave each frame in place (disposal 1) so the next one can draw over it;
+        # every frame after the first has a transparent index
+        flags = 0x04 | (0x00 if first else 0x01)
+        self._file.write(struct.pack('<BBBBHBB', 0x21, 0xf9, 4, flags, delay, self.TRANSPARENT, 0))
+        self._file.write(struct.pack('<BHHHHB', 0x2C, left, top, region.shape[1], region.shape[0], 0))
+        self._file.write(image_data)
+
+    def _finish(self):
+        if self._pending:
+            # Fewer frames than `palette_frames` were streamed
+            self._flush_pending()
+        self._file.write(b'\x3b')
+        self._file.close()
+
+
+def _png_chunks(data):
+    """Yield `(chunk_type, payload)` for every chunk of a PNG file."""
+    position = 8
+    while position < len(data):
+        length, = struct.unpack('>I', data[position:position + 4])
+        yield data[position + 4:position + 8], data[position + 8:position + 8 + length]
+        position += 12 + length
+
+
+def _write_png_chunk(file, chunk_type, payload):
+    """Write one length-prefixed, CRC-terminated PNG chunk."""
+    file.write(struct.pack('>I', len(payload)) + chunk_type + payload)
+    file.write(struct.pack('>I', zlib.crc32(chunk_type + payload)))
+
+
+class ApngEncoder(StreamingEncoder):
+    """
+    Streaming animated PNG writer.
+
+    Pillow compresses each frame on its own and its IDAT data is spliced into
+    the animation as the frame's data chunks. The frame count in the acTL chunk
+    is patched in once the stream ends.
+    """
+
+    def _begin(self, frame):
+        self._file = open(self.path, 'wb')
+        self._sequence = 0
+        self._delay = max(1, round(1000 / self.fps))
+
+    def _encode(self, frame):
+        buffer = io.BytesIO()
+        Image.fromarray(frame[..., :3]).save(buffer, format='PNG')
+        chunks = list(_png_chunks(buffer.getvalue()))
+
+        if self.frame_count == 0:
+            # Signature, header and a placeholder animation control chunk
+            self._file.write(b'\x89PNG\r\n\x1a\n')
+            _write_png_chunk(self._file, b'IHDR', dict(chunks)[b'IHDR'])
+            self._actl_offset = self._file.tell()
+            _write_png_chunk(self._file, b'acTL', struct.pack('>II', 0, 0))
+
+        # Frame control, then the image data (IDAT for the first frame, fdAT after)
+        height, width = frame.shape[:2]
+        delay = self._delay * self.hold(self.frame_count)
+        _write_png_chunk(self._file, b'fcTL', struct.pack('>IIIIIHHBB', self._sequence, width, height,
+                                                          0, 0, delay, 1000, 0, 0))
+        self._sequence += 1
+        for chunk_type, payload in chunks:
+            if chunk_type != b'IDAT':
+                continue
+            if self.frame_count == 0:
+                _write_png_chunk(self._file, b'IDAT', payload)
+            else:
+                _write_png_chunk(self._file, b'fdAT', struct.pack('>I', self._sequence) + payload)
+                self._sequence += 1
+
+    def _finish(self):
+        _write_png_chunk(self._file, b'IEND', b'')
+        # Loop forever over the now known number of frames
+        self._file.seek(self._actl_offset)
+        _write_png_chunk(self._file, b'acTL', struct.pack('>II', self.frame_count, 0))
+        self._file.close()
+
+
+def find_ffmpeg():
+    """Path of a local ffmpeg executable, or None when there is none."""
+    path = shutil.which('ffmpeg')
+    if path is None:
+        try:
+            import imageio_ffmpeg
+            path = imageio_ffmpeg.get_ffmpeg_exe()
+        except (ImportError, RuntimeError):
+            pass
+    return path
+
+
+class FfmpegEncoder(StreamingEncoder):
+    """
+    Video writer that streams raw RGB frames into one ffmpeg process's stdin.
+
+    ffmpeg is launched once, on the first frame, and encodes concurrently with
+    rendering. `codec`, `crf`, `preset` and `threads` are passed straight to
+    it (`threads=0` lets ffmpeg choose). Held frames are repeated, so videos
+    keep a constant frame rate. Raises RuntimeError up front when no ffmpeg
+    executable can be found.
+    """
+
+    codec = 'libx264'
+
+    def __init__(self, path, fps=10, queue_size=8, codec=None, crf=23, preset='medium', threads=0,
+                 ffmpeg=None):
+        """Locate ffmpeg and start the writer thread for a video at `path`."""
+        self.ffmpeg = ffmpeg or find_ffmpeg()
+        if self.ffmpeg is None:
+            raise RuntimeError("ffmpeg not found; install it or run: pip install imageio-ffmpeg")
+        self.codec = codec or self.codec
+        self.crf = crf
+        self.preset = preset
+        self.threads = threads
+        super().__init__(path, fps, queue_size)
+
+    def _command(self, width, height):
+        """ffmpeg command line reading rawvideo frames of the given size from stdin."""
+        command = [self.ffmpeg, '-y', '-loglevel', 'error',
+                   '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}',
+                   '-framerate', str(self.fps), '-i', '-',
+                   '-c:v', self.codec, '-crf', str(self.crf), '-threads', str(self.threads),
+                   '-pix_fmt', 'yuv420p']
+        if self.codec.startswith('libvpx'):
+            # Constant-quality mode for VP8/VP9
+            command += ['-b:v', '0', '-deadline', 'good']
+        else:
+            command += ['-preset', self.preset]
+        return command + [self.path]
+
+    def _begin(self, frame):
+        # yuv420p needs even dimensions
+        height, width = frame.shape[:2]
+        self._size = (height - height % 2, width - width % 2)
+        self._process = subprocess.Popen(self._command(self._size[1], self._size[0]),
+                                         stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def _encode(self, frame):
+        height, width = self._size
+        data = np.ascontiguousarray(frame[:height, :width, :3]).data
+        try:
+            for _ in range(self.hold(self.frame_count)):
+                self._process.stdin.write(data)
+        except BrokenPipeError:
+            # ffmpeg exited early; surface its error message
+            self._finish()
+            raise RuntimeError(f"ffmpeg stopped reading frames for {self.path}")
+
+    def _finish(self):
+        self._process.stdin.close()
+        error = self._process.stderr.read().decode(errors='replace').strip()
+        if self._process.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed writing {self.path}: {error}")
+
+
+class Mp4Encoder(FfmpegEncoder):
+    """Streaming H.264 MP4 writer."""
+
+    codec = 'libx264'
+
+
+class WebmEncoder(FfmpegEncoder):
+    """Streaming VP9 WebM writer."""
+
+    codec = 'libvpx-vp9'
+
+
+class FanOutEncoder:
+    """
+    Send every frame to several streaming encoders at once.
+
+    Each frame is copied once and shared read-only by all writer threads, so
+    every output format is encoded concurrently from a single render or decode.
+    A writer that fails is dropped without stopping the others; `close()`
+    returns the failures by output path.
+    """
+
+    def __init__(self, encoders):
+        """Fan out to the given, already started, encoders."""
+        self.encoders = list(encoders)
+        self.failures = {}
+
+    def set_holds(self, holds):
+        """Set the frame holds of every encoder."""
+        for encoder in self.encoders:
+            encoder.set_holds(holds)
+
+    def write(self, frame):
+        """Queue one shared copy of a frame on every healthy encoder."""
+        frame = np.array(frame, dtype=np.uint8)
+        for encoder in self.encoders:
+            if encoder.path in self.failures:
+                continue
+            try:
+                encoder.put(frame)
+            except Exception as error:
+                self.failures[encoder.path] = error
+
+    def close(self):
+        """Finish every output and return `{path: error}` for the ones that failed."""
+        for encoder in self.encoders:
+            try:
+                encoder.close()
+            except Exception as error:
+                self.failures.setdefault(encoder.path, error)
+        return self.failures
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# Encoder used for each animation format, keyed by file extension
+ENCODERS = {
+    "gif": GifEncoder,
+    "mp4": Mp4Encoder,
+    "webm": WebmEncoder,
+    "apng": ApngEncoder,
+}
+FORMATS = tuple(ENCODERS)
+
+
+def open_encoder(path, fps=10, queue_size=8, **options):
+    """Open a streaming encoder chosen by the extension of `path`."""
+    extension = path.rsplit('.', 1)[-1].lower()
+    if extension not in ENCODERS:
+        raise ValueError(f"No streaming encoder for '.{extension}', expected one of {FORMATS}")
+    return ENCODERS[extension](path, fps, queue_size, **options)
+
+
+def open_fanout(base_path, formats, fps=10, queue_size=8, options=None):
+    """
+    Open one encoder per format at `<base_path>.<format>` behind a FanOutEncoder.
+
+    `options` maps a format to keyword arguments overriding `fps` or passed
+    to that format's encoder. Formats whose encoder cannot start are left out
+    and reported in the fan-out's failures.
+    """
+    options = options or {}
+    encoders, failures = [], {}
+    for fmt in formats:
+        kwargs = dict(fps=fps, queue_size=queue_size)
+        kwargs.update(options.get(fmt, {}))
+        path = f"{base_path}.{fmt}"
+        try:
+            encoders.append(open_encoder(path, **kwargs))
+        except RuntimeError as error:
+            # e.g. no ffmpeg for a video format; the other formats still go ahead
+            failures[path] = error
+    fanout = FanOutEncoder(encoders)
+    fanout.failures.update(failures)
+    return fanout
+
+
+def stream_image_files(image_files, encoder):
+    """Feed already-rendered frame images to an encoder one at a time."""
+    for image_file in image_files:
+        with Image.open(image_file) as image:
+            encoder.write(np.asarray(image.convert('RGB')))
+
+
+def sample_image_files(image_files, count=4):
+    """Load `count` evenly spaced frames, e.g. as `sample_frames` for a GIF palette."""
+    picks = np.linspace(0, len(image_files) - 1, min(count, len(image_files))).round().astype(int)
+    samples = []
+    for index in picks:
+        with Image.open(image_files[index]) as image:
+            samples.append(np.asarray(image.convert('RGB')))
+    return samples
+
+
+def fit_gif_to_size(image_files, path, target_bytes, fps=10, scale=1.0, max_attempts=4, holds=None):
+    """
+    Re-encode frame images, shown for `holds` frame intervals when given, into a GIF at `path` that fits in `target_bytes`.
+
+    GIF size grows roughly with pixel area, so each attempt shrinks the frames
+    by the square root of the remaining overshoot, with a little headroom.
+    Returns the scale of the last attempt.
+    """
+    samples = sample_image_files(image_files)
+    for _ in range(max_attempts):
+        with GifEncoder(path, fps, sample_frames=samples, scale=scale) as encoder:
+            if holds is not None:
+                encoder.set_holds(holds)
+            stream_image_files(image_files, encoder)
+        size = os.path.getsize(path)
+        if size <= target_bytes:
+            break
+        scale *= 0.95 * (target_bytes / size) ** 0.5
+    return scale
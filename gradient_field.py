@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Cached Background Gradient Field for Contrastive Learning Visualization
+Author: Mikey Bee, 2025
+
+The subtle background behind each embedding panel is a sum of Gaussians, one
+per category, centered at the category's mean position. A 2D Gaussian is the
+outer product of two 1D ones, so the whole field is a single (R, C) @ (C, R)
+matmul of per-category 1D exponentials on a cached grid axis instead of a full
+exp over a meshgrid per category. The field is only recomputed once some
+centroid has moved by more than a grid pixel.
+"""
+
+import numpy as np
+
+
+def category_centroids(points, category_ids, num_categories):
+    """Return (C, 2) mean positions per category and a mask of the non-empty categories."""
+    counts = np.bincount(category_ids, minlength=num_categories)
+    centroids = np.stack([np.bincount(category_ids, weights=points[:, axis], minlength=num_categories)
+                          for axis in range(2)], axis=1)
+    present = counts > 0
+    centroids[present] /= counts[present, None]
+    return centroids, present
+
+
+class GradientField:
+    """
+    Sum of per-category Gaussians exp(-sharpness * r^2) * weight on a square grid over [0, 1].
+
+    `values[i, j]` is the field at x = axis[j], y = axis[i], ready for imshow
+    with origin='lower' or contour(axis, axis, values).
+    """
+
+    def __init__(self, resolution=100, sharpness=10, weight=0.1):
+        """Cache the grid axis; the field itself is computed on the first update."""
+        self.axis = np.linspace(0, 1, resolution)
+        self.sharpness = sharpness
+        self.weight = weight
+        self.values = np.zeros((resolution, resolution))
+        self._pixel = 1 / (resolution - 1)
+        self._centroids = None
+        self._present = None
+
+    def compute(self, centroids):
+        """Field of Gaussians at the (C, 2) `centroids`, as one outer-product matmul."""
+        ex = np.exp(-self.sharpness * (self.axis[None, :] - centroids[:, 0, None]) ** 2)
+        ey = np.exp(-self.sharpness * (self.axis[None, :] - centroids[:, 1, None]) ** 2)
+        return self.weight * (ey.T @ ex)
+
+    def update(self, points, category_ids, num_categories):
+        """Refresh `values` for new positions; return whether the field changed."""
+        centroids, present = category_centroids(points, category_ids, num_categories)
+        if (self._centroids is not None and np.array_equal(present, self._present) and
+                np.abs(centroids[present] - self._centroids[present]).max(initial=0) <= self._pixel):
+            return False
+
+        self._centroids, self._present = centroids, present
+        self.values = self.compute(centroids[present])
+        return True
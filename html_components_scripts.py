@@ -6,15 +6,14 @@ Author: Mikey Bee, 2025
 This module provides the JavaScript scripts for the interactive visualization viewer.
 """
 
-def generate_html_scripts(total_frames, num_digits, descriptions_json):
-    """Generate the JavaScript for the HTML."""
+def generate_html_scripts(total_frames, frame_files_json, holds_json, descriptions_json):
+    """Generate the JavaScript for the HTML, showing each frame for the steps in `holds_json` while playing."""
     return f"""  <script>
     // Configuration
     const config = {{
       totalFrames: {total_frames},
-      imagePrefix: "step_",
-      imageExtension: ".png",
-      fileDigits: {num_digits},
+      frameFiles: {frame_files_json},
+      holds: {holds_json},
       combinedImagePath: "combined_space.png",
       descriptions: {descriptions_json}
     }};
@@ -159,17 +158,28 @@ def generate_html_scripts(total_frames, num_digits, descriptions_json):
       
       if (state.isPlaying) {{
         elements.playIcon.className = "fas fa-pause";
-        state.playInterval = setInterval(advanceFrame, state.playSpeed);
+        schedulePlay();
       }} else {{
         elements.playIcon.className = "fas fa-play";
-        clearInterval(state.playInterval);
+        clearTimeout(state.playInterval);
       }}
     }}
     
+    // Advance after the current frame's hold, at the chosen speed per step
+    function schedulePlay() {{
+      const hold = state.currentFrame < config.totalFrames ? config.holds[state.currentFrame] : 1;
+      state.playInterval = setTimeout(function() {{
+        advanceFrame();
+        if (state.isPlaying) {{
+          schedulePlay();
+        }}
+      }}, state.playSpeed * hold);
+    }}
+    
     // Navigate to previous frame
     function prevFrame() {{
       state.isPlaying = false;
-      clearInterval(state.playInterval);
+      clearTimeout(state.playInterval);
       elements.playIcon.className = "fas fa-play";
       
       if (state.currentFrame > 0) {{
@@ -181,7 +191,7 @@ def generate_html_scripts(total_frames, num_digits, descriptions_json):
     // Navigate to next frame
     function nextFrame() {{
       state.isPlaying = false;
-      clearInterval(state.playInterval);
+      clearTimeout(state.playInterval);
       elements.playIcon.className = "fas fa-play";
       
       if (state.currentFrame < config.totalFrames) {{
@@ -193,7 +203,7 @@ def generate_html_scripts(total_frames, num_digits, descriptions_json):
     // Go to first frame
     function goToFirst() {{
       state.isPlaying = false;
-      clearInterval(state.playInterval);
+      clearTimeout(state.playInterval);
       elements.playIcon.className = "fas fa-play";
       
       state.currentFrame = 0;
@@ -203,7 +213,7 @@ def generate_html_scripts(total_frames, num_digits, descriptions_json):
     // Go to last frame
     function goToLast() {{
       state.isPlaying = false;
-      clearInterval(state.playInterval);
+      clearTimeout(state.playInterval);
       elements.playIcon.className = "fas fa-play";
       
       state.currentFrame = config.totalFrames;
@@ -241,20 +251,17 @@ def generate_html_scripts(total_frames, num_digits, descriptions_json):
     
     // Update frame display
     function updateFrame() {{
-      // Format frame number with leading zeros
-      const frameNum = state.currentFrame.toString().padStart(config.fileDigits, "0");
-      
       // Handle the case where we're showing the combined view (last frame + 1)
       if (state.currentFrame === config.totalFrames) {{
         elements.currentFrame.src = config.combinedImagePath;
         elements.comparisonBase.src = config.combinedImagePath;
       }} else {{
-        elements.currentFrame.src = `${{config.imagePrefix}}${{frameNum}}${{config.imageExtension}}`;
-        elements.comparisonBase.src = `${{config.imagePrefix}}${{frameNum}}${{config.imageExtension}}`;
+        elements.currentFrame.src = config.frameFiles[state.currentFrame];
+        elements.comparisonBase.src = config.frameFiles[state.currentFrame];
       }}
       
       // Update side-by-side view
-      elements.beforeFrame.src = `${{config.imagePrefix}}0${{config.imageExtension}}`;
+      elements.beforeFrame.src = config.frameFiles[0];
       elements.afterFrame.src = config.combinedImagePath;
       
       // Update comparison view
@@ -287,8 +294,8 @@ def generate_html_scripts(total_frames, num_digits, descriptions_json):
       
       // Restart interval with new speed if playing
       if (state.isPlaying) {{
-        clearInterval(state.playInterval);
-        state.playInterval = setInterval(advanceFrame, state.playSpeed);
+        clearTimeout(state.playInterval);
+        schedulePlay();
       }}
     }}
     
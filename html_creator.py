@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
-import os
+import json
+from frame_reuse import read_manifest
 
 def generate_frame_descriptions(total_frames):
     """Generate descriptive text for each frame of the visualization"""
@@ -26,11 +27,17 @@ def generate_frame_descriptions(total_frames):
 
 def create_html_viewer(output_dir, total_frames):
     """Create an HTML file for interactive viewing of the visualization"""
-    # Calculate number of digits needed for frame numbering
+    # Rendered frames and the steps each is held for, from the frame manifest when there is one
     num_digits = len(str(total_frames - 1))
+    frames = read_manifest(output_dir) or [dict(step=i, file=f"step_{str(i).zfill(num_digits)}.png", hold=1)
+                                           for i in range(total_frames)]
+    frame_files = json.dumps([frame["file"] for frame in frames])
+    holds = json.dumps([frame["hold"] for frame in frames])
     
-    # Generate descriptions for each frame
-    descriptions = generate_frame_descriptions(total_frames)
+    # Generate descriptions for each step, and keep those of the rendered frames
+    descriptions = generate_frame_descriptions(frames[-1]["step"] + 1)
+    descriptions = [descriptions[frame["step"]] for frame in frames]
+    total_frames = len(frames)
     
     # Build JavaScript array of descriptions
     descriptions_js = "[\n"
@@ -268,7 +275,7 @@ def create_html_viewer(output_dir, total_frames):
     <h1 class="title">Contrastive Learning Space Alignment</h1>
     
     <div class="image-container">
-      <img id="frame" src="step_0.png" alt="Contrastive Learning Visualization Frame" />
+      <img id="frame" src="{frames[0]['file']}" alt="Contrastive Learning Visualization Frame" />
       <div class="key-hint">Use ← → keys to navigate</div>
     </div>
     
@@ -328,9 +335,8 @@ def create_html_viewer(output_dir, total_frames):
     // Configuration
     const config = {{
       totalFrames: {total_frames - 1}, // Total number of step frames (not including combined view)
-      imagePrefix: "step_", // Prefix of files
-      imageExtension: ".png", // Extension of files
-      fileDigits: {num_digits}, // Number of digits in file name
+      frameFiles: {frame_files}, // File of each step frame
+      holds: {holds}, // Steps each frame is shown for
       initialDelay: 200, // Initial delay in milliseconds
       combinedImagePath: "combined_space.png", // Path to the combined view image
       descriptions: {descriptions_js},
@@ -376,8 +382,7 @@ def create_html_viewer(output_dir, total_frames):
         elements.progress.style.width = "100%";
         elements.jumpInput.value = config.totalFrames + 1;
       }} else {{
-        const frameNum = state.currentFrame.toString().padStart(config.fileDigits, "0");
-        elements.frame.src = `${{config.imagePrefix}}${{frameNum}}${{config.imageExtension}}`;
+        elements.frame.src = config.frameFiles[state.currentFrame];
         elements.counter.textContent = `${{state.currentFrame + 1}}/${{config.totalFrames + 1}}`;
         elements.description.textContent = config.descriptions[state.currentFrame];
         elements.jumpInput.value = state.currentFrame + 1;
@@ -515,13 +520,24 @@ def create_html_viewer(output_dir, total_frames):
       elements.playButton.textContent = "⏸ Pause";
       elements.playButton.title = "Pause animation";
       
-      // Clear any existing interval
+      // Clear any pending advance
       if (state.autoplayInterval) {{
-        clearInterval(state.autoplayInterval);
+        clearTimeout(state.autoplayInterval);
       }}
       
-      // Start new interval
-      state.autoplayInterval = setInterval(advanceAnimation, state.delay);
+      // Schedule the next frame
+      scheduleAdvance();
+    }}
+    
+    function scheduleAdvance() {{
+      // Each frame stays up for the steps it holds, at the chosen delay per step
+      const hold = state.showingCombinedView ? 1 : config.holds[state.currentFrame];
+      state.autoplayInterval = setTimeout(function() {{
+        advanceAnimation();
+        if (state.autoplay) {{
+          scheduleAdvance();
+        }}
+      }}, state.delay * hold);
     }}
     
     function stopAutoplay() {{
@@ -530,7 +546,7 @@ def create_html_viewer(output_dir, total_frames):
       elements.playButton.title = "Play animation";
       
       if (state.autoplayInterval) {{
-        clearInterval(state.autoplayInterval);
+        clearTimeout(state.autoplayInterval);
         state.autoplayInterval = null;
       }}
     }}
@@ -559,8 +575,8 @@ def create_html_viewer(output_dir, total_frames):
       
       // Update running interval if autoplay is active
       if (state.autoplay) {{
-        clearInterval(state.autoplayInterval);
-        state.autoplayInterval = setInterval(advanceAnimation, state.delay);
+        clearTimeout(state.autoplayInterval);
+        scheduleAdvance();
       }}
     }});
     
@@ -633,13 +649,13 @@ def create_html_viewer(output_dir, total_frames):
       // Set up hover events to pause/resume
       elements.frame.addEventListener("mouseenter", function() {{
         if (state.autoplay) {{
-          clearInterval(state.autoplayInterval);
+          clearTimeout(state.autoplayInterval);
         }}
       }});
       
       elements.frame.addEventListener("mouseleave", function() {{
         if (state.autoplay) {{
-          state.autoplayInterval = setInterval(advanceAnimation, state.delay);
+          scheduleAdvance();
         }}
       }});
     }}
@@ -1,10 +1,215 @@
 #!/usr/bin/env python3
 import numpy as np
 import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-from matplotlib.animation import FuncAnimation
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
 import os
 from matplotlib import cm
+from matplotlib.colors import to_rgba
+from embedding_space import EmbeddingSpace
+from trajectory import compute_alignment, iter_alignment, DYNAMICS
+from frame_stream import FORMATS, open_fanout
+from label_layout import LABEL_CAP, LabelLayout
+from frame_renderer import PersistentRenderer
+from easing import EASINGS, make_easing
+from frame_schedule import frame_holds, make_schedule, trajectory_motion
+from projection3d import CAMERAS, PROJECTIONS, ProjectedScene, StepGeometry, alignment_camera, project
+
+def describe_progress(progress):
+    """Return the title and explanation shown at a training progress in [0, 1]."""
+    if progress == 0:
+        return ("Initial Misaligned Embedding Spaces",
+                "Starting with separate embedding spaces for images and text")
+    elif progress < 0.25:
+        return ("Beginning Contrastive Learning Alignment",
+                "Starting to align corresponding representations")
+    elif progress < 0.5:
+        return ("Contrastive Learning Alignment in Progress",
+                "Corresponding points moving toward shared space")
+    elif progress < 0.75:
+        return ("Advanced Contrastive Learning Alignment",
+                "Embedding spaces becoming more aligned")
+    elif progress < 1.0:
+        return ("Nearing Optimal Alignment",
+                "Image and text embeddings converging to shared space")
+    return ("Aligned Multimodal Embedding Space",
+            "Contrastive learning has successfully aligned the embedding spaces")
+
+class Scene3DRenderer(PersistentRenderer):
+    """
+    Persistent 3D scene that builds its figure once and updates its artists in place per step.
+    
+    Points move through their collections' `_offsets3d`, lines through
+    `set_segments` and the camera, following `camera(progress)`, through
+    `view_init`; a fixed pool of labels is reassigned to the non-overlapping
+    points the label layout keeps. The title, explanation and progress are
+    the only text that changes. Renderers of several views of one trajectory
+    can share a `StepGeometry`, so each step's geometry is built once.
+    
+    With `projection='matrix'` points and lines are not mplot3d collections:
+    a `ProjectedScene` projects all of them with one matrix product per frame
+    and draws them as 2D collections; `projection='raster'` splats them into
+    the frame instead, with the raster backend's helpers.
+    """
+    
+    def __init__(self, space, total_steps, output_dir, max_labels=LABEL_CAP, projection="mplot3d",
+                 camera=alignment_camera, geometry=None):
+        """Build the figure, axes, point and line collections, label pool and decorations."""
+        super().__init__(total_steps, output_dir, dict(bbox_inches='tight'))
+        colors = self.colors = space.point_colors()
+        self.projection = projection
+        self.camera = camera
+        self.geometry = geometry or StepGeometry()
+        
+        # Create a figure with higher DPI for better quality
+        fig = self.fig = plt.figure(figsize=(14, 10), dpi=150)
+        ax = self.ax = fig.add_subplot(111, projection='3d')
+        
+        # Set background color and grid
+        ax.set_facecolor('#f8f9fa')
+        ax.grid(True, alpha=0.3)
+        
+        # Markers shrink, and lose their outlines, with the point count so large clouds stay legible
+        marker_size = 150 if len(space) <= 1000 else max(2.0, 150 * 1000 / len(space))
+        marker_edge = 1.5 if len(space) <= 1000 else 0.0
+        
+        # Connecting lines first (so they appear behind points), as one collection
+        self.line_colors = np.tile(to_rgba('gray'), (len(space), 1))
+        if projection != "mplot3d":
+            # Points and lines projected together; square markers for text points
+            self.scene = ProjectedScene(ax, colors, markers=('o', 's'),
+                                        marker_style=dict(s=marker_size, alpha=0.8, edgecolors='white',
+                                                          linewidth=marker_edge),
+                                        line_style=dict(linestyle='--', linewidth=1),
+                                        raster=projection == "raster")
+        else:
+            self.lines = Line3DCollection(np.zeros((len(space), 2, 3)), linestyle='--', linewidth=1)
+            ax.add_collection3d(self.lines)
+            
+            # Points colored by category with improved styling, one collection per space;
+            # depth shading stays off so points keep their category colors
+            self.image_markers = ax.scatter(
+                space.image[:, 0], space.image[:, 1], space.image[:, 2],
+                s=marker_size, alpha=0.8, color=colors,
+                edgecolors='white', linewidth=marker_edge, depthshade=False
+            )
+            
+            # Use square markers for text points
+            self.text_markers = ax.scatter(
+                space.text[:, 0], space.text[:, 1], space.text[:, 2],
+                s=marker_size, alpha=0.8, color=colors,
+                edgecolors='white', linewidth=marker_edge,
+                marker='s', depthshade=False
+            )
+        
+        # A fixed pool of labels, reassigned per frame to the points the layout keeps
+        self.label_layout = LabelLayout(fontsize=9, weight='bold', pad=0.2, max_labels=max_labels)
+        self.labels = []
+        for _ in range(min(max_labels, 2 * len(space))):
+            self.labels.append(ax.text(
+                0, 0, 0, '', fontsize=9, ha='center', va='bottom',
+                color='black', weight='bold', visible=False,
+                bbox=dict(boxstyle="round,pad=0.2", fc='none', ec="none", alpha=0.7)
+            ))
+        
+        # Add empty plots for legend entries
+        for category, category_color in zip(space.categories, space.category_colors):
+            ax.scatter([], [], [], s=100, color=category_color, label=category.capitalize())
+        
+        # Add legend
+        ax.legend(loc='upper right', frameon=True, fontsize=12)
+        
+        # Set axis limits with slight padding
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
+        ax.set_zlim(0, 1)
+        
+        # Set labels
+        ax.set_xlabel('Dimension 1', fontsize=12, labelpad=10)
+        ax.set_ylabel('Dimension 2', fontsize=12, labelpad=10)
+        ax.set_zlabel('Dimension 3', fontsize=12, labelpad=10)
+        
+        # Title, explanation and progress indicator, refreshed per step
+        self.title = fig.suptitle('', fontsize=22, fontweight='bold', y=0.98)
+        self.explanation = fig.text(0.5, 0.02, '', ha='center', fontsize=16)
+        self.progress_text = fig.text(0.5, 0.05, '', ha='center', fontsize=14, fontweight='bold',
+                                      bbox=dict(boxstyle="round,pad=0.5", fc='white', ec='gray', alpha=0.7))
+        
+        # Add attribution
+        fig.text(0.95, 0.01, "Visualization by Mikey Bee", 
+                ha='right', va='bottom', fontsize=8, 
+                color='gray', style='italic')
+        
+        # Lay out once with the initial state; later frames only move artists
+        self.update(space, 0)
+        fig.tight_layout(rect=[0, 0.07, 1, 0.96])
+    
+    def update(self, space, step):
+        """Move points, lines and labels, turn the camera and refresh the step text."""
+        geometry = self.geometry.update(space, step)
+        n = len(space)
+        self.line_colors[:, 3] = geometry.line_alpha
+        
+        progress = step / self.total_steps
+        elevation, azimuth = self.camera(progress)
+        self.ax.view_init(elev=elevation, azim=azimuth)
+        
+        if self.projection != "mplot3d":
+            # Markers, line endpoints and label anchors in one product with the camera just set
+            projected = project(geometry.points, self.ax.get_proj())
+            self.scene.update(projected[:2 * n], self.line_colors)
+            anchors = projected[2 * n:]
+        else:
+            self.lines.set_segments(np.stack([space.image, space.text], axis=1))
+            self.lines.set_color(self.line_colors)
+            self.image_markers._offsets3d = tuple(space.image.T)
+            self.text_markers._offsets3d = tuple(space.text.T)
+            anchors = project(geometry.points[2 * n:], self.ax.get_proj())
+        
+        # Labels are laid out on screen, so only once the camera is in place
+        self._update_labels(space, geometry.points[2 * n:], anchors)
+        
+        title, explanation = describe_progress(progress)
+        self.title.set_text(title)
+        self.explanation.set_text(explanation)
+        self.progress_text.set_text(f"Training Progress: {int(progress * 100)}%")
+    
+    def screen_points(self, space, step):
+        """(2N, 2) display pixels of the image then text points of `space`, seen by the camera of `step`."""
+        elevation, azimuth = self.camera(step / self.total_steps)
+        self.ax.view_init(elev=elevation, azim=azimuth)
+        projected = project(np.concatenate([space.image, space.text]), self.ax.get_proj())
+        self.ax.apply_aspect()
+        return self.ax.transData.transform(projected[:, :2])
+    
+    def _update_labels(self, space, points, projected):
+        """
+        Move the label pool to the image and text points the label layout keeps in the current view.
+        
+        `points` are the (2N, 4) homogeneous label anchors of the image then
+        text points and `projected` the same anchors projected by the camera.
+        """
+        # Both point sets share one axes, so their labels compete for the same space
+        n = len(space)
+        # 3D axes shrink to their box aspect when drawn; place with the drawn position
+        self.ax.apply_aspect()
+        anchors = self.ax.transData.transform(projected[:, :2])
+        items = space.items
+        
+        def texts(i):
+            return items[i].upper() if i < n else f"'{items[i - n].upper()}'"
+        
+        kept = self.label_layout.select(self.fig.canvas.get_renderer(), anchors, np.tile(space.category_ids, 2),
+                                        len(space.categories), texts, self.ax.bbox.extents, va='bottom')
+        for label, i in zip(self.labels, kept):
+            label.set_position_3d(points[i, :3])
+            label.set_text(texts(i))
+            # Image point labels are slightly more opaque than text point labels
+            bbox = label.get_bbox_patch()
+            bbox.set_facecolor(self.colors[i % n])
+            bbox.set_alpha(0.7 if i < n else 0.6)
+            label.set_visible(True)
+        for label in self.labels[len(kept):]:
+            label.set_visible(False)
 
 class ContrastiveLearning3DVisualizer:
     """
@@ -13,13 +218,44 @@ class ContrastiveLearning3DVisualizer:
     better show the transformation between spaces.
     """
     
-    def __init__(self, output_dir="contrastive_3d_frames", total_steps=100):
+    def __init__(self, output_dir="contrastive_3d_frames", total_steps=100, dynamics="linear",
+                 temperature=0.1, learning_rate=0.2, formats=("gif", "mp4"), video_codec=None,
+                 crf=18, preset='medium', threads=0, max_labels=LABEL_CAP, projection="mplot3d",
+                 views=("default",), easing="cubic", stagger=0.0, frames=None, min_dwell=1, max_dwell=None):
         """Initialize the visualizer with configuration parameters."""
         self.output_dir = output_dir
         self.total_steps = total_steps
+        self.dynamics = dynamics
+        self.temperature = temperature
+        self.learning_rate = learning_rate
+        self.formats = tuple(formats)
+        
+        # ffmpeg settings for the video formats
+        self.video_options = dict(fps=20, crf=crf, preset=preset, threads=threads)
+        self.video_codec = video_codec
         
-        # Ensure output directory exists
-        os.makedirs(output_dir, exist_ok=True)
+        # Non-overlapping labels, at most `max_labels` per frame
+        self.max_labels = max_labels
+        
+        # How the scene is projected: mplot3d collections or one matrix product per frame
+        self.projection = projection
+        
+        # Easing of the alignment, optionally staggered by category
+        self.easing = easing
+        self.stagger = stagger
+        
+        # Frame budget placed where points move on screen, or every step
+        self.schedule = make_schedule(frames, min_dwell, max_dwell)
+        
+        # Camera paths rendered from the one trajectory; with several views each
+        # gets its own subdirectory of frames and animations
+        self.views = tuple(views)
+        self.view_dirs = {view: output_dir if len(self.views) == 1 else os.path.join(output_dir, view)
+                          for view in self.views}
+        
+        # Ensure output directories exist
+        for view_dir in self.view_dirs.values():
+            os.makedirs(view_dir, exist_ok=True)
         
         # Categories and their colors
         self.categories = {
@@ -37,18 +273,15 @@ class ContrastiveLearning3DVisualizer:
         }
         
         # Generate initial spaces with 3D coordinates
-        self.image_points_orig, self.text_points_orig = self._generate_initial_spaces()
+        self.space_orig = self._generate_initial_spaces()
         
         # Set the figure style
         plt.style.use('seaborn-v0_8-whitegrid')
     
     def _generate_initial_spaces(self):
-        """Generate initial 3D coordinates for image and text spaces."""
+        """Generate initial 3D coordinates for image and text spaces as an EmbeddingSpace."""
         np.random.seed(42)  # For reproducibility
         
-        # Create image space - clustered by category in 3D
-        image_points = {}
-        
         # Category centers in 3D space
         category_centers = {
             'animals': np.array([0.7, 0.7, 0.7]),
@@ -57,14 +290,16 @@ class ContrastiveLearning3DVisualizer:
             'nature': np.array([0.7, 0.3, 0.7])
         }
         
-        for category, items in self.categories.items():
-            for item in items:
-                # Add random jitter around category centers
-                image_points[item] = category_centers[category] + np.random.normal(0, 0.07, 3)
+        category_names = list(self.categories)
+        items = [item for items in self.categories.values() for item in items]
+        category_ids = np.repeat(np.arange(len(category_names)),
+                                 [len(self.categories[category]) for category in category_names])
         
-        # Create text space with a different orientation
-        text_points = {}
+        # Create image space - clustered by category in 3D, with random jitter around category centers
+        centers = np.array([category_centers[category] for category in category_names])
+        image_points = centers[category_ids] + np.random.normal(0, 0.07, (len(items), 3))
         
+        # Create text space with a different orientation
         # Create a 3D rotation matrix (around y-axis)
         theta = np.pi / 2  # 90-degree rotation
         rotation_matrix = np.array([
@@ -73,244 +308,99 @@ class ContrastiveLearning3DVisualizer:
             [-np.sin(theta), 0, np.cos(theta)]
         ])
         
-        for item, point in image_points.items():
-            # Apply rotation and add an offset
-            offset = np.array([0.1, 0.1, 0.1])
-            text_points[item] = rotation_matrix @ point + offset
+        # Apply rotation and add an offset
+        offset = np.array([0.1, 0.1, 0.1])
+        text_points = image_points @ rotation_matrix.T + offset
         
-        return image_points, text_points
+        colors = [self.category_colors[category] for category in category_names]
+        return EmbeddingSpace(image_points, text_points, category_ids, category_names, colors, items=items)
     
     def create_visualization(self):
         """Create the entire visualization sequence."""
         print(f"Creating 3D visualization with {self.total_steps} steps...")
         
-        # Create copies to transform
-        image_points = {k: v.copy() for k, v in self.image_points_orig.items()}
-        text_points = {k: v.copy() for k, v in self.text_points_orig.items()}
+        # Every rendered frame is fanned out to one writer per animation format;
+        # videos are encoded by ffmpeg while the later frames are still rendering
+        options = {"mp4": dict(self.video_options, codec=self.video_codec), "webm": self.video_options}
+        self.animations = {view: open_fanout(f"{view_dir}/contrastive_learning_3d", self.formats, fps=10,
+                                             options=options)
+                           for view, view_dir in self.view_dirs.items()}
         
-        # Plot initial state
-        self._plot_spaces(image_points, text_points, 0)
+        # One persistent scene per view; every step only moves its artists and the camera.
+        # The views share each step's geometry, so it is built once per step
+        geometry = StepGeometry()
+        self.renderers = {}
+        for view, view_dir in self.view_dirs.items():
+            renderer = Scene3DRenderer(self.space_orig, self.total_steps, view_dir, self.max_labels,
+                                       self.projection, CAMERAS[view], geometry)
+            renderer.sinks.append(self.animations[view])
+            self.renderers[view] = renderer
         
-        # For each step, transform the spaces
-        for step in range(1, self.total_steps + 1):
-            # Calculate interpolation parameter with easing
-            t = self._ease_in_out_cubic(step / self.total_steps)
-            
-            # For each item, interpolate between original and target
-            for item in image_points:
-                if item in text_points:
-                    # Calculate target position (halfway between points with slight elevation)
-                    midpoint = (self.image_points_orig[item] + self.text_points_orig[item]) / 2
-                    # Add slight elevation for more visual interest
-                    midpoint[1] += 0.1
-                    
-                    # Move both points toward the target
-                    image_points[item] = self.image_points_orig[item] * (1 - t) + midpoint * t
-                    text_points[item] = self.text_points_orig[item] * (1 - t) + midpoint * t
-            
-            # Plot current state
-            self._plot_spaces(image_points, text_points, step)
+        # The alignment is computed once for all views, and only its scheduled steps rendered
+        if self.schedule is None:
+            # Every step, rendered as it is computed
+            steps = np.arange(self.total_steps + 1)
+            trajectory = iter_alignment(self.space_orig, self.total_steps, **self._alignment_options())
+        else:
+            # The schedule needs the motion of every step, so keep the trajectory to render from
+            image, text = compute_alignment(self.space_orig, self.total_steps, **self._alignment_options())
+            steps = self._schedule_steps(image, text)
+            trajectory = ((step, self.space_orig.with_positions(image[step], text[step]))
+                          for step in steps.tolist())
+        for step, space in trajectory:
+            for renderer in self.renderers.values():
+                renderer.render(space, step)
+        for renderer in self.renderers.values():
+            renderer.close()
         
-        print(f"3D visualization complete! {self.total_steps+1} frames created in '{self.output_dir}' folder.")
+        for view_dir in self.view_dirs.values():
+            print(f"3D visualization complete! {len(steps)} frames created in '{view_dir}' folder.")
         
-        # Create animated video
+        # Finish the animated outputs
         self._create_animation()
     
-    def _plot_spaces(self, image_points, text_points, step):
-        """Create visualization of the 3D spaces at a given step."""
-        # Create a figure with higher DPI for better quality
-        fig = plt.figure(figsize=(14, 10), dpi=150)
-        ax = fig.add_subplot(111, projection='3d')
-        
-        # Set background color and grid
-        ax.set_facecolor('#f8f9fa')
-        ax.grid(True, alpha=0.3)
-        
-        # Draw connecting lines first (so they appear behind points)
-        for item in image_points:
-            if item in text_points:
-                img_point = image_points[item]
-                txt_point = text_points[item]
-                
-                # Calculate line opacity based on distance (closer = more transparent)
-                distance = np.linalg.norm(img_point - txt_point)
-                max_dist = 1.0  # Maximum expected distance in normalized space
-                alpha = min(1.0, distance / max_dist)
-                
-                # Draw connecting line
-                ax.plot(
-                    [img_point[0], txt_point[0]],
-                    [img_point[1], txt_point[1]],
-                    [img_point[2], txt_point[2]],
-                    'gray', linestyle='--', alpha=alpha * 0.5, linewidth=1
-                )
-        
-        # Plot points by category with improved styling
-        for category, items in self.categories.items():
-            category_color = self.category_colors[category]
-            
-            # Create category-specific collections for legend
-            img_points_x, img_points_y, img_points_z = [], [], []
-            txt_points_x, txt_points_y, txt_points_z = [], [], []
-            
-            for item in items:
-                # Plot image points
-                if item in image_points:
-                    point = image_points[item]
-                    img_points_x.append(point[0])
-                    img_points_y.append(point[1])
-                    img_points_z.append(point[2])
-                    
-                    # Draw each point
-                    ax.scatter(
-                        point[0], point[1], point[2],
-                        s=150, alpha=0.8, color=category_color,
-                        edgecolors='white', linewidth=1.5
-                    )
-                    
-                    # Add text label
-                    ax.text(
-                        point[0], point[1], point[2] + 0.03,
-                        item.upper(), fontsize=9, ha='center', va='bottom',
-                        color='black', weight='bold',
-                        bbox=dict(
-                            boxstyle="round,pad=0.2",
-                            fc=category_color, ec="none", alpha=0.7
-                        )
-                    )
-                
-                # Plot text points
-                if item in text_points:
-                    point = text_points[item]
-                    txt_points_x.append(point[0])
-                    txt_points_y.append(point[1])
-                    txt_points_z.append(point[2])
-                    
-                    # Use square markers for text points
-                    ax.scatter(
-                        point[0], point[1], point[2],
-                        s=150, alpha=0.8, color=category_color,
-                        edgecolors='white', linewidth=1.5,
-                        marker='s'
-                    )
-                    
-                    # Add text label
-                    ax.text(
-                        point[0], point[1], point[2] + 0.03,
-                        f"'{item.upper()}'", fontsize=9, ha='center', va='bottom',
-                        color='black', weight='bold',
-                        bbox=dict(
-                            boxstyle="round,pad=0.2",
-                            fc=category_color, ec="none", alpha=0.6
-                        )
-                    )
-            
-            # Add empty plots for legend entries
-            ax.scatter([], [], [], s=100, color=category_color, label=category.capitalize())
-        
-        # Add legend
-        ax.legend(loc='upper right', frameon=True, fontsize=12)
-        
-        # Set axis limits with slight padding
-        ax.set_xlim(0, 1)
-        ax.set_ylim(0, 1)
-        ax.set_zlim(0, 1)
-        
-        # Set labels
-        ax.set_xlabel('Dimension 1', fontsize=12, labelpad=10)
-        ax.set_ylabel('Dimension 2', fontsize=12, labelpad=10)
-        ax.set_zlabel('Dimension 3', fontsize=12, labelpad=10)
-        
-        # Determine the optimal view angle based on step
-        # Start with side view and rotate to top view as alignment progresses
-        elevation = 30 - 20 * (step / self.total_steps)  # Gradually look more from above
-        azimuth = 30 + 50 * (step / self.total_steps)    # Rotate around
-        ax.view_init(elev=elevation, azim=azimuth)
-        
-        # Add title and explanation
-        progress = step / self.total_steps
-        
-        if progress == 0:
-            title = "Initial Misaligned Embedding Spaces"
-            explanation = "Starting with separate embedding spaces for images and text"
-        elif progress < 0.25:
-            title = "Beginning Contrastive Learning Alignment"
-            explanation = "Starting to align corresponding representations"
-        elif progress < 0.5:
-            title = "Contrastive Learning Alignment in Progress"
-            explanation = "Corresponding points moving toward shared space"
-        elif progress < 0.75:
-            title = "Advanced Contrastive Learning Alignment"
-            explanation = "Embedding spaces becoming more aligned"
-        elif progress < 1.0:
-            title = "Nearing Optimal Alignment"
-            explanation = "Image and text embeddings converging to shared space"
-        else:
-            title = "Aligned Multimodal Embedding Space"
-            explanation = "Contrastive learning has successfully aligned the embedding spaces"
-        
-        plt.suptitle(title, fontsize=22, fontweight='bold', y=0.98)
-        fig.text(0.5, 0.02, explanation, ha='center', fontsize=16)
-        
-        # Add progress indicator
-        fig.text(0.5, 0.05, f"Training Progress: {int(progress * 100)}%", 
-                ha='center', fontsize=14, fontweight='bold',
-                bbox=dict(boxstyle="round,pad=0.5", fc='white', ec='gray', alpha=0.7))
-        
-        # Add attribution
-        fig.text(0.95, 0.01, "Visualization by Mikey Bee", 
-                ha='right', va='bottom', fontsize=8, 
-                color='gray', style='italic')
-        
-        # Format step number with leading zeros
-        padded_step = str(step).zfill(len(str(self.total_steps)))
+    def _alignment_options(self):
+        """Keyword arguments of trajectory.iter_alignment and compute_alignment for this visualization."""
+        # Target is halfway between points with slight elevation for more visual interest,
+        # interpolated with easing
+        return dict(dynamics=self.dynamics,
+                    easing=make_easing(self.easing, self.stagger, self.space_orig),
+                    target_offset=np.array([0, 0.1, 0]),
+                    temperature=self.temperature,
+                    learning_rate=self.learning_rate)
+    
+    def _schedule_steps(self, image, text):
+        """
+        Steps the frame schedule picks from the on-screen motion of the (T + 1, N, 3) trajectory.
         
-        # Save the figure
-        plt.tight_layout(rect=[0, 0.07, 1, 0.96])
-        plt.savefig(f"{self.output_dir}/step_{padded_step}.png", bbox_inches='tight')
-        plt.close()
+        Motion is measured through every view's camera, which moves too, and
+        the views share the largest; their animations hold each frame until the next.
+        """
+        n = len(self.space_orig)
+        pixels = {view: [] for view in self.renderers}
+        for step in range(self.total_steps + 1):
+            space = self.space_orig.with_positions(image[step], text[step])
+            for view, renderer in self.renderers.items():
+                pixels[view].append(renderer.screen_points(space, step))
+        motion = np.max([trajectory_motion((points[:n], points[n:]) for points in view_pixels)
+                         for view_pixels in pixels.values()], axis=0)
+        steps = self.schedule(motion)
+        for animation in self.animations.values():
+            animation.set_holds(frame_holds(steps))
+        return steps
     
     def _create_animation(self):
-        """Create an animated video from the rendered frames."""
-        try:
-            import imageio
-            import glob
-            
-            # Get all step images
-            image_files = sorted(glob.glob(f"{self.output_dir}/step_*.png"))
-            
-            # Create GIF animation
-            print("Creating animated GIF...")
-            with imageio.get_writer(f"{self.output_dir}/contrastive_learning_3d.gif", mode='I', fps=10) as writer:
-                for image_file in image_files:
-                    image = imageio.imread(image_file)
-                    writer.append_data(image)
+        """Finish the animation files the rendered frames were streamed into."""
+        print(f"Finishing animations: {', '.join(self.formats)}...")
+        for view, animation in self.animations.items():
+            failures = animation.close()
             
-            # Try to create MP4 animation if ffmpeg is available
-            try:
-                print("Creating MP4 animation...")
-                with imageio.get_writer(f"{self.output_dir}/contrastive_learning_3d.mp4", 
-                                      fps=20, quality=8, bitrate='8000k') as writer:
-                    for image_file in image_files:
-                        image = imageio.imread(image_file)
-                        writer.append_data(image)
-                print(f"Animation saved as {self.output_dir}/contrastive_learning_3d.mp4")
-            except:
-                print("Could not create MP4 (ffmpeg might be missing). GIF was created successfully.")
-                
-            print(f"Animation saved as {self.output_dir}/contrastive_learning_3d.gif")
-            
-        except ImportError:
-            print("Could not create animation. Please install 'imageio' package.")
-            print("Run: pip install imageio imageio-ffmpeg")
-    
-    def _ease_in_out_cubic(self, t):
-        """Apply cubic easing function for smoother animation."""
-        if t < 0.5:
-            return 4 * t * t * t
-        else:
-            p = 2 * t - 2
-            return 0.5 * p * p * p + 1
+            for fmt in self.formats:
+                path = f"{self.view_dirs[view]}/contrastive_learning_3d.{fmt}"
+                if path in failures:
+                    print(f"Could not create {fmt.upper()}: {failures[path]}")
+                else:
+                    print(f"Animation saved as {path}")
 
 if __name__ == "__main__":
     import argparse
@@ -320,8 +410,45 @@ if __name__ == "__main__":
                        help="Number of transformation steps (default: 100)")
     parser.add_argument("-o", "--output", type=str, default="contrastive_3d_frames",
                        help="Output directory (default: contrastive_3d_frames)")
+    parser.add_argument("--dynamics", type=str, choices=DYNAMICS, default="linear",
+                       help="Alignment dynamics: linear interpolation or InfoNCE training (default: linear)")
+    parser.add_argument("--temperature", type=float, default=0.1,
+                       help="InfoNCE temperature (default: 0.1)")
+    parser.add_argument("--learning-rate", type=float, default=0.2,
+                       help="InfoNCE learning rate (default: 0.2)")
+    parser.add_argument("--formats", type=str, nargs='+', choices=FORMATS, default=["gif", "mp4"],
+                       help="Animation formats to write (default: gif mp4)")
+    parser.add_argument("--codec", type=str, default=None,
+                       help="ffmpeg video codec for MP4 output (default: libx264)")
+    parser.add_argument("--crf", type=int, default=18,
+                       help="ffmpeg constant rate factor for video output, lower is better (default: 18)")
+    parser.add_argument("--preset", type=str, default="medium",
+                       help="ffmpeg encoder preset for MP4 output (default: medium)")
+    parser.add_argument("--threads", type=int, default=0,
+                       help="ffmpeg encoder threads, 0 for automatic (default: 0)")
+    parser.add_argument("--easing", type=str, choices=EASINGS, default="cubic",
+                       help="Easing of the linear alignment over time (default: cubic)")
+    parser.add_argument("--stagger", type=float, default=0.0,
+                       help="Share of the timeline over which categories start moving one after another, 0 moves all items together (default: 0)")
+    parser.add_argument("--frames", type=int, default=None,
+                       help="Frame budget, first and last step included, placed along the trajectory where points move most on screen and each held until the next (default: render every step)")
+    parser.add_argument("--min-dwell", type=int, default=1,
+                       help="Fewest steps a scheduled frame is held for (default: 1)")
+    parser.add_argument("--max-dwell", type=int, default=None,
+                       help="Most steps a scheduled frame is held for (default: no limit)")
+    parser.add_argument("--views", type=str, nargs='+', choices=CAMERAS, default=["default"],
+                       help="Camera paths rendered from the one alignment, each into its own subdirectory "
+                            "when there are several (default: default)")
+    parser.add_argument("--projection", type=str, choices=PROJECTIONS, default="mplot3d",
+                       help="3D projection: mplot3d collections, or one matrix product per frame drawn as 2D collections (matrix) or splatted into the frame (raster) (default: mplot3d)")
     
     args = parser.parse_args()
     
-    visualizer = ContrastiveLearning3DVisualizer(args.output, args.steps)
+    visualizer = ContrastiveLearning3DVisualizer(args.output, args.steps, args.dynamics,
+                                                 args.temperature, args.learning_rate, args.formats,
+                                                 args.codec, args.crf, args.preset, args.threads,
+                                                 projection=args.projection, views=args.views,
+                                                 easing=args.easing, stagger=args.stagger,
+                                                 frames=args.frames, min_dwell=args.min_dwell,
+                                                 max_dwell=args.max_dwell)
     visualizer.create_visualization()
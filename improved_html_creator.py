@@ -12,22 +12,27 @@ import json
 from html_components_structure import generate_html_header, generate_html_styles, generate_html_body
 from html_components_scripts import generate_html_scripts
 from frame_descriptions import generate_enhanced_frame_descriptions
+from frame_reuse import read_manifest
 
 def create_enhanced_html_viewer(output_dir, total_frames):
     """Create an enhanced HTML file for interactive viewing of the visualization."""
-    # Calculate number of digits needed for frame numbering
+    # Rendered frames and the steps each is held for, from the frame manifest when there is one
     num_digits = len(str(total_frames - 1))
+    frames = read_manifest(output_dir) or [dict(step=i, file=f"step_{str(i).zfill(num_digits)}.png", hold=1)
+                                           for i in range(total_frames)]
     
-    # Generate descriptions for each frame
-    descriptions = generate_enhanced_frame_descriptions(total_frames)
-    descriptions_json = json.dumps(descriptions)
+    # Generate descriptions for each step, and keep those of the rendered frames and the combined view
+    descriptions = generate_enhanced_frame_descriptions(frames[-1]["step"] + 1)
+    descriptions_json = json.dumps([descriptions[frame["step"]] for frame in frames] + descriptions[-1:])
+    total_frames = len(frames)
     
     # Create HTML content by combining components
     html_content = "\n".join([
         generate_html_header(),
         generate_html_styles(),
         generate_html_body(total_frames),
-        generate_html_scripts(total_frames, num_digits, descriptions_json)
+        generate_html_scripts(total_frames, json.dumps([frame["file"] for frame in frames]),
+                              json.dumps([frame["hold"] for frame in frames]), descriptions_json)
     ])
     
     # Create output directory if it doesn't exist
@@ -1,5 +1,7 @@
 from manim import *
+import os
 import numpy as np
+from easing import EASINGS
 
 class ImprovedContrastiveLearningAnimation(Scene):
     def construct(self):
@@ -253,8 +255,9 @@ class ImprovedContrastiveLearningAnimation(Scene):
             new_progress_label = Text(f"Training Progress: {int(progress_percentage * 100)}%", font_size=20)
             new_progress_label.next_to(progress_bar_bg, UP, buff=0.2)
             
-            # Calculate interpolation parameter with easing for more natural movement
-            t = smooth(step / total_steps)  # Using a smooth easing function
+            # Calculate interpolation parameter with easing for more natural movement;
+            # the enhanced runner's --easing selects it, manim's smooth by default
+            t = float(EASINGS[os.environ.get("CONTRASTIVE_EASING", "smooth")](step / total_steps))
             
             # Create animations for all dots
             dot_animations = []
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+InfoNCE Contrastive Training Simulator
+Author: Mikey Bee, 2025
+
+This module replaces straight-line interpolation with real gradient descent on
+a symmetric InfoNCE loss between the image and text positions. Similarities are
+negative squared Euclidean distances scaled by a temperature, so positive pairs
+are pulled together and negative pairs pushed apart in the plotted space. All
+per-step work is batched matmuls into preallocated buffers.
+
+Unconstrained, the loss is also lowered by pushing the whole cloud apart, so
+by default positions are projected back onto the plotted [0, 1] domain after
+every update (projected gradient descent). Above `tile_size` points the N x N
+buffers are replaced by the blocked kernel in similarity.py.
+"""
+
+import numpy as np
+from similarity import blocked_infonce_gradients
+
+
+class InfoNCESimulator:
+    """
+    Gradient descent on the symmetric InfoNCE loss of an EmbeddingSpace.
+
+    The logits are s_ij = -||x_i - y_j||^2 / temperature, for image points x and
+    text points y, and the loss averages the cross-entropy of matching each
+    image to its text (rows) and each text to its image (columns).
+    """
+
+    def __init__(self, space, temperature=0.1, learning_rate=0.2, bounds=(0.0, 1.0), tile_size=4096):
+        """Initialize the simulator with working copies of the space's positions."""
+        self.temperature = temperature
+        self.learning_rate = learning_rate
+        self.bounds = bounds
+        self.tile_size = tile_size
+        self.image = space.image.copy()
+        self.text = space.text.copy()
+        self.loss = None
+
+        n, d = self.image.shape
+        self._image_grad = np.empty((n, d), dtype=np.float32)
+        self._text_grad = np.empty((n, d), dtype=np.float32)
+        self.blocked = n > tile_size
+        if self.blocked:
+            return
+
+        # Preallocated buffers so a dense step does not allocate
+        self._row_probs = np.empty((n, n), dtype=np.float32)
+        self._col_probs = np.empty((n, n), dtype=np.float32)
+        self._image_sq = np.empty(n, dtype=np.float32)
+        self._text_sq = np.empty(n, dtype=np.float32)
+        self._row_stat = np.empty(n, dtype=np.float32)
+        self._col_stat = np.empty(n, dtype=np.float32)
+        self._max_logits = np.empty(n, dtype=np.float32)
+        self._positives = np.empty(n, dtype=np.float32)
+        self._scaled = np.empty((n, d), dtype=np.float32)
+        self._diag = np.arange(n)
+
+    def _logits(self, out):
+        """Write the (N, N) logit matrix into `out` using one matmul."""
+        np.einsum('ij,ij->i', self.image, self.image, out=self._image_sq)
+        np.einsum('ij,ij->i', self.text, self.text, out=self._text_sq)
+        np.matmul(self.image, self.text.T, out=out)
+        out *= 2
+        out -= self._image_sq[:, None]
+        out -= self._text_sq[None, :]
+        out /= self.temperature
+
+    def _softmax(self, probs, axis, stat):
+        """Softmax `probs` in place along `axis`, returning the log-sum-exp in `stat`."""
+        np.max(probs, axis=axis, out=stat)
+        shape = (-1, 1) if axis == 1 else (1, -1)
+        probs -= stat.reshape(shape)
+        np.copyto(self._max_logits, stat)
+        np.exp(probs, out=probs)
+        np.sum(probs, axis=axis, out=stat)
+        probs /= stat.reshape(shape)
+        np.log(stat, out=stat)
+        stat += self._max_logits
+
+    def step(self):
+        """Take one gradient step and return the loss before the update."""
+        if self.blocked:
+            self.loss, _, _ = blocked_infonce_gradients(self.image, self.text, self.temperature,
+                                                        self.tile_size, self._image_grad,
+                                                        self._text_grad)
+        else:
+            self._dense_gradients()
+
+        # Gradient descent on the loss
+        self._image_grad *= self.learning_rate
+        self.image -= self._image_grad
+        self._text_grad *= self.learning_rate
+        self.text -= self._text_grad
+
+        # Project back onto the plotted domain
+        if self.bounds is not None:
+            np.clip(self.image, *self.bounds, out=self.image)
+            np.clip(self.text, *self.bounds, out=self.text)
+        return self.loss
+
+    def _dense_gradients(self):
+        """Write the loss and full-matrix gradients into the preallocated buffers."""
+        n = len(self.image)
+        rows, cols = self._row_probs, self._col_probs
+
+        self._logits(rows)
+        np.copyto(self._positives, np.diagonal(rows))
+        np.copyto(cols, rows)
+        self._softmax(rows, 1, self._row_stat)
+        self._softmax(cols, 0, self._col_stat)
+        self.loss = float(0.5 * (self._row_stat.mean() + self._col_stat.mean()) -
+                          self._positives.mean())
+
+        # dL/ds = (P_row + P_col - 2I) / 2N, accumulated in the row buffer
+        rows += cols
+        rows[self._diag, self._diag] -= 2
+        rows *= 0.5 / n
+
+        # ds_ij/dx_i = 2 (y_j - x_i) / T and ds_ij/dy_j = 2 (x_i - y_j) / T
+        scale = 2 / self.temperature
+        np.matmul(rows, self.text, out=self._image_grad)
+        np.sum(rows, axis=1, out=self._row_stat)
+        np.multiply(self.image, self._row_stat[:, None], out=self._scaled)
+        self._image_grad -= self._scaled
+        np.matmul(rows.T, self.image, out=self._text_grad)
+        np.sum(rows, axis=0, out=self._col_stat)
+        np.multiply(self.text, self._col_stat[:, None], out=self._scaled)
+        self._text_grad -= self._scaled
+        self._image_grad *= scale
+        self._text_grad *= scale
+
+
+def iter_infonce(space, total_steps, temperature=0.1, learning_rate=0.2, iterations_per_step=1):
+    """
+    Yield `(step, frame_space)` for InfoNCE training, like trajectory.iter_trajectory.
+
+    Step 0 is the initial state; every later step follows `iterations_per_step`
+    gradient updates. `frame_space` is refilled in place on every iteration.
+    """
+    simulator = InfoNCESimulator(space, temperature, learning_rate)
+    frame_space = space.copy()
+    for step in range(total_steps + 1):
+        if step > 0:
+            for _ in range(iterations_per_step):
+                simulator.step()
+        np.copyto(frame_space.image, simulator.image)
+        np.copyto(frame_space.text, simulator.text)
+        yield step, frame_space
+
+
+def simulate_infonce(space, total_steps, temperature=0.1, learning_rate=0.2, iterations_per_step=1):
+    """Return (total_steps + 1, N, D) image and text arrays of the InfoNCE trajectory."""
+    image = np.empty((total_steps + 1,) + space.image.shape, dtype=np.float32)
+    text = np.empty_like(image)
+    for step, frame_space in iter_infonce(space, total_steps, temperature, learning_rate,
+                                          iterations_per_step):
+        image[step] = frame_space.image
+        text[step] = frame_space.text
+    return image, text
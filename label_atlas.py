@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Label Sprite Atlas for Contrastive Learning Visualization
+Author: Mikey Bee, 2025
+
+Item labels never change between frames, yet matplotlib lays out and
+rasterizes their text and rounded boxes again on every draw. The atlas
+renders each distinct label, with its category-colored box, once per DPI
+into an RGBA sprite with matplotlib itself, so sprites look exactly like the
+annotations they replace. `LabelSprites` is an artist that blits those
+sprites at the points' projected positions, for the compositing path of the
+matplotlib renderers; the raster backend blends the same sprites into its
+NumPy canvas.
+"""
+
+import functools
+import numpy as np
+from matplotlib.artist import Artist
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+
+
+@functools.lru_cache(maxsize=None)
+def render_label(text, fontsize, weight, color, box_color, box_alpha, pad, dpi):
+    """
+    Rasterize one label, with its round box if `box_color` is set, into an (H, W, 4) uint8 sprite.
+
+    The sprite is cropped to its visible pixels with the label's center at
+    the sprite's center, like an annotation with ha='center', va='center'.
+    Colors are RGBA tuples so that sprites can be cached.
+    """
+    bbox = None if box_color is None else dict(boxstyle=f"round,pad={pad}", fc=box_color, ec="none",
+                                               alpha=box_alpha)
+    # Sized generously, in even pixels so the center falls on a pixel corner;
+    # the sprite is cropped to what was drawn
+    width = 2 * int(np.ceil((len(text) + 4) * fontsize / 72 * dpi / 2))
+    height = 2 * int(np.ceil(2 * fontsize / 72 * dpi))
+    fig = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    fig.patch.set_alpha(0)
+    fig.text(0.5, 0.5, text, fontsize=fontsize, weight=weight, color=color, ha='center', va='center',
+             bbox=bbox)
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    sprite = np.asarray(canvas.buffer_rgba())
+
+    # Crop symmetrically about the canvas center so the label stays centered
+    rows, cols = np.nonzero(sprite[..., 3])
+    if not len(rows):
+        return np.zeros((1, 1, 4), dtype=np.uint8)
+    height, width = sprite.shape[:2]
+    dy = max(height // 2 - rows.min(), rows.max() + 1 - height // 2)
+    dx = max(width // 2 - cols.min(), cols.max() + 1 - width // 2)
+    return sprite[height // 2 - dy:height // 2 + dy, width // 2 - dx:width // 2 + dx].copy()
+
+
+class LabelAtlas:
+    """
+    Label style plus its sprite cache, one sprite per distinct (text, box color, dpi).
+
+    Mirrors the annotate arguments the renderers use for their labels:
+    `fontsize`, `weight`, text `color` and a `boxstyle="round,pad=..."` box
+    drawn with `box_alpha`; with `box_alpha=None` labels have no box.
+    """
+
+    def __init__(self, fontsize=9, weight='bold', color='white', box_alpha=0.7, pad=0.2):
+        """Keep the label style; sprites are rendered on first use."""
+        self.fontsize = fontsize
+        self.weight = weight
+        self.color = to_rgba(color)
+        self.box_alpha = box_alpha
+        self.pad = pad
+
+    def sprite(self, text, box_color=None, dpi=100):
+        """Return the cached (H, W, 4) uint8 sprite of a label."""
+        if self.box_alpha is None or box_color is None:
+            box_color = None
+        else:
+            box_color = tuple(to_rgba(box_color))
+        return render_label(text, self.fontsize, self.weight, self.color, box_color, self.box_alpha,
+                            self.pad, dpi)
+
+
+class LabelSprites(Artist):
+    """
+    Artist blitting atlas sprites at data positions of its axes.
+
+    `texts[i]` and `box_colors[i]` describe label i. `set_positions` moves
+    the labels, optionally showing only some of them; like annotate, labels
+    of points outside the axes are not drawn.
+    """
+
+    def __init__(self, atlas, texts, box_colors=None, zorder=3):
+        """Keep the atlas and label descriptions; nothing is shown until positions are set."""
+        super().__init__()
+        self.atlas = atlas
+        self.texts = texts
+        self.box_colors = box_colors
+        self.set_zorder(zorder)
+        self._points = np.empty((0, 2))
+        self._indices = np.empty(0, dtype=np.intp)
+
+    def set_positions(self, points, indices=None):
+        """Place label i at data position points[i], for all labels or only `indices`."""
+        self._points = np.asarray(points)[:, :2]
+        self._indices = np.arange(len(self._points)) if indices is None else np.asarray(indices)
+        self.stale = True
+
+    def draw(self, renderer):
+        """Blit the sprites, positioned with the current data transform."""
+        if not self.get_visible() or not len(self._indices):
+            return
+        anchors = self.axes.transData.transform(self._points[self._indices])
+        x0, y0, x1, y1 = self.axes.bbox.extents
+        gc = renderer.new_gc()
+        for i, (x, y) in zip(self._indices.tolist(), anchors.tolist()):
+            if not (x0 <= x <= x1 and y0 <= y <= y1):
+                continue
+            color = None if self.box_colors is None else self.box_colors[i]
+            sprite = self.atlas.sprite(self.texts[i], color, renderer.dpi)
+            height, width = sprite.shape[:2]
+            # Agg takes image rows bottom-up
+            renderer.draw_image(gc, round(x - width / 2), round(y - height / 2), sprite[::-1])
+        gc.restore()
+        self.stale = False
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Label Level-of-Detail for Contrastive Learning Visualization
+Author: Mikey Bee, 2025
+
+Rounded-box text is the most expensive artist matplotlib draws, and with one
+label per point most of them only pile up on each other. This module picks,
+per frame and per panel, a bounded set of labels that do not overlap:
+
+1. Candidates are ranked by how close they are to their category's centroid
+   on screen, with the nearest point of every category (its representative)
+   ranked first.
+2. Points outside the panel are dropped and only the best candidate per
+   label-height grid cell is kept, which bounds the candidates by the panel
+   area rather than by N.
+3. The survivors are placed greedily into a uniform grid index of label
+   boxes; a label is kept only if it overlaps none of the boxes already in
+   the cells it covers, until the per-panel cap is reached.
+
+Label sizes are measured with the canvas renderer once per distinct text.
+"""
+
+import numpy as np
+from matplotlib.font_manager import FontProperties
+from gradient_field import category_centroids
+
+# Default maximum number of labels per panel
+LABEL_CAP = 30
+
+
+def label_priority(centers, category_ids, num_categories):
+    """
+    Rank (N, 2) screen positions for labeling; higher is more important.
+
+    Points closer to their category's centroid rank higher, and the nearest
+    point of each category ranks above every other point.
+    """
+    centroids, _ = category_centroids(centers, category_ids, num_categories)
+    distance = np.linalg.norm(centers - centroids[category_ids], axis=1)
+    nearest = np.full(num_categories, np.inf)
+    np.minimum.at(nearest, category_ids, distance)
+    priority = -distance
+    priority[distance == nearest[category_ids]] = np.inf
+    return priority
+
+
+class LabelLayout:
+    """
+    Non-overlapping label selection for one axes, measured in display pixels.
+
+    `fontsize`, `weight` and `pad` describe the labels' text and their
+    `boxstyle="round,pad=..."` box, so the collision boxes match what is drawn.
+    """
+
+    def __init__(self, fontsize=9, weight='bold', pad=0.2, max_labels=LABEL_CAP):
+        """Keep the label font; sizes are measured lazily on the first select."""
+        self.prop = FontProperties(size=fontsize, weight=weight)
+        self.pad = pad
+        self.max_labels = max_labels
+        self._sizes = {}
+
+    def size(self, renderer, text):
+        """Pixel width and height of a label's box, cached per text."""
+        if text not in self._sizes:
+            width, height, _ = renderer.get_text_width_height_descent(text, self.prop, ismath=False)
+            pad = 2 * self.pad * renderer.points_to_pixels(self.prop.get_size_in_points())
+            self._sizes[text] = (width + pad, height + pad)
+        return self._sizes[text]
+
+    def select(self, renderer, anchors, category_ids, num_categories, text_of, bounds, va='center'):
+        """
+        Return the indices of the labels to draw this frame, most important first.
+
+        `anchors` are the (N, 2) display positions the labels are attached to,
+        `text_of(i)` gives label i's text and `bounds` is the panel's
+        (x0, y0, x1, y1) display extent. With `va='bottom'` labels sit above
+        their anchors, as for `ax.text(..., va='bottom')`.
+        """
+        if self.max_labels <= 0 or not len(anchors):
+            return np.empty(0, dtype=np.intp)
+
+        # Like annotate, labels of points outside the panel are not drawn
+        x0, y0, x1, y1 = bounds
+        inside = np.flatnonzero((anchors[:, 0] >= x0) & (anchors[:, 0] <= x1) &
+                                (anchors[:, 1] >= y0) & (anchors[:, 1] <= y1))
+        priority = label_priority(anchors, category_ids, num_categories)[inside]
+        candidates = inside[np.argsort(-priority, kind='stable')]
+
+        # Best candidate per label-height cell: the rest would sit on top of it
+        cell = self.size(renderer, 'Ag')[1]
+        cells = np.floor((anchors[candidates] - (x0, y0)) / cell).astype(np.int64)
+        key = cells[:, 0] * (int((y1 - y0) / cell) + 2) + cells[:, 1]
+        _, first = np.unique(key, return_index=True)
+        candidates = candidates[np.sort(first)]
+
+        # Greedy placement into a grid of the boxes kept so far
+        grid = {}
+        kept = []
+        for i, (x, y) in zip(candidates.tolist(), anchors[candidates].tolist()):
+            width, height = self.size(renderer, text_of(i))
+            if va == 'bottom':
+                y += height / 2
+            box = (x - width / 2, y - height / 2, x + width / 2, y + height / 2)
+            covered = [(cx, cy)
+                       for cx in range(int((box[0] - x0) // cell), int((box[2] - x0) // cell) + 1)
+                       for cy in range(int((box[1] - y0) // cell), int((box[3] - y0) // cell) + 1)]
+            if any(box[0] < other[2] and other[0] < box[2] and box[1] < other[3] and other[1] < box[3]
+                   for index in covered for other in grid.get(index, ())):
+                continue
+            for index in covered:
+                grid.setdefault(index, []).append(box)
+            kept.append(i)
+            if len(kept) == self.max_labels:
+                break
+        return np.array(kept, dtype=np.intp)
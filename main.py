@@ -1,48 +1,45 @@
 #!/usr/bin/env python3
 import os
 import argparse
-from data_generator import generate_initial_spaces, CATEGORIES, CATEGORY_COLORS
-from visualizer import plot_spaces, plot_combined_space
+from data_generator import generate_initial_spaces, load_synthetic_spaces
+from trajectory import DYNAMICS
+from easing import EASINGS, make_easing
+from frame_schedule import make_schedule
+from parallel_render import render_trajectory
+from visualizer import SpacesRenderer, plot_combined_space
 from html_creator import create_html_viewer
+from raster_renderer import BACKENDS, RasterRenderer
+from raster_renderer import plot_combined_space as plot_raster_combined_space
 
-def create_visualization(total_steps=100, output_dir="contrastive_frames"):
+def create_visualization(total_steps=100, output_dir="contrastive_frames", dynamics="linear",
+                         temperature=0.1, learning_rate=0.2, workers=1, compositing=False,
+                         backend="matplotlib", density=False, data=None, min_motion=1.0,
+                         easing="linear", stagger=0.0, frames=None, min_dwell=1, max_dwell=None):
     # Create output directory
     os.makedirs(output_dir, exist_ok=True)
     
     print(f"Creating visualization with {total_steps} steps...")
     
-    # Generate initial spaces
-    image_points_orig, text_points_orig = generate_initial_spaces()
+    # Generate initial spaces, or load a large synthetic dataset
+    space_orig = load_synthetic_spaces(data) if data else generate_initial_spaces()
     
-    # Create a copy to transform
-    image_points = {k: v.copy() for k, v in image_points_orig.items()}
-    text_points = {k: v.copy() for k, v in text_points_orig.items()}
+    # Plot every step of the alignment trajectory, one persistent renderer per worker
+    if backend == "raster":
+        renderer_cls, renderer_options = RasterRenderer, dict(density=density)
+        plot_combined = plot_raster_combined_space
+    else:
+        renderer_cls, renderer_options = SpacesRenderer, dict(compositing=compositing, density=density)
+        plot_combined = plot_combined_space
+    space = render_trajectory(renderer_cls, space_orig, total_steps, output_dir, workers,
+                              dynamics, temperature, learning_rate, renderer_options=renderer_options,
+                              min_motion=min_motion, easing=make_easing(easing, stagger, space_orig),
+                              schedule=make_schedule(frames, min_dwell, max_dwell))
     
-    # Plot initial state
-    plot_spaces(image_points, text_points, 0, total_steps, output_dir, CATEGORIES, CATEGORY_COLORS)
+    # Create combined space visualization, with the same backend as the frames
+    plot_combined(space, output_dir, density)
     
-    # For each step, transform the spaces
-    for step in range(1, total_steps + 1):
-        # Calculate interpolation parameter
-        t = step / total_steps
-        
-        # For each item, interpolate between original and target
-        for item in image_points:
-            if item in text_points:
-                # Calculate target position (halfway between points)
-                target = (image_points_orig[item] + text_points_orig[item]) / 2
-                
-                # Move both points toward the target
-                image_points[item] = image_points_orig[item] * (1 - t) + target * t
-                text_points[item] = text_points_orig[item] * (1 - t) + target * t
-        
-        # Plot current state
-        plot_spaces(image_points, text_points, step, total_steps, output_dir, CATEGORIES, CATEGORY_COLORS)
-    
-    # Create combined space visualization
-    plot_combined_space(image_points, text_points, output_dir, CATEGORIES, CATEGORY_COLORS)
-    
-    print(f"Visualization complete! {total_steps+1} frames created in '{output_dir}' folder.")
+    frame_count = min(frames or total_steps + 1, total_steps + 1)
+    print(f"Visualization complete! {frame_count} frames created in '{output_dir}' folder.")
     print(f"Creating interactive HTML viewer...")
     create_html_viewer(output_dir, total_steps + 1)
     print(f"To view the visualization, open: {output_dir}/interactive_viewer.html")
@@ -54,8 +51,40 @@ def main():
     parser.add_argument("-o", "--output", type=str, default="contrastive_frames",
                        help="Output directory (default: contrastive_frames)")
     
+    parser.add_argument("--dynamics", type=str, choices=DYNAMICS, default="linear",
+                       help="Alignment dynamics: linear interpolation or InfoNCE training (default: linear)")
+    parser.add_argument("--temperature", type=float, default=0.1,
+                       help="InfoNCE temperature (default: 0.1)")
+    parser.add_argument("--learning-rate", type=float, default=0.2,
+                       help="InfoNCE learning rate (default: 0.2)")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                       help="Number of processes rendering frames in parallel (default: 1)")
+    parser.add_argument("--compositing", action="store_true",
+                       help="Rasterize the static parts of the figure once and redraw only moving artists per frame")
+    parser.add_argument("--backend", type=str, choices=BACKENDS, default="matplotlib",
+                       help="Frame renderer: matplotlib, or raster to draw the basic two-panel layout straight into NumPy buffers for very large point clouds (default: matplotlib)")
+    parser.add_argument("-d", "--data", type=str, default=None,
+                       help="Prefix of a synthetic dataset written by data_generator.py (default: built-in demo data)")
+    parser.add_argument("--density", action="store_true",
+                       help="Shade per-pixel category densities instead of one marker and label per point, for million-point spaces")
+    parser.add_argument("--min-motion", type=float, default=1.0,
+                       help="Pixels points must move before a frame redraws them, with --compositing or the raster backend; 0 redraws every step (default: 1.0)")
+    parser.add_argument("--easing", type=str, choices=EASINGS, default="linear",
+                       help="Easing of the linear alignment over time (default: linear)")
+    parser.add_argument("--stagger", type=float, default=0.0,
+                       help="Share of the timeline over which categories start moving one after another, 0 moves all items together (default: 0)")
+    parser.add_argument("--frames", type=int, default=None,
+                       help="Frame budget, first and last step included, placed along the trajectory where points move most and each held until the next (default: render every step)")
+    parser.add_argument("--min-dwell", type=int, default=1,
+                       help="Fewest steps a scheduled frame is held for (default: 1)")
+    parser.add_argument("--max-dwell", type=int, default=None,
+                       help="Most steps a scheduled frame is held for (default: no limit)")
+    
     args = parser.parse_args()
-    create_visualization(args.steps, args.output)
+    create_visualization(args.steps, args.output, args.dynamics, args.temperature, args.learning_rate,
+                         args.workers, args.compositing, args.backend,
+                         args.density, args.data, args.min_motion, args.easing, args.stagger,
+                         args.frames, args.min_dwell, args.max_dwell)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Parallel Frame Rendering for Contrastive Learning Visualization
+Author: Mikey Bee, 2025
+
+This module renders the frames of an alignment trajectory across a process
+pool. The whole trajectory is computed once and placed in shared memory; each
+worker attaches to it, builds its persistent renderer once in the pool
+initializer and then renders whichever step indices it is handed. Every frame
+depends only on its own step's positions, so the output files are the same
+step_XXX.png frames the serial path writes.
+
+Streaming encoders passed as `sinks` get the raw canvas buffers in the serial
+path; after a parallel render they are fed the finished frames in step order.
+
+With renderers that patch such frames instead of redrawing them, steps whose
+points moved less than `min_motion` pixels since the last redrawn step are
+drawn with that step's positions (see frame_reuse.py). The decisions are
+written to a frames.json manifest next to the frames.
+
+With a `schedule` (see frame_schedule.py) only the steps it picks from the
+trajectory's screen motion are rendered, each held until the next; the
+serial path then computes the whole trajectory up front, like the parallel
+path, to measure that motion and render the picked steps from it.
+"""
+
+import numpy as np
+from multiprocessing import Pool, shared_memory
+from trajectory import compute_alignment, iter_alignment
+from frame_renderer import frame_filename
+from frame_reuse import MotionTracker
+from frame_schedule import frame_holds, trajectory_motion
+from frame_stream import stream_image_files
+
+# Per-process state set up by the pool initializer
+_worker = {}
+
+
+def _share_array(array):
+    """Copy an array into a new shared-memory block and return the block."""
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block
+
+
+def _init_worker(renderer_cls, space, total_steps, output_dir, renderer_options, shape, image_name,
+                 text_name):
+    """Attach to the shared trajectory and build this worker's renderer once."""
+    blocks = [shared_memory.SharedMemory(name=name) for name in (image_name, text_name)]
+    _worker["blocks"] = blocks
+    _worker["image"], _worker["text"] = [np.ndarray(shape, dtype=np.float32, buffer=block.buf)
+                                         for block in blocks]
+    _worker["space"] = space
+    _worker["renderer"] = renderer_cls(space, total_steps, output_dir, **renderer_options)
+
+
+def _pixels_per_unit():
+    """Screen scale of this worker's renderer."""
+    return _worker["renderer"].pixels_per_unit()
+
+
+def _reuses_frames():
+    """Whether this worker's renderer patches frames drawn with an earlier step's positions."""
+    return _worker["renderer"].reuses_frames()
+
+
+def _render_step(task):
+    """Render one step, with the positions of its base step, from the shared trajectory."""
+    step, base = task
+    frame_space = _worker["space"].with_positions(_worker["image"][base], _worker["text"][base])
+    _worker["renderer"].render(frame_space, step, base)
+    return step
+
+
+def _frame_files(output_dir, steps, total_steps):
+    """Frame paths of the rendered steps."""
+    return [frame_filename(output_dir, step, total_steps) for step in steps]
+
+
+def _schedule_steps(schedule, total_steps, sinks, states, pixels_per_unit):
+    """
+    Steps to render: all of them without a schedule, else those it picks from the motion of `states`.
+
+    The sinks are told how long to hold each scheduled frame.
+    """
+    if schedule is None:
+        return np.arange(total_steps + 1)
+    steps = schedule(trajectory_motion(states, pixels_per_unit))
+    for sink in sinks:
+        sink.set_holds(frame_holds(steps))
+    return steps
+
+
+def render_trajectory(renderer_cls, space, total_steps, output_dir, workers=1, dynamics="linear",
+                      temperature=0.1, learning_rate=0.2, sinks=(), renderer_options=None, min_motion=1.0,
+                      easing=None, schedule=None):
+    """
+    Render the steps of the alignment trajectory and return the final step's space.
+
+    `renderer_cls` is a PersistentRenderer subclass taking
+    `(space, total_steps, output_dir)` plus the keyword arguments in
+    `renderer_options`, e.g. `compositing=True`. With `workers <= 1` the steps are
+    rendered in this process by one renderer; otherwise they are sharded across
+    a pool of `workers` processes reading the trajectory from shared memory.
+    Every frame is also written, in step order, to each encoder in `sinks`.
+    If the renderer patches such frames (see PersistentRenderer.reuses_frames),
+    points that moved less than `min_motion` pixels since the last redrawn
+    step keep that step's positions; `min_motion=0` redraws every step.
+    Linear dynamics are interpolated with `easing`, e.g. from `easing.make_easing`.
+    Only the steps `schedule` picks are rendered, e.g. from
+    `frame_schedule.make_schedule`, and the sinks hold each until the next.
+    """
+    renderer_options = renderer_options or {}
+    alignment = dict(dynamics=dynamics, easing=easing, temperature=temperature, learning_rate=learning_rate)
+    if workers <= 1:
+        renderer = renderer_cls(space, total_steps, output_dir, **renderer_options)
+        renderer.sinks.extend(sinks)
+        pixels_per_unit = renderer.pixels_per_unit()
+        if schedule is None:
+            # Walk the trajectory step by step, rendering each as it is computed
+            steps = np.arange(total_steps + 1)
+            trajectory = iter_alignment(space, total_steps, **alignment)
+        else:
+            # The schedule needs the motion of every step, so keep the trajectory to render from
+            image, text = compute_alignment(space, total_steps, **alignment)
+            steps = _schedule_steps(schedule, total_steps, sinks, zip(image, text), pixels_per_unit)
+            trajectory = ((step, space.with_positions(image[step], text[step])) for step in steps.tolist())
+
+        tracker = MotionTracker(total_steps, pixels_per_unit, min_motion if renderer.reuses_frames() else 0)
+        for step, frame_space in trajectory:
+            base, base_image, base_text = tracker.track(step, frame_space.image, frame_space.text)
+            renderer.render(frame_space.with_positions(base_image, base_text), step, base)
+        renderer.close()
+        tracker.write_manifest(output_dir, _frame_files(output_dir, steps, total_steps), frame_holds(steps))
+        return frame_space
+
+    image, text = compute_alignment(space, total_steps, **alignment)
+    image = np.ascontiguousarray(image, dtype=np.float32)
+    text = np.ascontiguousarray(text, dtype=np.float32)
+
+    blocks = []
+    try:
+        blocks = [_share_array(image), _share_array(text)]
+        initargs = (renderer_cls, space, total_steps, output_dir, renderer_options, image.shape,
+                    blocks[0].name, blocks[1].name)
+        with Pool(workers, _init_worker, initargs) as pool:
+            pixels_per_unit = pool.apply(_pixels_per_unit)
+            steps = _schedule_steps(schedule, total_steps, sinks, zip(image, text), pixels_per_unit)
+            tracker = MotionTracker(total_steps, pixels_per_unit,
+                                    min_motion if pool.apply(_reuses_frames) else 0)
+            tasks = [(step, tracker.track(step, image[step], text[step], copy=False)[0])
+                     for step in steps.tolist()]
+
+            # Small chunks keep the workers evenly loaded to the last frame; they
+            # are consecutive steps, so reused frames mostly follow their base
+            chunksize = max(1, len(tasks) // (workers * 4))
+            for _ in pool.imap_unordered(_render_step, tasks, chunksize):
+                pass
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    # Encode the finished frames in step order
+    frame_files = _frame_files(output_dir, steps, total_steps)
+    tracker.write_manifest(output_dir, frame_files, frame_holds(steps))
+    for sink in sinks:
+        stream_image_files(frame_files, sink)
+
+    return space.with_positions(image[-1], text[-1])
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Vectorized 3D Projection for Contrastive Learning Visualization
+Author: Mikey Bee, 2025
+
+mplot3d projects every 3D collection on its own, through masked arrays, and
+orders them by depth while drawing. For a scene of points joined by lines
+that is several passes over the same coordinates per frame. This module
+projects all image and text points, which are also the line endpoints, with
+one homogeneous `(N, 4) @ (4, 4)` product using the axes' camera matrix (set
+by `view_init(elev, azim)`), depth-sorts the markers with `argsort` and hands
+the resulting 2D coordinates to plain 2D collections.
+
+The collections are drawn inside the 3D axes, in the axes' projected data
+coordinates, so panes, grid, ticks, labels and legend stay mplot3d's own and
+frames look like those of the mplot3d scene. Agg still rasterizes every
+marker and dashed line on its own, which dominates frames of tens of
+thousands of points; with `raster=True` they are instead splatted into the
+Agg buffer with the raster backend's vectorized helpers.
+
+Nothing but the product depends on the camera, so `StepGeometry` builds the
+homogeneous points and line opacities of a step once and every view of the
+scene, along one of the `CAMERAS` paths, projects the same array.
+"""
+
+import numpy as np
+from matplotlib import rcParams
+from matplotlib.artist import Artist
+from matplotlib.collections import LineCollection, PathCollection
+from matplotlib.colors import to_rgb
+from matplotlib.markers import MarkerStyle
+from raster_renderer import disk_stencil, draw_segments, splat_markers, square_stencil
+
+# Ways the 3D scene can be projected: mplot3d collections, one matrix product
+# drawn as 2D collections, or one matrix product splatted into the frame
+PROJECTIONS = ("mplot3d", "matrix", "raster")
+
+
+def alignment_camera(progress):
+    """Start with side view and rotate to top view as alignment progresses."""
+    return (30 - 20 * progress,  # Gradually look more from above
+            30 + 50 * progress)  # Rotate around
+
+
+# Camera paths selectable with --views: (elevation, azimuth) at a training progress in [0, 1].
+# Fixed views sit a few degrees off their axis so the axis seen end-on stays legible
+CAMERAS = {
+    "default": alignment_camera,
+    "top": lambda progress: (85, -90),
+    "side": lambda progress: (5, -90),
+    "orbit": lambda progress: (25, 30 + 360 * progress),
+}
+
+
+def homogeneous(points):
+    """Append a column of ones to (N, 3) points."""
+    result = np.empty((len(points), 4))
+    result[:, :3] = points
+    result[:, 3] = 1
+    return result
+
+
+def project(points, matrix):
+    """
+    Project (N, 3) or homogeneous (N, 4) points with a 4x4 camera matrix, such as `Axes3D.get_proj()`.
+
+    Returns an (N, 3) array of projected x, y and depth, where larger depths
+    are farther from the camera, as for `proj3d.proj_transform`.
+    """
+    points = np.asarray(points)
+    if points.shape[1] == 3:
+        points = homogeneous(points)
+    projected = points @ np.asarray(matrix).T
+    return projected[:, :3] / projected[:, 3:]
+
+
+class StepGeometry:
+    """
+    Camera-independent geometry of the current step, rebuilt only when the step changes.
+
+    `points` stacks, in homogeneous coordinates, the N image points, the N
+    text points and both again raised by `label_offset` in z, where their
+    labels are anchored, so one product projects markers, line endpoints and
+    label anchors. `line_alpha` is the opacity of each pair's line, growing
+    with its length. Several renderers can share one instance.
+    """
+
+    def __init__(self, label_offset=0.03):
+        """Start empty; the first `update` builds the geometry."""
+        self.label_offset = label_offset
+        self.step = None
+
+    def update(self, space, step):
+        """Build the geometry of `space` at `step` unless it is the step already built."""
+        if step != self.step:
+            points = np.concatenate([space.image, space.text])
+            self.points = homogeneous(np.concatenate([points, points + (0, 0, self.label_offset)]))
+            # Line opacity grows with distance (closer = more transparent); 1 is the
+            # maximum expected distance in normalized space
+            self.line_alpha = np.minimum(1.0, np.linalg.norm(space.image - space.text, axis=1)) * 0.5
+            self.step = step
+        return self
+
+
+class ProjectedLayer(Artist):
+    """
+    Artist drawing one 2D collection inside a 3D axes.
+
+    Axes3D expects every collection it holds to project itself; wrapping the
+    already projected collection in a plain artist lets the axes draw it by
+    zorder like any other child.
+    """
+
+    def __init__(self, collection):
+        """Wrap a collection positioned in the axes' projected data coordinates."""
+        super().__init__()
+        self.collection = collection
+
+    def draw(self, renderer):
+        """Draw the wrapped collection."""
+        if self.get_visible():
+            self.collection.draw(renderer)
+        self.stale = False
+
+
+class RasterLayer(Artist):
+    """
+    Artist splatting a `ProjectedScene` straight into the Agg buffer of its axes' area.
+
+    Renderers without a pixel buffer get the scene's 2D collections instead.
+    """
+
+    def __init__(self, scene):
+        """Draw `scene`, whose layers are left out of the axes."""
+        super().__init__()
+        self.scene = scene
+        self._stencils = {}
+
+    def stencils(self, dpi):
+        """Marker stencils at a resolution, white outline included, cached per dpi."""
+        if dpi not in self._stencils:
+            style = self.scene.marker_style
+            edge = style['linewidth'] * dpi / 72
+            # Outlines are stroked centered on the marker's outline
+            half = np.sqrt(style['s']) * dpi / 72 / 2 + edge / 2
+            self._stencils[dpi] = [disk_stencil(half, edge) if marker == 'o' else square_stencil(half, edge)
+                                   for marker in self.scene.marker_names]
+        return self._stencils[dpi]
+
+    def draw(self, renderer):
+        """Blend lines and markers, layer by layer, over what the axes drew so far."""
+        scene = self.scene
+        if not self.get_visible() or scene.xy is None:
+            return
+        if not hasattr(renderer, 'buffer_rgba'):
+            scene.sync_collections()
+            for i in scene.layer_order:
+                scene.layers[i].collection.draw(renderer)
+            return
+
+        # Work on the axes' area only, in float RGB with row 0 at the top
+        buffer = np.asarray(renderer.buffer_rgba())
+        height, width = buffer.shape[:2]
+        x0, y0, x1, y1 = self.axes.bbox.extents
+        left, right = max(int(np.floor(x0)), 0), min(int(np.ceil(x1)), width)
+        top, bottom = max(int(np.floor(height - y1)), 0), min(int(np.ceil(height - y0)), height)
+        if left >= right or top >= bottom:
+            return
+        canvas = buffer[top:bottom, left:right, :3].astype(np.float32) / 255
+        box = (0, 0, right - left, bottom - top)
+
+        pixels = self.axes.transData.transform(scene.xy)
+        pixels[:, 0] -= left
+        pixels[:, 1] = height - pixels[:, 1] - top
+        n = len(pixels) // 2
+        dpi = renderer.dpi
+        edge = np.array(to_rgb(scene.marker_style['edgecolors']), dtype=np.float32)
+        for i in scene.layer_order:
+            if i == 0:
+                line_width = scene.line_style.get('linewidth', 1)
+                dashes = None
+                if scene.line_style.get('linestyle') == '--':
+                    on, off = rcParams['lines.dashed_pattern']
+                    dashes = (on * line_width * dpi / 72, off * line_width * dpi / 72)
+                draw_segments(canvas, np.stack([pixels[:n], pixels[n:]], axis=1), scene.line_colors[:, :3],
+                              scene.line_colors[:, 3], box, dashes)
+            else:
+                order = scene.orders[i - 1]
+                points = pixels[(i - 1) * n:i * n][order]
+                splat_markers(canvas, points[:, 0], points[:, 1], scene.rgb[order], self.stencils(dpi)[i - 1],
+                              scene.marker_style['alpha'], box, edge)
+        buffer[top:bottom, left:right, :3] = np.rint(np.clip(canvas, 0, 1) * 255)
+        self.stale = False
+
+
+class ProjectedScene:
+    """
+    Markers for N image and N text points, and the N lines joining each pair, in one 3D axes.
+
+    `marker_style` holds the scatter keywords shared by both marker sets
+    (`s`, `alpha`, `edgecolors`, `linewidth`), `line_style` the line
+    keywords. Like mplot3d, markers are drawn far to near within each set,
+    and the three layers are ordered by their nearest depth. With
+    `raster=True` one `RasterLayer` draws all three layers, as disks or
+    squares with one-pixel lines.
+    """
+
+    def __init__(self, ax, colors, markers=('o', 's'), marker_style=None, line_style=None, raster=False):
+        """Create the line and marker layers, empty until the first `update`."""
+        self.ax = ax
+        self.colors = np.asarray(colors)
+        self.rgb = np.asarray(self.colors[:, :3], dtype=np.float32)
+        self.raster = raster
+        marker_style = self.marker_style = {**dict(s=150, alpha=0.8, edgecolors='white', linewidth=1.5),
+                                            **(marker_style or {})}
+        self.line_style = line_style or {}
+        self.marker_names = markers
+        self.xy = None
+
+        self.lines = LineCollection([], transform=ax.transData, **self.line_style)
+        self.markers = []
+        for marker in markers:
+            marker = MarkerStyle(marker)
+            self.markers.append(PathCollection(
+                [marker.get_path().transformed(marker.get_transform())],
+                sizes=[marker_style['s']], offsets=np.empty((0, 2)), offset_transform=ax.transData,
+                facecolors=self.colors, edgecolors=marker_style['edgecolors'],
+                linewidths=marker_style['linewidth'], alpha=marker_style['alpha']))
+
+        self.layers = []
+        for collection in [self.lines] + self.markers:
+            collection.set_figure(ax.figure)
+            collection.set_clip_path(ax.patch)
+            layer = ProjectedLayer(collection)
+            self.layers.append(layer if raster else ax.add_artist(layer))
+        if raster:
+            self.raster_layer = ax.add_artist(RasterLayer(self))
+
+    def update(self, projected, line_colors):
+        """
+        Move the layers to projected points and order them.
+
+        `projected` holds the (2N, 3) projected image then text points, as
+        returned by `project`, and lines take (N, 4) RGBA colors.
+        """
+        n = len(projected) // 2
+        self.xy, depth = projected[:, :2], projected[:, 2]
+        self.line_colors = np.array(line_colors)
+
+        # Far markers first, so nearer ones cover them
+        self.orders = [np.argsort(depth[:n])[::-1], np.argsort(depth[n:])[::-1]]
+        nearest = [depth.min(initial=np.inf), depth[:n].min(initial=np.inf), depth[n:].min(initial=np.inf)]
+
+        # Layers with farther nearest points draw first, above the grid
+        self.layer_order = sorted(range(len(self.layers)), key=lambda i: nearest[i], reverse=True)
+        zorder = max(axis.get_zorder() for axis in self.ax._axis_map.values()) + 1
+        if self.raster:
+            self.raster_layer.set_zorder(zorder)
+            self.raster_layer.stale = True
+        else:
+            for rank, i in enumerate(self.layer_order):
+                self.layers[i].set_zorder(zorder + rank)
+            self.sync_collections()
+
+    def sync_collections(self):
+        """Move the 2D collections to the last projected positions."""
+        n = len(self.xy) // 2
+        self.lines.set_segments(np.stack([self.xy[:n], self.xy[n:]], axis=1))
+        self.lines.set_color(self.line_colors)
+        for collection, order, points in zip(self.markers, self.orders, (self.xy[:n], self.xy[n:])):
+            collection.set_offsets(points[order])
+            collection.set_facecolor(self.colors[order])
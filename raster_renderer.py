@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+"""
+Raster Frame Renderer for Contrastive Learning Visualization
+Author: Mikey Bee, 2025
+
+This module draws the side-by-side layout of visualizer.SpacesRenderer
+straight into a NumPy RGB buffer instead of going through matplotlib, so
+frames of 100k+ point clouds render at interactive rates. Markers are
+splatted with vectorized index arithmetic, lines are rasterized by sampling
+every segment at pixel spacing in one pass, and all text is rendered once into
+sprites: item labels come from the label atlas shared with the matplotlib
+compositing path, other text from Pillow. The static layer (panel frames, grid, ticks and
+titles) is drawn once and copied into every frame, which is written as the
+same step_XXX.png file the matplotlib renderers produce. The final combined
+view is drawn the same way by `plot_combined_space`.
+"""
+
+import functools
+import numpy as np
+from matplotlib.backends.backend_agg import RendererAgg
+from matplotlib.colors import to_rgb
+from matplotlib.font_manager import FontProperties, findfont
+from PIL import Image, ImageDraw, ImageFont
+from frame_renderer import PersistentRenderer, describe_step
+from density import density_image
+from label_atlas import LabelAtlas
+from label_layout import LABEL_CAP, LabelLayout
+
+# Frame renderers selectable with --backend
+BACKENDS = ("matplotlib", "raster")
+
+# Canvas of the matplotlib layout: 15 x 7 inches at 150 dpi
+DPI = 150
+WIDTH, HEIGHT = 15 * DPI, 7 * DPI
+
+# Axes boxes as (left, bottom, width, height) figure fractions, as laid out by visualizer.py
+PANEL_BOXES = [(0.0311, 0.1052, 0.4565, 0.7302), (0.5261, 0.1052, 0.4565, 0.7302)]
+
+# Canvas and axes box of the combined view: 12 x 10 inches, like visualizer.plot_combined_space
+COMBINED_WIDTH, COMBINED_HEIGHT = 12 * DPI, 10 * DPI
+COMBINED_BOX = (0.07, 0.09, 0.9, 0.83)
+
+TICKS = np.linspace(0, 1, 6)
+GRID_COLOR = np.array(to_rgb('#b0b0b0'), dtype=np.float32)
+BLACK = np.zeros(3, dtype=np.float32)
+
+# Points and line samples are processed in chunks so their index arrays stay bounded
+SPLAT_CHUNK = 1 << 22
+
+
+def points_to_pixels(fontsize):
+    """Convert a size in points to pixels at the canvas resolution."""
+    return fontsize * DPI / 72
+
+
+@functools.lru_cache(maxsize=None)
+def text_sprite(text, fontsize, bold=False):
+    """
+    Render a line of text once into an (H, W) float32 coverage mask.
+
+    Every sprite of a font size shares the same height and baseline, so
+    sprites can be placed side by side to compose longer strings.
+    """
+    font_path = findfont(FontProperties(family='sans-serif', weight='bold' if bold else 'normal'))
+    font = ImageFont.truetype(font_path, round(points_to_pixels(fontsize)))
+    ascent, descent = font.getmetrics()
+    image = Image.new('L', (max(1, int(np.ceil(font.getlength(text)))), ascent + descent))
+    ImageDraw.Draw(image).text((0, 0), text, fill=255, font=font)
+    return np.asarray(image, dtype=np.float32) / 255
+
+
+def compose_sprites(texts, fontsize, bold=False):
+    """Join cached sprites side by side, so e.g. step counters reuse per-digit sprites."""
+    return np.hstack([text_sprite(text, fontsize, bold) for text in texts])
+
+
+def blit_sprite(canvas, sprite, x, y, color, alpha=1.0, ha='center', va='center'):
+    """Alpha-blend a coverage sprite of one color into `canvas` anchored at pixel (x, y)."""
+    height, width = sprite.shape
+    left = int(round(x - {'left': 0, 'center': width / 2, 'right': width}[ha]))
+    top = int(round(y - {'top': 0, 'center': height / 2, 'bottom': height}[va]))
+    rows = slice(max(top, 0), min(top + height, canvas.shape[0]))
+    cols = slice(max(left, 0), min(left + width, canvas.shape[1]))
+    if rows.start >= rows.stop or cols.start >= cols.stop:
+        return
+    coverage = sprite[rows.start - top:rows.stop - top, cols.start - left:cols.stop - left, None] * alpha
+    region = canvas[rows, cols]
+    region += (color - region) * coverage
+
+
+def blit_rgba(canvas, sprite, x, y):
+    """Alpha-blend an (H, W, 4) uint8 RGBA sprite into `canvas` centered at pixel (x, y)."""
+    height, width = sprite.shape[:2]
+    left, top = int(round(x - width / 2)), int(round(y - height / 2))
+    rows = slice(max(top, 0), min(top + height, canvas.shape[0]))
+    cols = slice(max(left, 0), min(left + width, canvas.shape[1]))
+    if rows.start >= rows.stop or cols.start >= cols.stop:
+        return
+    pixels = sprite[rows.start - top:rows.stop - top, cols.start - left:cols.stop - left] / np.float32(255)
+    region = canvas[rows, cols]
+    region += (pixels[..., :3] - region) * pixels[..., 3:]
+
+
+def disk_stencil(radius, edge_width):
+    """
+    Pixel offsets, coverage and edge mix of an antialiased disk marker.
+
+    Returns `(dy, dx, coverage, edge)`: `coverage` is the fraction of each
+    pixel inside the disk and `edge` how much of its color is the outline.
+    """
+    reach = int(np.ceil(radius + 0.5))
+    dy, dx = np.mgrid[-reach:reach + 1, -reach:reach + 1]
+    distance = np.hypot(dx, dy).ravel()
+    coverage = np.clip(radius + 0.5 - distance, 0, 1)
+    edge = np.clip(distance - (radius - edge_width) + 0.5, 0, 1) if edge_width else np.zeros_like(distance)
+    keep = coverage > 0
+    return (dy.ravel()[keep], dx.ravel()[keep],
+            coverage[keep].astype(np.float32), edge[keep].astype(np.float32))
+
+
+def square_stencil(half_width, edge_width):
+    """Pixel offsets, coverage and edge mix of an antialiased square marker, like `disk_stencil`."""
+    reach = int(np.ceil(half_width + 0.5))
+    dy, dx = np.mgrid[-reach:reach + 1, -reach:reach + 1]
+    distance = np.maximum(np.abs(dx), np.abs(dy)).ravel()
+    coverage = np.clip(half_width + 0.5 - distance, 0, 1)
+    edge = np.clip(distance - (half_width - edge_width) + 0.5, 0, 1) if edge_width else np.zeros_like(coverage)
+    keep = coverage > 0
+    return (dy.ravel()[keep], dx.ravel()[keep],
+            coverage[keep].astype(np.float32), edge[keep].astype(np.float32))
+
+
+@functools.lru_cache(maxsize=None)
+def text_renderer():
+    """Agg renderer measuring text at DPI, standing in for the figure canvas LabelLayout measures with."""
+    return RendererAgg(1, 1, DPI)
+
+
+def select_labels(layout, pixels, category_ids, num_categories, text_of, box):
+    """
+    Run LabelLayout.select on (N, 2) canvas pixel positions inside pixel `box`.
+
+    The layout works in display coordinates, whose y runs upwards, so rows
+    are negated to pick the same labels as the matplotlib renderers.
+    """
+    left, top, right, bottom = box
+    anchors = np.stack([pixels[:, 0], -pixels[:, 1]], 1)
+    return layout.select(text_renderer(), anchors, category_ids, num_categories, text_of,
+                         (left, -bottom, right, -top))
+
+
+def default_marker_size(count):
+    """Marker area in points^2 for `count` points: shrinks past 1000 points so large clouds stay legible."""
+    return 150 if count <= 1000 else max(2.0, 150 * 1000 / count)
+
+
+def pixel_box(box, width, height):
+    """(left, top, right, bottom) pixels of a (left, bottom, width, height) figure-fraction box."""
+    left, bottom, box_width, box_height = box
+    return (round(left * width), round((1 - bottom - box_height) * height),
+            round((left + box_width) * width), round((1 - bottom) * height))
+
+
+def draw_panel(canvas, box, title):
+    """Grid, frame, outward ticks with their labels and the title of one panel at pixel `box`."""
+    left, top, right, bottom = box
+    tick_length = points_to_pixels(3.5)
+    xs = left + TICKS * (right - left)
+    ys = bottom - TICKS * (bottom - top)
+    grid = np.concatenate([
+        np.stack([np.stack([xs, np.full_like(xs, top)], 1),
+                  np.stack([xs, np.full_like(xs, bottom)], 1)], 1),
+        np.stack([np.stack([np.full_like(ys, left), ys], 1),
+                  np.stack([np.full_like(ys, right), ys], 1)], 1),
+    ])
+    draw_segments(canvas, grid, GRID_COLOR, 0.3)
+
+    # Axes frame
+    corners = np.array([[left, top], [right - 1, top], [right - 1, bottom - 1], [left, bottom - 1]])
+    draw_segments(canvas, np.stack([corners, np.roll(corners, -1, axis=0)], 1), BLACK)
+
+    # Outward ticks with their labels
+    ticks = np.concatenate([
+        np.stack([np.stack([xs, np.full_like(xs, bottom)], 1),
+                  np.stack([xs, np.full_like(xs, bottom + tick_length)], 1)], 1),
+        np.stack([np.stack([np.full_like(ys, left), ys], 1),
+                  np.stack([np.full_like(ys, left - tick_length), ys], 1)], 1),
+    ])
+    draw_segments(canvas, ticks, BLACK)
+    for value, x, y in zip(TICKS, xs, ys):
+        sprite = text_sprite(f"{value:.1f}", 10)
+        blit_sprite(canvas, sprite, x, bottom + 2 * tick_length, BLACK, va='top')
+        blit_sprite(canvas, sprite, left - 2 * tick_length, y, BLACK, ha='right')
+
+    blit_sprite(canvas, text_sprite(title, 16, bold=True), (left + right) / 2,
+                top - points_to_pixels(6), BLACK, va='bottom')
+
+
+def splat_markers(canvas, x, y, colors, stencil, alpha, clip_box, edge_color=BLACK):
+    """
+    Blend a disk marker at every pixel position `(x, y)` into `canvas` at once.
+
+    Marker pixels outside `clip_box = (left, top, right, bottom)` are dropped.
+    Where markers overlap the one drawn later wins, as in a single scatter.
+    """
+    dy, dx, coverage, edge = stencil
+    left, top, right, bottom = clip_box
+    # Blended one channel at a time: 1D fancy indexing is about twice as fast as by rows
+    flat = canvas.reshape(-1)
+    chunk = max(1, SPLAT_CHUNK // len(dy))
+    for start in range(0, len(x), chunk):
+        px = np.rint(x[start:start + chunk]).astype(np.int64)[:, None] + dx
+        py = np.rint(y[start:start + chunk]).astype(np.int64)[:, None] + dy
+        inside = (px >= left) & (px < right) & (py >= top) & (py < bottom)
+        point, offset = np.nonzero(inside)
+        index = (py[point, offset] * canvas.shape[1] + px[point, offset]) * 3
+
+        # Fill color shading into the outline towards the rim
+        color = colors[start:start + chunk][point]
+        color += (edge_color - color) * edge[offset, None]
+        weight = coverage[offset] * alpha
+        for channel in range(3):
+            flat[index + channel] = flat[index + channel] * (1 - weight) + color[:, channel] * weight
+
+
+def draw_segments(canvas, segments, color, alpha=1.0, clip_box=None, dashes=None):
+    """
+    Draw (M, 2, 2) pixel-space segments as one-pixel lines, all at once.
+
+    Every segment is sampled at unit spacing along its longer axis; the
+    samples of all segments are generated with one repeat/arange and
+    blended in a single scatter. `color` is one RGB color or (M, 3) colors,
+    `alpha` one opacity or (M,) opacities. With `dashes=(on, off)` in pixels
+    only the samples within the "on" part of each dash period are drawn.
+    Segments are drawn in groups of about SPLAT_CHUNK samples.
+    """
+    delta = segments[:, 1] - segments[:, 0]
+    counts = np.ceil(np.abs(delta).max(axis=1)).astype(np.int64) + 1
+    group = np.cumsum(counts) // SPLAT_CHUNK
+    starts = np.flatnonzero(np.diff(group, prepend=-1))
+    color = np.asarray(color, dtype=np.float32)
+    alpha = np.asarray(alpha, dtype=np.float32)
+    for lo, hi in zip(starts, np.append(starts[1:], len(segments))):
+        _draw_segment_group(canvas, segments[lo:hi], counts[lo:hi],
+                            color[lo:hi] if color.ndim == 2 else color,
+                            alpha[lo:hi] if alpha.ndim == 1 else alpha, clip_box, dashes)
+
+
+def _draw_segment_group(canvas, segments, counts, color, alpha, clip_box, dashes):
+    """Sample and blend one group of segments for `draw_segments`."""
+    start, delta = segments[:, 0], segments[:, 1] - segments[:, 0]
+    segment = np.repeat(np.arange(len(segments)), counts)
+    first = np.cumsum(counts) - counts
+    t = (np.arange(counts.sum()) - first[segment]) / np.maximum(counts[segment] - 1, 1)
+    if dashes is not None:
+        # Gaps are dropped before any sample is positioned
+        on, off = dashes
+        keep = t * np.repeat(np.hypot(delta[:, 0], delta[:, 1]), counts) % (on + off) < on
+        segment, t = segment[keep], t[keep]
+    x = np.rint(start[segment, 0] + t * delta[segment, 0]).astype(np.int64)
+    y = np.rint(start[segment, 1] + t * delta[segment, 1]).astype(np.int64)
+
+    left, top, right, bottom = clip_box or (0, 0, canvas.shape[1], canvas.shape[0])
+    inside = (x >= left) & (x < right) & (y >= top) & (y < bottom)
+    index = (y[inside] * canvas.shape[1] + x[inside]) * 3
+    if color.ndim == 2:
+        color = color[segment[inside]]
+    if alpha.ndim == 1:
+        alpha = alpha[segment[inside]]
+    flat = canvas.reshape(-1)
+    for channel in range(3):
+        flat[index + channel] += (color[..., channel] - flat[index + channel]) * alpha
+
+
+class RasterRenderer(PersistentRenderer):
+    """
+    Side-by-side image/text space renderer drawing straight into a NumPy buffer.
+
+    Mirrors visualizer.SpacesRenderer: the same panels, markers, labels and
+    step text, without matplotlib in the per-frame path. At most `max_labels`
+    non-overlapping labels are drawn per panel, picked by the same LabelLayout;
+    markers shrink with the point count unless `marker_size` (in points^2,
+    like scatter's `s`) is set.
+    With `density=True` the panels show category-blended per-pixel densities
+    instead of markers.
+    """
+
+    def __init__(self, space, total_steps, output_dir, marker_size=None, max_labels=LABEL_CAP, density=False):
+        """Draw the static layer and prepare marker stencils and label sprites."""
+        super().__init__(total_steps, output_dir)
+        self.density = density
+        self.colors = None if density else np.asarray(space.point_colors()[:, :3], dtype=np.float32)
+
+        # Markers shrink with the point count so large clouds stay legible
+        if marker_size is None:
+            marker_size = default_marker_size(len(space))
+        radius = points_to_pixels(np.sqrt(marker_size)) / 2
+        self.stencil = disk_stencil(radius, points_to_pixels(1.0) if radius >= 3 else 0)
+
+        # Panel boxes in pixels as (left, top, right, bottom)
+        self.boxes = [pixel_box(box, WIDTH, HEIGHT) for box in PANEL_BOXES]
+
+        # Label sprites are rendered on first use, for the points the layout keeps
+        self.atlas = LabelAtlas(fontsize=8, color='black', box_alpha=None)
+        self.layout = LabelLayout(fontsize=8, weight='bold', pad=0, max_labels=max_labels)
+
+        self.background = self._static_layer()
+        self.canvas = np.empty_like(self.background)
+        # Canvas with the last drawn points, before any step text
+        self.points_layer = np.empty_like(self.background)
+        self._layer_step = None
+
+    def _static_layer(self):
+        """Panel grids, frames, ticks and titles, drawn once."""
+        canvas = np.ones((HEIGHT, WIDTH, 3), dtype=np.float32)
+        for box, title in zip(self.boxes, ('Image Space', 'Text Space')):
+            draw_panel(canvas, box, title)
+        return canvas
+
+    def pixels_per_unit(self):
+        """(x, y) pixels per data unit of the panels."""
+        return np.max([(right - left, bottom - top) for left, top, right, bottom in self.boxes], axis=0)
+
+    def update(self, space, step):
+        """Splat the markers and labels of both panels and draw the step text."""
+        self._draw_points(space)
+        self._draw_step(step)
+
+    def _draw_points(self, space):
+        """Draw both panels' markers and labels over the static layer and keep the result."""
+        np.copyto(self.canvas, self.background)
+        for (left, top, right, bottom), prefix, points in zip(self.boxes, ('', 'T:'), (space.image, space.text)):
+            if self.density:
+                image = density_image(points, space.category_ids, space.category_colors,
+                                      right - left, bottom - top)
+                region = self.canvas[top:bottom, left:right]
+                region += (image[..., :3] - region) * image[..., 3:]
+                continue
+
+            points = np.asarray(points)
+            x = left + points[:, 0] * (right - left)
+            y = bottom - points[:, 1] * (bottom - top)
+            splat_markers(self.canvas, x, y, self.colors, self.stencil, 0.7, (left, top, right, bottom))
+
+            # Only non-overlapping labels, category representatives first
+            items = space.items
+            kept = select_labels(self.layout, np.stack([x, y], 1), space.category_ids, len(space.categories),
+                                 lambda i: f"{prefix}{items[i].upper()}", (left, top, right, bottom))
+            for i in kept:
+                blit_rgba(self.canvas, self.atlas.sprite(f"{prefix}{items[i].upper()}", dpi=DPI), x[i], y[i])
+        np.copyto(self.points_layer, self.canvas)
+
+    def _draw_step(self, step):
+        """Draw the step title and explanation."""
+        # Step title from per-character sprites, so each frame only composes cached text
+        title = compose_sprites(['Contrastive Learning Space Alignment - Step '] +
+                                list(f"{step}/{self.total_steps}"), 18, bold=True)
+        blit_sprite(self.canvas, title, WIDTH / 2, 0.02 * HEIGHT, BLACK, va='top')
+        explanation = text_sprite(describe_step(step, self.total_steps)[0], 14)
+        blit_sprite(self.canvas, explanation, WIDTH / 2, 0.99 * HEIGHT, BLACK, va='bottom')
+
+    def frame_rgba(self):
+        """Return the current frame as an (H, W, 4) uint8 RGBA array."""
+        frame = np.empty((HEIGHT, WIDTH, 4), dtype=np.uint8)
+        frame[..., :3] = np.rint(self.canvas * 255)
+        frame[..., 3] = 255
+        return frame
+
+    def reuses_frames(self):
+        """Frames drawn with an earlier step's positions only redraw the step text."""
+        return True
+
+    def render(self, space, step, base=None):
+        """
+        Draw a step, save it as that step's frame and stream it to the sinks.
+
+        When `space` holds the positions of an earlier `base` step that this
+        renderer drew last, only the step text is redrawn over its points.
+        """
+        base = step if base is None else base
+        if base != step and base == self._layer_step:
+            np.copyto(self.canvas, self.points_layer)
+            self._draw_step(step)
+        else:
+            self.update(space, step)
+        self._layer_step = base
+        frame = self.frame_rgba()
+        Image.fromarray(frame[..., :3]).save(self.frame_path(step))
+        for sink in self.sinks:
+            sink.write(frame)
+
+    def close(self):
+        """Nothing to release; there is no figure."""
+
+
+def plot_combined_space(space, output_dir, density=False, marker_size=None, max_labels=LABEL_CAP):
+    """
+    Draw the final aligned space like visualizer.plot_combined_space, straight into a NumPy buffer.
+
+    Image points are disks and text points squares, joined by dashed lines;
+    at most `max_labels` non-overlapping labels are drawn. With
+    `density=True` both spaces are shaded as one category-blended density.
+    """
+    canvas = np.ones((COMBINED_HEIGHT, COMBINED_WIDTH, 3), dtype=np.float32)
+    box = left, top, right, bottom = pixel_box(COMBINED_BOX, COMBINED_WIDTH, COMBINED_HEIGHT)
+    draw_panel(canvas, box, 'Aligned Shared Space')
+
+    def to_pixels(points):
+        points = np.asarray(points)
+        return np.stack([left + points[:, 0] * (right - left), bottom - points[:, 1] * (bottom - top)], 1)
+
+    if density:
+        both = np.concatenate([space.image, space.text])
+        image = density_image(both, np.tile(space.category_ids, 2), space.category_colors,
+                              right - left, bottom - top)
+        region = canvas[top:bottom, left:right]
+        region += (image[..., :3] - region) * image[..., 3:]
+    else:
+        image_pixels, text_pixels = to_pixels(space.image), to_pixels(space.text)
+        dashes = (3.7 * DPI / 72, 1.6 * DPI / 72)
+        draw_segments(canvas, np.stack([image_pixels, text_pixels], 1), BLACK, 0.3, box, dashes)
+
+        colors = np.asarray(space.point_colors()[:, :3], dtype=np.float32)
+        marker_size = default_marker_size(len(space)) if marker_size is None else marker_size
+        half = points_to_pixels(np.sqrt(marker_size)) / 2
+        edge = points_to_pixels(1.0) if half >= 3 else 0
+        splat_markers(canvas, *image_pixels.T, colors, disk_stencil(half, edge), 0.7, box)
+        splat_markers(canvas, *text_pixels.T, colors, square_stencil(half, edge), 0.4, box)
+
+        # Only non-overlapping labels, image and text ones competing for the same room;
+        # text points are labeled with a slight offset
+        items, n = space.items, len(space)
+        offset = np.array([0.02, -0.02]) * (right - left, top - bottom)
+        anchors = np.concatenate([image_pixels, text_pixels + offset])
+
+        def text_of(i):
+            return items[i].upper() if i < n else f"T:{items[i - n].upper()}"
+
+        layout = LabelLayout(fontsize=8, weight='bold', pad=0, max_labels=max_labels)
+        kept = select_labels(layout, anchors, np.tile(space.category_ids, 2), len(space.categories), text_of, box)
+        atlas = LabelAtlas(fontsize=8, color='black', box_alpha=None)
+        for i in kept:
+            blit_rgba(canvas, atlas.sprite(text_of(i), dpi=DPI), *anchors[i])
+
+    # Category legend in the upper right, skipped when there are too many to read
+    if len(space.categories) <= 20:
+        row = points_to_pixels(18)
+        x = right - points_to_pixels(110)
+        legend_colors = np.asarray([to_rgb(color) for color in space.category_colors], dtype=np.float32)
+        ys = top + row * (np.arange(len(space.categories)) + 1)
+        splat_markers(canvas, np.full(len(ys), x), ys, legend_colors,
+                      disk_stencil(points_to_pixels(10) / 2, 0), 1.0, box)
+        for category, y in zip(space.categories, ys):
+            blit_sprite(canvas, text_sprite(category.capitalize(), 12), x + points_to_pixels(12), y, BLACK,
+                        ha='left')
+
+    blit_sprite(canvas, text_sprite("Image and text representations now occupy the same semantic space", 14),
+                COMBINED_WIDTH / 2, 0.99 * COMBINED_HEIGHT, BLACK, va='bottom')
+    Image.fromarray(np.rint(canvas * 255).astype(np.uint8)).save(f"{output_dir}/combined_space.png")
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import time
+    from data_generator import generate_initial_spaces, load_synthetic_spaces
+    from trajectory import DYNAMICS
+    from easing import EASINGS, make_easing
+    from frame_schedule import make_schedule
+    from parallel_render import render_trajectory
+
+    parser = argparse.ArgumentParser(description="Render alignment frames of a large embedding pair with the NumPy rasterizer.")
+    parser.add_argument("-d", "--data", type=str, default=None,
+                       help="Prefix of a synthetic dataset written by data_generator.py (default: built-in demo data)")
+    parser.add_argument("-s", "--steps", type=int, default=50,
+                       help="Number of transformation steps (default: 50)")
+    parser.add_argument("-o", "--output", type=str, default="contrastive_raster",
+                       help="Output directory (default: contrastive_raster)")
+    parser.add_argument("--dynamics", type=str, choices=DYNAMICS, default="linear",
+                       help="Alignment dynamics (default: linear)")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                       help="Number of processes rendering frames in parallel (default: 1)")
+    parser.add_argument("--marker-size", type=float, default=None,
+                       help="Marker area in points^2 (default: shrinks with the point count)")
+    parser.add_argument("--density", action="store_true",
+                       help="Shade per-pixel category densities instead of drawing markers")
+    parser.add_argument("--min-motion", type=float, default=1.0,
+                       help="Pixels points must move before a frame redraws them, 0 redraws every step (default: 1.0)")
+    parser.add_argument("--easing", type=str, choices=EASINGS, default="linear",
+                       help="Easing of the linear alignment over time (default: linear)")
+    parser.add_argument("--stagger", type=float, default=0.0,
+                       help="Share of the timeline over which categories start moving one after another, 0 moves all items together (default: 0)")
+    parser.add_argument("--frames", type=int, default=None,
+                       help="Frame budget, first and last step included, placed along the trajectory where points move most and each held until the next (default: render every step)")
+    parser.add_argument("--min-dwell", type=int, default=1,
+                       help="Fewest steps a scheduled frame is held for (default: 1)")
+    parser.add_argument("--max-dwell", type=int, default=None,
+                       help="Most steps a scheduled frame is held for (default: no limit)")
+
+    args = parser.parse_args()
+    space = load_synthetic_spaces(args.data) if args.data else generate_initial_spaces()
+    os.makedirs(args.output, exist_ok=True)
+
+    start_time = time.time()
+    render_trajectory(RasterRenderer, space, args.steps, args.output, args.workers, args.dynamics,
+                      renderer_options=dict(marker_size=args.marker_size, density=args.density),
+                      min_motion=args.min_motion, easing=make_easing(args.easing, args.stagger, space),
+                      schedule=make_schedule(args.frames, args.min_dwell, args.max_dwell))
+    elapsed_time = time.time() - start_time
+    frame_count = min(args.frames or args.steps + 1, args.steps + 1)
+    print(f"Rendered {frame_count} frames of {len(space)} points to '{args.output}' "
+          f"in {elapsed_time:.2f} seconds ({elapsed_time / frame_count:.3f} seconds per frame)")
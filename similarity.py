@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Blocked Similarity Kernel for Contrastive Learning Visualization
+Author: Mikey Bee, 2025
+
+This module computes statistics of the N x N image-text similarity matrix
+without ever materializing it. Tiles of `tile_size` x `tile_size` logits are
+streamed through matmul and folded into running log-sum-exp, top-k, rank and
+positive-pair statistics, so memory stays bounded at 100k+ points. Inputs can
+be any EmbeddingSpace, including the memory-mapped ones written by
+data_generator.generate_synthetic_spaces.
+"""
+
+import numpy as np
+
+# Similarity functions understood by the kernel
+METRICS = ("euclidean", "dot")
+
+# Exponents are clipped here before exp: e^-80 is still a normal float32 and
+# vanishes next to the e^0 terms of every row, while exp slows down severalfold
+# on inputs whose results are denormal
+EXP_FLOOR = -80.0
+
+
+def _squared_norms(points, tile_size):
+    """Row-wise squared norms of a (possibly memory-mapped) array, computed in tiles."""
+    norms = np.empty(len(points), dtype=np.float32)
+    for start in range(0, len(points), tile_size):
+        chunk = np.asarray(points[start:start + tile_size], dtype=np.float32)
+        np.einsum('ij,ij->i', chunk, chunk, out=norms[start:start + len(chunk)])
+    return norms
+
+
+def _logit_block(image_tile, text_tile, image_sq, text_sq, temperature, metric, out):
+    """Write the logits of one tile into `out` with a single matmul."""
+    np.matmul(image_tile, text_tile.T, out=out)
+    if metric == "euclidean":
+        # -||x - y||^2 = 2 x.y - ||x||^2 - ||y||^2
+        out *= 2
+        out -= image_sq[:, None]
+        out -= text_sq[None, :]
+    out /= temperature
+    return out
+
+
+def _positive_logits(image, text, temperature, metric, tile_size):
+    """Logits of the N matching pairs, computed in row tiles."""
+    positives = np.empty(len(image), dtype=np.float32)
+    for start in range(0, len(image), tile_size):
+        image_tile = np.asarray(image[start:start + tile_size], dtype=np.float32)
+        text_tile = np.asarray(text[start:start + tile_size], dtype=np.float32)
+        values = np.einsum('ij,ij->i', image_tile, text_tile)
+        if metric == "euclidean":
+            # Same expansion as the tiles, so ranks compare like with like
+            values *= 2
+            values -= np.einsum('ij,ij->i', image_tile, image_tile)
+            values -= np.einsum('ij,ij->i', text_tile, text_tile)
+        positives[start:start + len(values)] = values / temperature
+    return positives
+
+
+def iter_similarity_tiles(image, text, tile_size=2048, temperature=1.0, metric="euclidean"):
+    """
+    Yield `(row_slice, col_slice, block)` for every tile of the logit matrix.
+
+    `block` is a reused (tile_size, tile_size) buffer; copy it to keep a tile
+    beyond the current iteration.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric '{metric}', expected one of {METRICS}")
+
+    n = len(image)
+    image_sq = _squared_norms(image, tile_size) if metric == "euclidean" else None
+    text_sq = _squared_norms(text, tile_size) if metric == "euclidean" else None
+    buffer = np.empty((min(tile_size, n), min(tile_size, n)), dtype=np.float32)
+
+    for row_start in range(0, n, tile_size):
+        rows = slice(row_start, min(row_start + tile_size, n))
+        image_tile = np.asarray(image[rows], dtype=np.float32)
+        for col_start in range(0, n, tile_size):
+            cols = slice(col_start, min(col_start + tile_size, n))
+            text_tile = np.asarray(text[cols], dtype=np.float32)
+            block = buffer[:rows.stop - rows.start, :cols.stop - cols.start]
+            _logit_block(image_tile, text_tile,
+                         image_sq[rows] if image_sq is not None else None,
+                         text_sq[cols] if text_sq is not None else None,
+                         temperature, metric, block)
+            yield rows, cols, block
+
+
+def _floored_exp(values):
+    """Exponentiate `values` in place, clipped at EXP_FLOOR, and return them."""
+    np.maximum(values, EXP_FLOOR, out=values)
+    return np.exp(values, out=values)
+
+
+def _block_logsumexp(block, axis, scratch):
+    """Log-sum-exp of a block along one axis, using a `scratch` buffer at least as large as the block."""
+    block_max = block.max(axis=axis)
+    shifted = scratch[:block.shape[0], :block.shape[1]]
+    np.subtract(block, block_max[:, None] if axis == 1 else block_max[None, :], out=shifted)
+    return block_max + np.log(_floored_exp(shifted).sum(axis=axis))
+
+
+def _fold_logsumexp(row_lse, col_lse, rows, cols, block, scratch):
+    """Fold one tile into the running log-sum-exp of its rows and columns."""
+    np.logaddexp(row_lse[rows], _block_logsumexp(block, 1, scratch), out=row_lse[rows])
+    np.logaddexp(col_lse[cols], _block_logsumexp(block, 0, scratch), out=col_lse[cols])
+
+
+def _tiled_logsumexp(image, text, tile_size=2048, temperature=1.0, metric="euclidean"):
+    """Log-sum-exp over every row (image) and column (text) of the logit matrix, and nothing else."""
+    n = len(image)
+    row_lse = np.full(n, -np.inf, dtype=np.float32)
+    col_lse = np.full(n, -np.inf, dtype=np.float32)
+    scratch = np.empty((min(tile_size, n), min(tile_size, n)), dtype=np.float32)
+    for rows, cols, block in iter_similarity_tiles(image, text, tile_size, temperature, metric):
+        _fold_logsumexp(row_lse, col_lse, rows, cols, block, scratch)
+    return row_lse, col_lse
+
+
+def _infonce_loss(positives, row_lse, col_lse):
+    """Symmetric InfoNCE loss from the positive logits and both directions' log-sum-exps."""
+    return float(0.5 * (row_lse.mean() + col_lse.mean()) - positives.mean())
+
+
+def similarity_stats(space, tile_size=2048, temperature=1.0, k=5, metric="euclidean"):
+    """
+    Fold the full image-text logit matrix of an EmbeddingSpace into per-item statistics.
+
+    Returns a dict with:
+        positives: (N,) logits of the matching pairs
+        row_lse, col_lse: (N,) log-sum-exp over each row (image) and column (text)
+        row_rank, col_rank: (N,) number of negatives scoring above the positive
+        topk_values, topk_indices: (N, k) best-matching texts for each image
+        loss: symmetric InfoNCE loss
+        recall_at_k: image-to-text and text-to-image retrieval recall at k
+    """
+    return tiled_similarity_stats(space.image, space.text, tile_size, temperature, k, metric)
+
+
+def tiled_similarity_stats(image, text, tile_size=2048, temperature=1.0, k=5, metric="euclidean"):
+    """Array-level version of similarity_stats for raw (N, D) image and text positions."""
+    n = len(image)
+    k = min(k, n)
+
+    positives = _positive_logits(image, text, temperature, metric, tile_size)
+    row_lse = np.full(n, -np.inf, dtype=np.float32)
+    col_lse = np.full(n, -np.inf, dtype=np.float32)
+    row_rank = np.zeros(n, dtype=np.int64)
+    col_rank = np.zeros(n, dtype=np.int64)
+    topk_values = np.full((n, k), -np.inf, dtype=np.float32)
+    topk_indices = np.zeros((n, k), dtype=np.int64)
+    scratch = np.empty((min(tile_size, n), min(tile_size, n)), dtype=np.float32)
+
+    for rows, cols, block in iter_similarity_tiles(image, text, tile_size, temperature, metric):
+        # Running log-sum-exp in both directions
+        _fold_logsumexp(row_lse, col_lse, rows, cols, block, scratch)
+
+        # Count negatives that beat the positive pair
+        row_beats = block > positives[rows, None]
+        col_beats = block > positives[None, cols]
+        if rows == cols:
+            # The diagonal is the positive pair itself, rounded differently than
+            # `positives`; it must not count as beating itself
+            np.fill_diagonal(row_beats, False)
+            np.fill_diagonal(col_beats, False)
+        row_rank[rows] += row_beats.sum(axis=1)
+        col_rank[cols] += col_beats.sum(axis=0)
+
+        # Merge this tile's candidates into the running top-k of each row
+        values = np.concatenate([topk_values[rows], block], axis=1)
+        indices = np.concatenate([
+            topk_indices[rows],
+            np.broadcast_to(np.arange(cols.start, cols.stop), block.shape)
+        ], axis=1)
+        best = np.argpartition(-values, k - 1, axis=1)[:, :k]
+        topk_values[rows] = np.take_along_axis(values, best, axis=1)
+        topk_indices[rows] = np.take_along_axis(indices, best, axis=1)
+
+    # Sort the final top-k from best to worst
+    order = np.argsort(-topk_values, axis=1)
+    topk_values = np.take_along_axis(topk_values, order, axis=1)
+    topk_indices = np.take_along_axis(topk_indices, order, axis=1)
+
+    loss = _infonce_loss(positives, row_lse, col_lse)
+    return {
+        "positives": positives,
+        "row_lse": row_lse,
+        "col_lse": col_lse,
+        "row_rank": row_rank,
+        "col_rank": col_rank,
+        "topk_values": topk_values,
+        "topk_indices": topk_indices,
+        "loss": loss,
+        "recall_at_k": {
+            "image_to_text": float(np.mean(row_rank < k)),
+            "text_to_image": float(np.mean(col_rank < k)),
+        },
+    }
+
+
+def blocked_infonce_gradients(image, text, temperature, tile_size=2048, out_image=None, out_text=None):
+    """
+    Symmetric InfoNCE loss and gradients with Euclidean logits, in two tiled passes.
+
+    The first pass folds only the log-sum-exp of every row and column; the second
+    recomputes each tile, forms its slice of dL/ds and accumulates the
+    gradients. Memory stays at one tile instead of two N x N matrices.
+    """
+    n = len(image)
+    out_image = np.zeros_like(image) if out_image is None else out_image
+    out_text = np.zeros_like(text) if out_text is None else out_text
+    out_image.fill(0)
+    out_text.fill(0)
+
+    row_lse, col_lse = _tiled_logsumexp(image, text, tile_size, temperature)
+
+    row_weight = np.zeros(n, dtype=np.float32)
+    col_weight = np.zeros(n, dtype=np.float32)
+    grad_buffer = np.empty((2, min(tile_size, n), min(tile_size, n)), dtype=np.float32)
+    for rows, cols, block in iter_similarity_tiles(image, text, tile_size, temperature):
+        # dL/ds = (P_row + P_col - 2I) / 2N for this tile
+        grad, col_probs = grad_buffer[:, :block.shape[0], :block.shape[1]]
+        grad = _floored_exp(np.subtract(block, row_lse[rows, None], out=grad))
+        grad += _floored_exp(np.subtract(block, col_lse[None, cols], out=col_probs))
+        if rows == cols:
+            # Row and column tiles share boundaries, so positives only sit on diagonal tiles
+            np.fill_diagonal(grad, np.diagonal(grad) - 2)
+        grad *= 0.5 / n
+
+        out_image[rows] += grad @ text[cols]
+        out_text[cols] += grad.T @ image[rows]
+        row_weight[rows] += grad.sum(axis=1)
+        col_weight[cols] += grad.sum(axis=0)
+
+    # ds_ij/dx_i = 2 (y_j - x_i) / T and ds_ij/dy_j = 2 (x_i - y_j) / T
+    out_image -= row_weight[:, None] * image
+    out_text -= col_weight[:, None] * text
+    out_image *= 2 / temperature
+    out_text *= 2 / temperature
+    loss = _infonce_loss(_positive_logits(image, text, temperature, "euclidean", tile_size), row_lse, col_lse)
+    return loss, out_image, out_text
+
+
+if __name__ == "__main__":
+    import argparse
+    from data_generator import generate_initial_spaces, load_synthetic_spaces
+
+    parser = argparse.ArgumentParser(description="Report alignment statistics of an embedding pair without materializing the similarity matrix.")
+    parser.add_argument("-d", "--data", type=str, default=None,
+                       help="Prefix of a synthetic dataset written by data_generator.py (default: built-in demo data)")
+    parser.add_argument("-t", "--tile-size", type=int, default=2048,
+                       help="Tile size for the blocked kernel (default: 2048)")
+    parser.add_argument("--temperature", type=float, default=0.1,
+                       help="Logit temperature (default: 0.1)")
+    parser.add_argument("-k", type=int, default=5,
+                       help="Top-k for retrieval recall (default: 5)")
+    parser.add_argument("--metric", type=str, choices=METRICS, default="euclidean",
+                       help="Similarity function (default: euclidean)")
+
+    args = parser.parse_args()
+    space = load_synthetic_spaces(args.data) if args.data else generate_initial_spaces()
+    stats = similarity_stats(space, args.tile_size, args.temperature, args.k, args.metric)
+
+    print(f"Items: {len(space)}")
+    print(f"InfoNCE loss: {stats['loss']:.4f}")
+    print(f"Recall@{args.k} image->text: {stats['recall_at_k']['image_to_text']:.3f}")
+    print(f"Recall@{args.k} text->image: {stats['recall_at_k']['text_to_image']:.3f}")
@@ -9,8 +9,14 @@ This script creates a simplified visualization with proper progress feedback.
 import os
 import argparse
 import time
-from visualizer import plot_spaces, plot_combined_space
-from data_generator import generate_initial_spaces, CATEGORIES, CATEGORY_COLORS
+from data_generator import generate_initial_spaces
+from trajectory import DYNAMICS
+from easing import EASINGS, make_easing
+from frame_schedule import make_schedule
+from parallel_render import render_trajectory
+from frame_stream import GifEncoder, fit_gif_to_size
+from frame_reuse import read_manifest
+from raster_renderer import BACKENDS, RasterRenderer
 
 def try_import(module_name):
     """Try to import a module and return whether it was successful."""
@@ -20,7 +26,10 @@ def try_import(module_name):
     except ImportError:
         return False
 
-def create_static_visualization(steps, output_dir):
+def create_static_visualization(steps, output_dir, dynamics="linear", temperature=0.1, learning_rate=0.2,
+                                workers=1, gif_target_size=None, compositing=False,
+                                backend="matplotlib", min_motion=1.0, easing="linear", stagger=0.0,
+                                frames=None, min_dwell=1, max_dwell=None):
     """Create simplified static visualization with matplotlib."""
     print(f"\n=== Creating Static Visualization with {steps} steps ===")
     start_time = time.time()
@@ -29,57 +38,50 @@ def create_static_visualization(steps, output_dir):
     os.makedirs(output_dir, exist_ok=True)
     
     # Generate initial spaces
-    image_points_orig, text_points_orig = generate_initial_spaces()
-    
-    # Create copies to transform
-    image_points = {k: v.copy() for k, v in image_points_orig.items()}
-    text_points = {k: v.copy() for k, v in text_points_orig.items()}
+    space_orig = generate_initial_spaces()
     
     # Try to import the simplified visualization
     if try_import('simplified_static_visualization'):
-        from simplified_static_visualization import plot_spaces as improved_plot_spaces
+        from simplified_static_visualization import SpacesRenderer
         from simplified_static_visualization import plot_combined_space as improved_plot_combined
-        from simplified_static_visualization import create_animated_gif
         print("Using simplified visualization with progress feedback.")
     else:
         print("Using default visualization (no progress feedback).")
-        from visualizer import plot_spaces as improved_plot_spaces
+        from visualizer import SpacesRenderer
         from visualizer import plot_combined_space as improved_plot_combined
-        
-        def create_animated_gif(output_dir, steps):
-            print("Animated GIF creation not available with default visualization.")
     
-    # Plot initial state
-    improved_plot_spaces(image_points, text_points, 0, steps, output_dir, CATEGORIES, CATEGORY_COLORS)
+    # The raster backend draws the basic two-panel layout without matplotlib
+    if backend == "raster":
+        renderer_cls, renderer_options = RasterRenderer, {}
+    else:
+        renderer_cls, renderer_options = SpacesRenderer, dict(compositing=compositing)
     
-    # For each step, transform the spaces
-    for step in range(1, steps + 1):
-        # Calculate interpolation parameter
-        t = step / steps
-        
-        # For each item, interpolate between original and target
-        for item in image_points:
-            if item in text_points:
-                # Calculate target position (halfway between points)
-                target = (image_points_orig[item] + text_points_orig[item]) / 2
-                
-                # Move both points toward the target
-                image_points[item] = image_points_orig[item] * (1 - t) + target * t
-                text_points[item] = text_points_orig[item] * (1 - t) + target * t
-        
-        # Plot current state
-        improved_plot_spaces(image_points, text_points, step, steps, output_dir, CATEGORIES, CATEGORY_COLORS)
+    # Plot every step of the alignment trajectory, one persistent renderer per worker,
+    # streaming each frame into the animated GIF as it is rendered
+    animation_path = f"{output_dir}/contrastive_learning_animation.gif"
+    with GifEncoder(animation_path, fps=10) as animation:
+        space = render_trajectory(renderer_cls, space_orig, steps, output_dir, workers,
+                                  dynamics, temperature, learning_rate, sinks=[animation],
+                                  renderer_options=renderer_options, min_motion=min_motion,
+                                  easing=make_easing(easing, stagger, space_orig),
+                                  schedule=make_schedule(frames, min_dwell, max_dwell))
+
+    # Shrink the GIF from the saved frames if it came out over the size budget
+    rendered = read_manifest(output_dir)
+    if gif_target_size and os.path.getsize(animation_path) > gif_target_size * 1024:
+        frame_files = [os.path.join(output_dir, frame["file"]) for frame in rendered]
+        scale = fit_gif_to_size(frame_files, animation_path, gif_target_size * 1024,
+                                holds=[frame["hold"] for frame in rendered])
+        print(f"Animation scaled to {scale:.0%} to fit in {gif_target_size} KB")
+    print(f"\rAnimation created: {animation_path}")
     
     # Create combined space visualization
-    improved_plot_combined(image_points, text_points, output_dir, CATEGORIES, CATEGORY_COLORS)
-    
-    # Create animated GIF
-    create_animated_gif(output_dir, steps)
+    improved_plot_combined(space, output_dir)
     
     # Calculate and show elapsed time
     elapsed_time = time.time() - start_time
-    print(f"\nStatic visualization complete! {steps+1} frames created in '{output_dir}' folder.")
-    print(f"Total time: {elapsed_time:.2f} seconds ({elapsed_time/steps:.2f} seconds per frame)")
+    print(f"\nStatic visualization complete! {len(rendered)} frames created in '{output_dir}' folder.")
+    print(f"Total time: {elapsed_time:.2f} seconds ({elapsed_time/len(rendered):.2f} seconds per frame)")
     print(f"To view the visualization, open: {output_dir}/combined_space.png")
 
 def main():
@@ -89,6 +91,32 @@ def main():
                        help="Number of transformation steps (default: 100)")
     parser.add_argument("-o", "--output", type=str, default="contrastive_viz",
                        help="Output directory (default: contrastive_viz)")
+    parser.add_argument("--dynamics", type=str, choices=DYNAMICS, default="linear",
+                       help="Alignment dynamics: linear interpolation or InfoNCE training (default: linear)")
+    parser.add_argument("--temperature", type=float, default=0.1,
+                       help="InfoNCE temperature (default: 0.1)")
+    parser.add_argument("--learning-rate", type=float, default=0.2,
+                       help="InfoNCE learning rate (default: 0.2)")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                       help="Number of processes rendering static frames in parallel (default: 1)")
+    parser.add_argument("--gif-target-size", type=int, default=None,
+                       help="Largest size of the static animated GIF in KB, frames are downscaled to fit (default: no limit)")
+    parser.add_argument("--compositing", action="store_true",
+                       help="Rasterize the static parts of the figure once and redraw only moving artists per frame")
+    parser.add_argument("--backend", type=str, choices=BACKENDS, default="matplotlib",
+                       help="Frame renderer: matplotlib, or raster to draw the basic two-panel layout straight into NumPy buffers for very large point clouds (default: matplotlib)")
+    parser.add_argument("--min-motion", type=float, default=1.0,
+                       help="Pixels points must move before a frame redraws them, with --compositing or the raster backend; 0 redraws every step (default: 1.0)")
+    parser.add_argument("--easing", type=str, choices=EASINGS, default="linear",
+                       help="Easing of the linear alignment over time (default: linear)")
+    parser.add_argument("--stagger", type=float, default=0.0,
+                       help="Share of the timeline over which categories start moving one after another, 0 moves all items together (default: 0)")
+    parser.add_argument("--frames", type=int, default=None,
+                       help="Frame budget, first and last step included, placed along the trajectory where points move most and each held until the next (default: render every step)")
+    parser.add_argument("--min-dwell", type=int, default=1,
+                       help="Fewest steps a scheduled frame is held for (default: 1)")
+    parser.add_argument("--max-dwell", type=int, default=None,
+                       help="Most steps a scheduled frame is held for (default: no limit)")
     
     args = parser.parse_args()
     
@@ -98,10 +126,14 @@ def main():
     print("========================================================")
     print(f"Steps: {args.steps}")
     print(f"Output directory: {args.output}")
+    print(f"Dynamics: {args.dynamics}")
+    print(f"Workers: {args.workers}")
     print("--------------------------------------------------------")
     
     # Create visualization
-    create_static_visualization(args.steps, args.output)
+    create_static_visualization(args.steps, args.output, args.dynamics, args.temperature, args.learning_rate,
+                                args.workers, args.gif_target_size, args.compositing, args.backend, args.min_motion,
+                                args.easing, args.stagger, args.frames, args.min_dwell, args.max_dwell)
     
     print("\n========================================================")
     print("Visualization completed successfully!")
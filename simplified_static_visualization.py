@@ -5,139 +5,150 @@ Simplified version of the static visualization with progress indicators
 
 import matplotlib.pyplot as plt
 import numpy as np
-import os
-import time
+from matplotlib.collections import LineCollection
+from frame_renderer import PersistentRenderer
+from label_atlas import LabelAtlas, LabelSprites
 
-def plot_spaces(image_points, text_points, step, total_steps, output_dir, categories, category_colors):
-    """Create a simplified visualization of the two spaces at a given step with progress feedback"""
-    # Print progress indicator
-    progress_percent = int((step / total_steps) * 100)
-    print(f"\rGenerating frame {step}/{total_steps} [{progress_percent}%]", end="", flush=True)
-    
-    # Set up figure with simple layout
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 7))
+class SpacesRenderer(PersistentRenderer):
+    """Simplified side-by-side renderer that builds its figure once and updates it per step"""
     
-    # Plot image space
-    for category, items in categories.items():
-        category_color = category_colors[category]
+    def __init__(self, space, total_steps, output_dir, compositing=False):
+        """Build the figure, axes, point artists and static decorations"""
+        super().__init__(total_steps, output_dir, dict(dpi=150), compositing)
+        colors = space.point_colors()
         
-        for item in items:
-            if item in image_points:
-                point = image_points[item]
-                ax1.scatter(point[0], point[1], s=150, alpha=0.8, 
-                           color=category_color, edgecolors='white', linewidth=1.5)
-                
-                # Add text with improved styling - simplified
-                ax1.annotate(item.upper(), (point[0], point[1]), fontsize=9, 
-                           ha='center', va='center', weight='bold',
-                           color='white', bbox=dict(boxstyle="round,pad=0.2", 
-                                                 fc=category_color, ec="none", alpha=0.7))
-    
-    ax1.set_title('Image Embedding Space', fontsize=16, fontweight='bold')
-    ax1.set_xlim(0, 1)
-    ax1.set_ylim(0, 1)
-    ax1.set_xlabel('Dimension 1', fontsize=12)
-    ax1.set_ylabel('Dimension 2', fontsize=12)
-    ax1.grid(True, linestyle='--', alpha=0.3)
-    
-    # Plot text space
-    for category, items in categories.items():
-        category_color = category_colors[category]
+        # Set up figure with simple layout
+        self.fig, axes = plt.subplots(1, 2, figsize=(14, 7))
         
-        for item in items:
-            if item in text_points:
-                point = text_points[item]
-                # Use square markers for text points to differentiate from image points
-                ax2.scatter(point[0], point[1], s=150, alpha=0.8, 
-                           color=category_color, edgecolors='white', linewidth=1.5,
-                           marker='s')
-                
-                ax2.annotate(f"'{item.upper()}'", (point[0], point[1]), fontsize=9, 
-                           ha='center', va='center', weight='bold',
-                           color='white', bbox=dict(boxstyle="round,pad=0.2", 
-                                                  fc=category_color, ec="none", alpha=0.7))
-    
-    ax2.set_title('Text Embedding Space', fontsize=16, fontweight='bold')
-    ax2.set_xlim(0, 1)
-    ax2.set_ylim(0, 1)
-    ax2.set_xlabel('Dimension 1', fontsize=12)
-    ax2.set_ylabel('Dimension 2', fontsize=12)
-    ax2.grid(True, linestyle='--', alpha=0.3)
-    
-    # Add a title to the entire figure
-    fig.suptitle(f'Contrastive Learning Space Alignment - Step {step}/{total_steps}', 
-                 fontsize=18, fontweight='bold', y=0.98)
-    
-    # Add attribution
-    plt.figtext(0.95, 0.01, "Visualization by Mikey Bee", 
-               ha='right', va='bottom', fontsize=8, 
-               color='gray', style='italic')
-    
-    # Use standard adjust - no tight_layout
-    plt.subplots_adjust(wspace=0.3, left=0.05, right=0.95, bottom=0.1, top=0.9)
-    
-    # Format step number with leading zeros
-    padded_step = str(step).zfill(len(str(total_steps)))
-    
-    # Save the figure
-    plt.savefig(f"{output_dir}/step_{padded_step}.png", dpi=150)
-    plt.close()
+        self.panels = []
+        panel_specs = [
+            (axes[0], 'Image Embedding Space', 'o', lambda item: item.upper()),
+            # Use square markers for text points to differentiate from image points
+            (axes[1], 'Text Embedding Space', 's', lambda item: f"'{item.upper()}'"),
+        ]
+        for ax, title, marker, label_text in panel_specs:
+            # One marker collection per panel, colored by category
+            markers = ax.scatter(np.zeros(len(space)), np.zeros(len(space)), s=150, alpha=0.8, 
+                                 color=colors, edgecolors='white', linewidth=1.5,
+                                 marker=marker)
+            
+            if compositing:
+                # Pre-rendered label sprites, blitted at the points' positions
+                labels = [ax.add_artist(LabelSprites(LabelAtlas(fontsize=9, pad=0.2, box_alpha=0.7),
+                                                     [label_text(item) for item in space.items], colors))]
+            else:
+                # One label per point
+                labels = []
+                for i, item in enumerate(space.items):
+                    
+                    # Add text with improved styling - simplified
+                    labels.append(ax.annotate(label_text(item), (0, 0), fontsize=9, 
+                                              ha='center', va='center', weight='bold',
+                                              color='white', bbox=dict(boxstyle="round,pad=0.2", 
+                                                                       fc=colors[i], ec="none", alpha=0.7)))
+            self.panels.append((markers, labels))
+            
+            ax.set_title(title, fontsize=16, fontweight='bold')
+            ax.set_xlim(0, 1)
+            ax.set_ylim(0, 1)
+            ax.set_xlabel('Dimension 1', fontsize=12)
+            ax.set_ylabel('Dimension 2', fontsize=12)
+            ax.grid(True, linestyle='--', alpha=0.3)
+        
+        # Add a title to the entire figure
+        self.title = self.fig.suptitle('', fontsize=18, fontweight='bold', y=0.98)
+        
+        # Add attribution
+        self.fig.text(0.95, 0.01, "Visualization by Mikey Bee", 
+                      ha='right', va='bottom', fontsize=8, 
+                      color='gray', style='italic')
+        
+        # Use standard adjust - no tight_layout
+        self.fig.subplots_adjust(wspace=0.3, left=0.05, right=0.95, bottom=0.1, top=0.9)
+    
+    def update(self, space, step):
+        """Move points and labels and refresh the title, with progress feedback"""
+        # Print progress indicator
+        progress_percent = int((step / self.total_steps) * 100)
+        print(f"\rGenerating frame {step}/{self.total_steps} [{progress_percent}%]", end="", flush=True)
+        
+        for (markers, labels), points in zip(self.panels, (space.image, space.text)):
+            markers.set_offsets(points)
+            if self.compositing:
+                labels[0].set_positions(points)
+                continue
+            for label, point in zip(labels, points):
+                label.xy = label.xyann = tuple(point)
+        
+        self.title.set_text(f'Contrastive Learning Space Alignment - Step {step}/{self.total_steps}')
+
+    def dynamic_artists(self):
+        """Markers, labels and the step title"""
+        artists = [self.title]
+        for markers, labels in self.panels:
+            artists += [markers] + labels
+        return artists
+
+    def step_artists(self):
+        """The step title"""
+        return [self.title]
+
+def plot_spaces(space, step, total_steps, output_dir):
+    """Create a simplified visualization of the two spaces at a given step with progress feedback"""
+    renderer = SpacesRenderer(space, total_steps, output_dir)
+    renderer.render(space, step)
+    renderer.close()
 
-def plot_combined_space(image_points, text_points, output_dir, categories, category_colors):
+def plot_combined_space(space, output_dir):
     """Create a simplified visualization of the final aligned space"""
     print("\rGenerating final combined view...", end="", flush=True)
     
     # Create figure
     plt.figure(figsize=(10, 8))
+    colors = space.point_colors()
     
     # Add legend for categories with improved styling
-    for category, color in category_colors.items():
+    for category, color in zip(space.categories, space.category_colors):
         plt.scatter([], [], s=150, color=color, label=category.capitalize(), 
                    edgecolors='white', linewidth=1.5)
     
     plt.legend(loc='upper right', fontsize=12, framealpha=0.7, 
               title="Categories")
     
-    # Plot points by category
-    for category, items in categories.items():
-        category_color = category_colors[category]
+    # Plot image points with circle markers, one collection colored by category
+    plt.scatter(space.image[:, 0], space.image[:, 1], s=150, alpha=0.9, 
+               color=colors, edgecolors='white', linewidth=1.5,
+               marker='o', zorder=10)
+    
+    # Plot text points with square markers
+    plt.scatter(space.text[:, 0], space.text[:, 1], s=150, alpha=0.7, 
+               color=colors, edgecolors='white', linewidth=1.5,
+               marker='s', zorder=9)
+    
+    # Add midpoint indicators to show where the points will converge
+    mid_points = (space.image + space.text) / 2
+    plt.scatter(mid_points[:, 0], mid_points[:, 1], s=40, alpha=0.3, 
+               color='gray', marker='x', zorder=6)
+    
+    # Draw connecting lines between corresponding points as one collection
+    plt.gca().add_collection(LineCollection(np.stack([space.image, space.text], axis=1),
+                                            colors='k', linestyles='--', alpha=0.3, zorder=5, linewidths=1.5))
+    
+    for i, item in enumerate(space.items):
+        img_point = space.image[i]
+        plt.annotate(item.upper(), (img_point[0], img_point[1]), fontsize=9, 
+                   ha='center', va='center', weight='bold',
+                   color='white', bbox=dict(boxstyle="round,pad=0.2", 
+                                         fc=colors[i], ec="none", alpha=0.7),
+                   zorder=11)
         
-        for item in items:
-            # Plot image points with circle markers
-            if item in image_points:
-                img_point = image_points[item]
-                plt.scatter(img_point[0], img_point[1], s=150, alpha=0.9, 
-                           color=category_color, edgecolors='white', linewidth=1.5,
-                           marker='o', zorder=10)
-                
-                plt.annotate(item.upper(), (img_point[0], img_point[1]), fontsize=9, 
-                           ha='center', va='center', weight='bold',
-                           color='white', bbox=dict(boxstyle="round,pad=0.2", 
-                                                 fc=category_color, ec="none", alpha=0.7),
-                           zorder=11)
-            
-            # Plot text points with square markers
-            if item in text_points:
-                txt_point = text_points[item]
-                plt.scatter(txt_point[0], txt_point[1], s=150, alpha=0.7, 
-                          color=category_color, edgecolors='white', linewidth=1.5,
-                          marker='s', zorder=9)
-                
-                plt.annotate(f"'{item.upper()}'", 
-                           (txt_point[0] + 0.02, txt_point[1] - 0.02), 
-                           fontsize=9, ha='center', va='center', weight='bold',
-                           color='white', bbox=dict(boxstyle="round,pad=0.2", 
-                                                  fc=category_color, ec="none", alpha=0.6),
-                           zorder=11)
-                
-                # Draw connecting line between corresponding points
-                plt.plot([img_point[0], txt_point[0]], [img_point[1], txt_point[1]], 
-                         'k--', alpha=0.3, zorder=5, linewidth=1.5)
-                
-                # Add a midpoint indicator to show where the points will converge
-                mid_point = [(img_point[0] + txt_point[0])/2, (img_point[1] + txt_point[1])/2]
-                plt.scatter(mid_point[0], mid_point[1], s=40, alpha=0.3, 
-                           color='gray', marker='x', zorder=6)
+        txt_point = space.text[i]
+        plt.annotate(f"'{item.upper()}'", 
+                   (txt_point[0] + 0.02, txt_point[1] - 0.02), 
+                   fontsize=9, ha='center', va='center', weight='bold',
+                   color='white', bbox=dict(boxstyle="round,pad=0.2", 
+                                          fc=colors[i], ec="none", alpha=0.6),
+                   zorder=11)
     
     # Add title and explanation
     plt.title('Aligned Shared Embedding Space', fontsize=18, fontweight='bold')
@@ -170,19 +181,16 @@ def create_animated_gif(output_dir, total_steps, fps=10):
     """Create an animated GIF from the rendered frames"""
     print("\nCreating animated GIF...", end="", flush=True)
     
-    try:
-        import imageio
-        import glob
-        
-        # Get all step images
-        image_files = sorted(glob.glob(f"{output_dir}/step_*.png"))
-        
-        # Create GIF animation directly with imageio (simpler approach)
-        with imageio.get_writer(f"{output_dir}/contrastive_learning_animation.gif", mode='I', fps=fps) as writer:
-            for image_file in image_files:
-                image = imageio.imread(image_file)
-                writer.append_data(image)
-        
-        print(f"\rAnimation created: {output_dir}/contrastive_learning_animation.gif")
-    except ImportError:
-        print("\rCould not create animation. Please install imageio: pip install imageio")
+    import glob
+    from frame_stream import GifEncoder, sample_image_files, stream_image_files
+    
+    # Get all step images
+    image_files = sorted(glob.glob(f"{output_dir}/step_*.png"))
+    
+    # Stream them through the GIF encoder one frame at a time, sharing one
+    # palette sampled from across the whole animation
+    with GifEncoder(f"{output_dir}/contrastive_learning_animation.gif", fps,
+                    sample_frames=sample_image_files(image_files)) as encoder:
+        stream_image_files(image_files, encoder)
+    
+    print(f"\rAnimation created: {output_dir}/contrastive_learning_animation.gif")
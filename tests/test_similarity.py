@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for the blocked similarity kernel
+Author: Mikey Bee, 2025
+"""
+
+import numpy as np
+import pytest
+from data_generator import generate_initial_spaces
+from similarity import METRICS, blocked_infonce_gradients, tiled_similarity_stats
+
+
+def dense_ranks(image, text, temperature, metric):
+    """Negatives beating each positive, from the full logit matrix in float64."""
+    image = np.asarray(image, dtype=np.float64)
+    text = np.asarray(text, dtype=np.float64)
+    if metric == "euclidean":
+        logits = -((image[:, None] - text[None]) ** 2).sum(axis=2) / temperature
+    else:
+        logits = image @ text.T / temperature
+    positives = np.diagonal(logits)
+    beats = logits > positives[:, None]
+    col_beats = logits > positives[None, :]
+    np.fill_diagonal(beats, False)
+    np.fill_diagonal(col_beats, False)
+    return beats.sum(axis=1), col_beats.sum(axis=0)
+
+
+def logsumexp(values, axis):
+    """Log-sum-exp of a float64 array along one axis."""
+    peak = values.max(axis=axis, keepdims=True)
+    return (np.log(np.exp(values - peak).sum(axis=axis, keepdims=True)) + peak).squeeze(axis)
+
+
+@pytest.mark.parametrize("tile_size", [16, 7, 2048])
+def test_identical_spaces_have_perfect_recall(tile_size):
+    text = generate_initial_spaces().text
+    stats = tiled_similarity_stats(text, text, tile_size, 0.1, k=1)
+    assert stats["recall_at_k"] == {"image_to_text": 1.0, "text_to_image": 1.0}
+    row_rank, col_rank = dense_ranks(text, text, 0.1, "euclidean")
+    np.testing.assert_array_equal(stats["row_rank"], row_rank)
+    np.testing.assert_array_equal(stats["col_rank"], col_rank)
+
+
+@pytest.mark.parametrize("metric", METRICS)
+def test_ranks_match_dense_reference(metric):
+    space = generate_initial_spaces()
+    stats = tiled_similarity_stats(space.image, space.text, 16, 0.1, k=5, metric=metric)
+    row_rank, col_rank = dense_ranks(space.image, space.text, 0.1, metric)
+    np.testing.assert_array_equal(stats["row_rank"], row_rank)
+    np.testing.assert_array_equal(stats["col_rank"], col_rank)
+
+
+@pytest.mark.parametrize("tile_size", [16, 2048])
+def test_blocked_gradients_match_dense_reference(tile_size):
+    space = generate_initial_spaces()
+    image, text = space.image.astype(np.float64), space.text.astype(np.float64)
+    diff = image[:, None] - text[None]
+    logits = -(diff ** 2).sum(axis=2) / 0.1
+    row_probs = np.exp(logits - logits.max(axis=1, keepdims=True))
+    row_probs /= row_probs.sum(axis=1, keepdims=True)
+    col_probs = np.exp(logits - logits.max(axis=0, keepdims=True))
+    col_probs /= col_probs.sum(axis=0, keepdims=True)
+    grad = (row_probs + col_probs - 2 * np.eye(len(image))) / (2 * len(image))
+    # ds_ij/dx_i = -2 (x_i - y_j) / T
+    image_grad = -2 / 0.1 * (grad[:, :, None] * diff).sum(axis=1)
+    text_grad = 2 / 0.1 * (grad[:, :, None] * diff).sum(axis=0)
+
+    loss, out_image, out_text = blocked_infonce_gradients(space.image, space.text, 0.1, tile_size)
+    assert loss == pytest.approx(0.5 * (logsumexp(logits, 1).mean() + logsumexp(logits, 0).mean())
+                                 - np.diagonal(logits).mean(), rel=1e-5)
+    scale = max(np.abs(image_grad).max(), np.abs(text_grad).max())
+    np.testing.assert_allclose(out_image, image_grad, rtol=1e-4, atol=1e-5 * scale)
+    np.testing.assert_allclose(out_text, text_grad, rtol=1e-4, atol=1e-5 * scale)
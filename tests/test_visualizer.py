@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Tests for the side-by-side space renderer
+Author: Mikey Bee, 2025
+"""
+
+import numpy as np
+import pytest
+from PIL import Image
+from data_generator import generate_initial_spaces
+from trajectory import compute_alignment
+from visualizer import SpacesRenderer
+
+
+@pytest.mark.parametrize("compositing", [False, True])
+def test_density_frames_fill_the_panels(tmp_path, compositing):
+    space = generate_initial_spaces()
+    image, text = compute_alignment(space, 4)
+    renderer = SpacesRenderer(space, 4, str(tmp_path), compositing=compositing, density=True)
+    renderer.render(space.with_positions(image[4], text[4]), 4)
+    left, bottom, _, height = renderer._crop
+    panels = [ax.bbox.extents for ax in renderer.fig.axes]
+    renderer.close()
+
+    frame = np.asarray(Image.open(renderer.frame_path(4)).convert('RGB')).astype(int)
+    for x0, y0, x1, y1 in panels:
+        # Figure pixels run upwards from the bottom left, frame rows downwards from the crop
+        panel = frame[round(bottom + height - y1):round(bottom + height - y0), round(x0 - left):round(x1 - left)]
+        # Grid, frame and background are all gray; only the density is colored
+        assert (np.ptp(panel, axis=2) > 30).any()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Trajectory Engine for Contrastive Learning Visualization
+Author: Mikey Bee, 2025
+
+This module computes the alignment trajectory of an EmbeddingSpace: every item
+moves from its original position toward the midpoint of its image/text pair.
+All steps are computed with one broadcast over a vector of interpolation
+parameters, or yielded one step at a time to bound memory. Easings from
+easing.py may be staggered, giving every item its own parameter per step.
+"""
+
+import numpy as np
+
+
+def interpolation_params(total_steps, easing=None):
+    """
+    Return the (total_steps + 1,) vector of interpolation parameters t in [0, 1].
+
+    With a staggered easing the parameters are per item, of shape (total_steps + 1, N).
+    """
+    t = np.arange(total_steps + 1, dtype=np.float32) / max(total_steps, 1)
+    if easing is not None:
+        t = np.asarray(easing(t), dtype=np.float32)
+    return t
+
+
+def alignment_targets(space, target_offset=None):
+    """Return the (N, D) target positions: the midpoint of each image/text pair."""
+    target = (space.image + space.text) / 2
+    if target_offset is not None:
+        target += np.asarray(target_offset, dtype=np.float32)
+    return target
+
+
+def compute_trajectory(space, total_steps, easing=None, target_offset=None):
+    """
+    Compute the full alignment trajectory in one broadcast.
+
+    Returns two (total_steps + 1, N, D) float32 arrays holding the image and
+    text positions at every step.
+    """
+    # (steps, 1 or N, 1) broadcasts over items and dimensions
+    t = interpolation_params(total_steps, easing)
+    t = t.reshape(len(t), -1, 1)
+    target = alignment_targets(space, target_offset)
+
+    image = space.image + t * (target - space.image)
+    text = space.text + t * (target - space.text)
+    return image, text
+
+
+def iter_trajectory(space, total_steps, easing=None, target_offset=None):
+    """
+    Yield `(step, frame_space)` for every step of the alignment trajectory.
+
+    Only one step is held in memory: `frame_space` is the same EmbeddingSpace
+    on every iteration, with its position buffers refilled in place. Copy it if
+    a step needs to outlive the iteration. The easing is applied one step at
+    a time, so staggered per-item parameters never exist for all steps at once.
+    """
+    t_values = interpolation_params(total_steps)
+    target = alignment_targets(space, target_offset)
+    image_delta = target - space.image
+    text_delta = target - space.text
+
+    frame_space = space.copy()
+    for step, t in enumerate(t_values):
+        if easing is not None:
+            t = easing(t)
+        # (1, 1) or, staggered, (N, 1)
+        t = np.asarray(t, dtype=np.float32).reshape(-1, 1)
+        np.multiply(image_delta, t, out=frame_space.image)
+        frame_space.image += space.image
+        np.multiply(text_delta, t, out=frame_space.text)
+        frame_space.text += space.text
+        yield step, frame_space
+
+
+# Alignment dynamics selectable from the runners' --dynamics option
+DYNAMICS = ("linear", "infonce")
+
+
+def iter_alignment(space, total_steps, dynamics="linear", easing=None, target_offset=None,
+                   temperature=0.1, learning_rate=0.2):
+    """Yield `(step, frame_space)` using linear interpolation or InfoNCE training."""
+    if dynamics == "infonce":
+        from infonce import iter_infonce
+        return iter_infonce(space, total_steps, temperature, learning_rate)
+    if dynamics != "linear":
+        raise ValueError(f"Unknown dynamics '{dynamics}', expected one of {DYNAMICS}")
+    return iter_trajectory(space, total_steps, easing, target_offset)
+
+
+def compute_alignment(space, total_steps, dynamics="linear", easing=None, target_offset=None,
+                      temperature=0.1, learning_rate=0.2):
+    """Return (total_steps + 1, N, D) image and text arrays for the selected dynamics."""
+    if dynamics == "infonce":
+        from infonce import simulate_infonce
+        return simulate_infonce(space, total_steps, temperature, learning_rate)
+    if dynamics != "linear":
+        raise ValueError(f"Unknown dynamics '{dynamics}', expected one of {DYNAMICS}")
+    return compute_trajectory(space, total_steps, easing, target_offset)
@@ -1,119 +1,156 @@
 #!/usr/bin/env python3
 import matplotlib.pyplot as plt
 import numpy as np
-import os
+from matplotlib.collections import LineCollection
+from frame_renderer import PersistentRenderer, describe_step
+from density import aggregate, density_image, shade
+from label_atlas import LabelAtlas, LabelSprites
+from label_layout import LABEL_CAP, LabelLayout
 
-def plot_spaces(image_points, text_points, step, total_steps, output_dir, categories, category_colors):
-    """Create a visualization of the two spaces at a given step"""
-    # Set up figure with higher DPI for better quality
-    plt.figure(figsize=(15, 7))
-    
-    # Plot image space
-    plt.subplot(1, 2, 1)
-    
-    # Plot points by category
-    for category, items in categories.items():
-        category_color = category_colors[category]
+class SpacesRenderer(PersistentRenderer):
+    """
+    Side-by-side image/text space renderer that builds its figure once and updates it per step.
+    
+    With `density=True` each panel shows a per-pixel, category-blended density
+    image instead of one marker and label per point, for very large spaces.
+    Otherwise at most `max_labels` non-overlapping labels are drawn per panel.
+    """
+    
+    def __init__(self, space, total_steps, output_dir, compositing=False, density=False, max_labels=LABEL_CAP):
+        """Build the figure, axes, point artists and static decorations."""
+        super().__init__(total_steps, output_dir, dict(dpi=150, bbox_inches='tight'), compositing)
+        self.density = density
+        colors = None if density else space.point_colors()
         
-        for item in items:
-            if item in image_points:
-                point = image_points[item]
-                plt.scatter(point[0], point[1], s=150, alpha=0.7, 
-                           color=category_color, edgecolors='black')
-                plt.annotate(item.upper(), (point[0], point[1]), fontsize=8, 
-                           ha='center', va='center', weight='bold')
-    
-    plt.title('Image Space', fontsize=16, fontweight='bold')
-    plt.xlim(0, 1)
-    plt.ylim(0, 1)
-    plt.grid(True, alpha=0.3)
-    
-    # Plot text space
-    plt.subplot(1, 2, 2)
-    
-    # Plot points by category
-    for category, items in categories.items():
-        category_color = category_colors[category]
+        # Set up figure with higher DPI for better quality
+        self.fig = plt.figure(figsize=(15, 7), dpi=150)
         
-        for item in items:
-            if item in text_points:
-                point = text_points[item]
-                plt.scatter(point[0], point[1], s=150, alpha=0.7, 
-                           color=category_color, edgecolors='black')
-                plt.annotate(f"T:{item.upper()}", (point[0], point[1]), fontsize=8, 
-                           ha='center', va='center', weight='bold')
-    
-    plt.title('Text Space', fontsize=16, fontweight='bold')
-    plt.xlim(0, 1)
-    plt.ylim(0, 1)
-    plt.grid(True, alpha=0.3)
-    
-    # Add title and explanation
-    plt.suptitle(f'Contrastive Learning Space Alignment - Step {step}/{total_steps}', 
-                fontsize=18, fontweight='bold')
-    
-    # Add explanation based on step
-    if step == 0:
-        explanation = "Starting with misaligned spaces: similar concepts are in different positions"
-    elif step < total_steps // 4:
-        explanation = "Beginning alignment through contrastive learning..."
-    elif step < total_steps // 2:
-        explanation = "Gradually aligning spaces through contrastive learning..."
-    elif step < 3 * total_steps // 4:
-        explanation = "Similar concepts are being pulled together across spaces"
-    else:
-        explanation = "Spaces nearing perfect alignment"
-    
-    if step == total_steps:
-        explanation = "Spaces aligned! Same concepts now occupy the same positions"
-    
-    plt.figtext(0.5, 0.01, explanation, ha='center', fontsize=14)
-    
-    # Save the figure with proper zero-padding in filename for correct sorting
-    plt.tight_layout(rect=[0, 0.05, 1, 0.95])
-    
-    # Format step number with leading zeros
-    padded_step = str(step).zfill(len(str(total_steps)))
-    
-    plt.savefig(f"{output_dir}/step_{padded_step}.png", dpi=150, bbox_inches='tight')
-    plt.close()
+        self.panels = []
+        self.prefixes = []
+        self.layout = LabelLayout(fontsize=8, weight='bold', pad=0, max_labels=max_labels)
+        for position, title, prefix in [(1, 'Image Space', ''), (2, 'Text Space', 'T:')]:
+            ax = self.fig.add_subplot(1, 2, position)
+            self.prefixes.append(prefix)
+            
+            if density:
+                # One density image per panel, refreshed per frame
+                image = ax.imshow(np.zeros((1, 1, 4)), extent=[0, 1, 0, 1], origin='upper',
+                                  interpolation='nearest', aspect='auto')
+                self.panels.append((image, []))
+                self._style_panel(ax, title)
+                continue
+            
+            # One marker collection per panel, colored by category
+            markers = ax.scatter(np.zeros(len(space)), np.zeros(len(space)), s=150, alpha=0.7, 
+                                 color=colors, edgecolors='black')
+            
+            if compositing:
+                # Pre-rendered label sprites, blitted for the points the layout keeps
+                labels = [ax.add_artist(LabelSprites(LabelAtlas(fontsize=8, color='black', box_alpha=None),
+                                                     [f"{prefix}{item.upper()}" for item in space.items]))]
+            else:
+                # A fixed pool of labels, reassigned per frame to the points the layout keeps
+                labels = []
+                for _ in range(min(max_labels, len(space))):
+                    labels.append(ax.annotate('', (0, 0), fontsize=8, 
+                                              ha='center', va='center', weight='bold', visible=False))
+            self.panels.append((markers, labels))
+            self._style_panel(ax, title)
+        
+        # Add title and explanation
+        self.title = self.fig.suptitle('', fontsize=18, fontweight='bold')
+        self.explanation = self.fig.text(0.5, 0.01, '', ha='center', fontsize=14)
+        
+        # Lay out once with the initial state; later frames only move artists
+        self.update(space, 0)
+        self.fig.tight_layout(rect=[0, 0.05, 1, 0.95])
+    
+    def _style_panel(self, ax, title):
+        """Title, limits and grid of one panel."""
+        ax.set_title(title, fontsize=16, fontweight='bold')
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
+        ax.grid(True, alpha=0.3)
+    
+    def update(self, space, step):
+        """Move points and labels and refresh the step text."""
+        renderer = self.fig.canvas.get_renderer()
+        for (markers, labels), prefix, points in zip(self.panels, self.prefixes, (space.image, space.text)):
+            if self.density:
+                # One density pixel per saved-frame pixel of the panel
+                width, height = markers.axes.get_position().size * self.fig.get_size_inches() * 150
+                markers.set_data(density_image(points, space.category_ids, space.category_colors,
+                                               int(width), int(height)))
+                continue
+            markers.set_offsets(points)
+            
+            # Only non-overlapping labels, category representatives first
+            ax, items = markers.axes, space.items
+            kept = self.layout.select(renderer, ax.transData.transform(points[:, :2]), space.category_ids,
+                                      len(space.categories), lambda i: f"{prefix}{items[i].upper()}",
+                                      ax.bbox.extents)
+            if self.compositing:
+                labels[0].set_positions(points, kept)
+                continue
+            for label, i in zip(labels, kept):
+                label.set_text(f"{prefix}{items[i].upper()}")
+                label.xy = label.xyann = tuple(points[i])
+                label.set_visible(True)
+            for label in labels[len(kept):]:
+                label.set_visible(False)
+        
+        self.title.set_text(f'Contrastive Learning Space Alignment - Step {step}/{self.total_steps}')
+        self.explanation.set_text(describe_step(step, self.total_steps)[0])
+
+    def dynamic_artists(self):
+        """Markers, labels and the step text."""
+        artists = [self.title, self.explanation]
+        for markers, labels in self.panels:
+            artists += [markers] + labels
+        return artists
+
+    def step_artists(self):
+        """The step text."""
+        return [self.title, self.explanation]
+
+def plot_spaces(space, step, total_steps, output_dir):
+    """Create a visualization of the two spaces at a given step"""
+    renderer = SpacesRenderer(space, total_steps, output_dir)
+    renderer.render(space, step)
+    renderer.close()
 
-def plot_combined_space(image_points, text_points, output_dir, categories, category_colors):
+def plot_combined_space(space, output_dir, density=False, max_labels=LABEL_CAP):
     """Create a visualization of the final aligned space"""
-    plt.figure(figsize=(12, 10))
-    
-    # Add legend for categories
-    for category, color in category_colors.items():
-        plt.scatter([], [], s=100, color=color, label=category.capitalize())
-    
-    # Plot points by category
-    for category, items in categories.items():
-        category_color = category_colors[category]
+    fig = plt.figure(figsize=(12, 10), dpi=150)
+    
+    # Add legend for categories, skipped when there are too many to read
+    show_legend = len(space.categories) <= 20
+    if show_legend:
+        for category, color in zip(space.categories, space.category_colors):
+            plt.scatter([], [], s=100, color=color, label=category.capitalize())
+    
+    if density:
+        # Both spaces binned into one grid of about one density pixel per saved pixel
+        count, color_sum = aggregate(space.image, space.category_ids, space.category_colors, 1400, 1200)
+        text_count, text_color_sum = aggregate(space.text, space.category_ids, space.category_colors,
+                                               1400, 1200)
+        plt.imshow(shade(count + text_count, color_sum + text_color_sum), extent=[0, 1, 0, 1],
+                   origin='upper', interpolation='nearest', aspect='auto')
+    else:
+        colors = space.point_colors()
         
-        for item in items:
-            # Plot image points
-            if item in image_points:
-                img_point = image_points[item]
-                plt.scatter(img_point[0], img_point[1], s=150, alpha=0.7, 
-                           color=category_color, edgecolors='black')
-                plt.annotate(item.upper(), (img_point[0], img_point[1]), fontsize=8, 
-                           ha='center', va='center', weight='bold')
-            
-            # Plot text points with slight offset
-            if item in text_points:
-                txt_point = text_points[item]
-                offset = np.array([0.02, -0.02])
-                plt.scatter(txt_point[0], txt_point[1], s=150, alpha=0.4, 
-                          color=category_color, edgecolors='black', marker='s')
-                plt.annotate(f"T:{item.upper()}", 
-                           (txt_point[0] + offset[0], txt_point[1] + offset[1]), 
-                           fontsize=8, ha='center', va='center', weight='bold')
-                
-                # Draw connecting line
-                plt.plot([img_point[0], txt_point[0]], [img_point[1], txt_point[1]], 
-                         'k--', alpha=0.3)
+        # Plot points colored by category, one collection per space
+        plt.scatter(space.image[:, 0], space.image[:, 1], s=150, alpha=0.7, 
+                   color=colors, edgecolors='black')
+        plt.scatter(space.text[:, 0], space.text[:, 1], s=150, alpha=0.4, 
+                   color=colors, edgecolors='black', marker='s')
+    
+        # Draw connecting lines between corresponding points as one collection
+        plt.gca().add_collection(LineCollection(np.stack([space.image, space.text], axis=1),
+                                                colors='k', linestyles='--', alpha=0.3))
     
-    plt.legend(loc='upper right', fontsize=12)
+    if show_legend:
+        plt.legend(loc='upper right', fontsize=12)
     
     # Add title and explanation
     plt.title('Aligned Shared Space', fontsize=18, fontweight='bold')
@@ -124,7 +161,23 @@ def plot_combined_space(image_points, text_points, output_dir, categories, categ
     plt.figtext(0.5, 0.01, "Image and text representations now occupy the same semantic space", 
                ha='center', fontsize=14)
     
-    # Save the figure
     plt.tight_layout(rect=[0, 0.05, 1, 0.95])
+    
+    if not density:
+        # Only non-overlapping labels, image and text ones competing for the same room;
+        # text points are labeled with a slight offset
+        ax, items, n = plt.gca(), space.items, len(space)
+        anchors = np.concatenate([space.image[:, :2], space.text[:, :2] + np.array([0.02, -0.02])])
+        layout = LabelLayout(fontsize=8, weight='bold', pad=0, max_labels=max_labels)
+        
+        def text_of(i):
+            return items[i].upper() if i < n else f"T:{items[i - n].upper()}"
+        
+        kept = layout.select(fig.canvas.get_renderer(), ax.transData.transform(anchors),
+                             np.tile(space.category_ids, 2), len(space.categories), text_of, ax.bbox.extents)
+        for i in kept:
+            plt.annotate(text_of(i), tuple(anchors[i]), fontsize=8, ha='center', va='center', weight='bold')
+    
+    # Save the figure
     plt.savefig(f"{output_dir}/combined_space.png", dpi=150, bbox_inches='tight')
     plt.close()